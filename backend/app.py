@@ -1,28 +1,59 @@
+import base64
 from collections import deque
-from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from functools import wraps
+import json
+import multiprocessing
 import os
-import re
+import threading
+import time
 from typing import Dict
 from uuid import uuid4
+import zipfile
 
-from flask import Flask, request, jsonify, send_from_directory
+import click
+import numpy as np
+from flask import Flask, Response, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash, check_password_hash
-from transformers import pipeline
 
 from utils.ocr import extract_text_from_image
-from utils.classifier import load_categories, classify_text
+from utils.batching import MicroBatcher
+from utils.job_queue import JobQueue
+from utils.db_profile import apply_sqlite_profile, sqlite_settings
+from utils.export import EXPORT_FORMATS, csv_chunks, gzip_chunks, ndjson_chunks
+from utils.fingerprint import MINHASH_THRESHOLD, minhash, minhash_bands, receipt_fingerprint, similarity
+from utils.vendor_index import DEFAULT_THRESHOLD, VendorIndex, canonical_key
+from utils.vendor_ner import VendorNER
+from utils.classifier import CLASSIFIER_MODEL, load_categories, classify_text, classify_texts_with_scores
+from utils.model_registry import registry as model_registry
+from utils.migrations import run_migrations
+from utils.ocr_cache import OCRCache
+from utils.response_cache import ResponseCache
+from utils.anomaly_rules import ExpenseBatch, RuleEngine, default_rules
+from utils.rescore import category_stats_before, earlier_candidates, fingerprint_duplicates, unknown_vendors
+from utils.receipt_parser import guess_vendor, parse_receipt
+from utils.snapshot import SNAPSHOT_FORMATS, available as snapshots_available, load_manifest, remove_parts, \
+    save_manifest, write_part
+from utils.rollups import CLEARED_STATUS, add_delta, day_bucket, rebuild_rollups, rollup_keys
 
 app = Flask(__name__)
 CORS(app)
 
 # Database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///expenses.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///expenses.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Largest request body, and largest total uncompressed size of a zip batch
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_CONTENT_LENGTH', str(200 * 1024 * 1024)))
 db = SQLAlchemy(app)
 
+# WAL, synchronous=NORMAL, cache/mmap sizing and busy timeout (see utils/db_profile.py)
+with app.app_context():
+    DB_PRAGMAS = apply_sqlite_profile(db.engine)
+
 # ------------------------
 # File Serving Route FIXED
 # ------------------------
@@ -41,6 +72,68 @@ LOGO_FOLDER = os.path.join(UPLOAD_FOLDER, "logos")
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 MAX_LOGO_SIZE = 5 * 1024 * 1024  # 5MB
 
+# Repeated uploads of the same image reuse the stored OCR/classification result
+ocr_cache = OCRCache(
+    os.environ.get("OCR_CACHE_PATH", os.path.join(app.instance_path, "ocr_cache.db")),
+    max_bytes=int(os.environ.get("OCR_CACHE_MAX_MB", "64")) * 1024 * 1024
+)
+
+# Dashboard GET responses are served from memory until the next committed
+# write (see utils/response_cache.py); RESPONSE_CACHE_SIZE=0 disables it.
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get("RESPONSE_CACHE_SIZE", "256")),
+    ttl_seconds=float(os.environ.get("RESPONSE_CACHE_TTL", "30"))
+)
+
+
+def _mark_write(session, *args):
+    session.info["wrote"] = True
+
+
+def _mark_write_statement(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _mark_write(orm_execute_state.session)
+
+
+def _bump_data_version(session):
+    if session.info.pop("wrote", False):
+        response_cache.bump()
+
+
+def _discard_write(session, *args):
+    session.info.pop("wrote", None)
+
+
+# Any commit that flushed changes or ran an INSERT/UPDATE/DELETE bumps the data version
+db.event.listen(db.session, "after_flush", _mark_write)
+db.event.listen(db.session, "do_orm_execute", _mark_write_statement)
+db.event.listen(db.session, "after_commit", _bump_data_version)
+db.event.listen(db.session, "after_rollback", _discard_write)
+
+
+def cached_response(view):
+    """Serve a GET view from response_cache, with ETag/If-None-Match revalidation."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not response_cache.enabled:
+            return view(*args, **kwargs)
+        key = request.path + "?" + "&".join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+        cached = response_cache.get(key)
+        if cached is None:
+            version = response_cache.version
+            response = app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            etag = response_cache.put(key, version, response.get_data(), response.mimetype)
+        else:
+            body, mimetype, etag = cached
+            response = app.response_class(body, mimetype=mimetype)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["X-Cache"] = "MISS" if cached is None else "HIT"
+        return response.make_conditional(request)
+    return wrapper
+
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -50,6 +143,13 @@ def allowed_file(filename):
 # Database Models
 # ------------------------
 class Expense(db.Model):
+    __table_args__ = (
+        db.Index("ix_expense_category_uploaded_at", "category", "uploaded_at", "amount"),
+        db.Index("ix_expense_uploaded_at_id", "uploaded_at", "id"),
+        db.Index("ix_expense_vendor", "vendor"),
+        db.Index("ix_expense_fingerprint", "fingerprint"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     filename = db.Column(db.String(255))
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -58,21 +158,33 @@ class Expense(db.Model):
     amount = db.Column(db.Float)
     text_preview = db.Column(db.Text)
     status = db.Column(db.String(50), default="Processed")
+    # Duplicate detection (see utils/fingerprint.py)
+    fingerprint = db.Column(db.String(16))
+    text_minhash = db.Column(db.LargeBinary)
 
     def to_dict(self):
+        return Expense.row_to_dict(self)
+
+    @staticmethod
+    def row_to_dict(row):
+        """Serialize an Expense or a column-projected expense row."""
         return {
-            "id": self.id,
-            "file": self.filename,
-            "uploadedAt": self.uploaded_at.isoformat() + "Z",
-            "category": self.category,
-            "vendor": self.vendor,
-            "total": self.amount,
-            "textPreview": self.text_preview,
-            "status": self.status
+            "id": row.id,
+            "file": row.filename,
+            "uploadedAt": row.uploaded_at.isoformat() + "Z",
+            "category": row.category,
+            "vendor": row.vendor,
+            "total": row.amount,
+            "textPreview": row.text_preview,
+            "status": row.status
         }
 
 
 class UserSettings(db.Model):
+    __table_args__ = (
+        db.Index("ix_user_settings_role_user_id", "role", "user_id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     role = db.Column(db.String(50), nullable=False)
     user_id = db.Column(db.String(100), default="default")
@@ -140,7 +252,21 @@ class UserSettings(db.Model):
         }
 
 
+class ExpenseMinhashBand(db.Model):
+    """One row per MinHash band of an expense's OCR text, for near-duplicate lookups."""
+    band = db.Column(db.Integer, primary_key=True)
+    value = db.Column(db.Integer, primary_key=True)
+    expense_id = db.Column(db.Integer, db.ForeignKey("expense.id"), primary_key=True)
+
+
 class AnomalyDetection(db.Model):
+    __table_args__ = (
+        db.Index("ix_anomaly_detection_expense_id", "expense_id"),
+        db.Index("ix_anomaly_detection_detected_at", "detected_at"),
+        db.Index("ix_anomaly_detection_severity_status", "severity", "status"),
+        db.Index("ix_anomaly_detection_type", "anomaly_type", "detected_at", "expense_id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     expense_id = db.Column(db.Integer, db.ForeignKey('expense.id'), nullable=False)
     anomaly_type = db.Column(db.String(100), nullable=False)
@@ -150,8 +276,10 @@ class AnomalyDetection(db.Model):
     detected_at = db.Column(db.DateTime, default=datetime.utcnow)
     status = db.Column(db.String(50), default="Pending")
 
+    expense = db.relationship("Expense", backref=db.backref("anomalies", lazy="select"))
+
     def to_dict(self):
-        expense = Expense.query.get(self.expense_id)
+        expense = self.expense
         return {
             "id": self.id,
             "expenseId": self.expense_id,
@@ -169,6 +297,11 @@ class AnomalyDetection(db.Model):
 
 
 class ActivityLog(db.Model):
+    __table_args__ = (
+        db.Index("ix_activity_log_timestamp", "timestamp"),
+        db.Index("ix_activity_log_action_type_timestamp", "action_type", "timestamp"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     user = db.Column(db.String(255), nullable=False)
@@ -191,6 +324,63 @@ class ActivityLog(db.Model):
         }
 
 
+class CategoryStats(db.Model):
+    """Running amount statistics per category, maintained with Welford's algorithm."""
+    category = db.Column(db.String(100), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    mean = db.Column(db.Float, nullable=False, default=0.0)
+    m2 = db.Column(db.Float, nullable=False, default=0.0)
+    min_amount = db.Column(db.Float)
+    max_amount = db.Column(db.Float)
+
+    @property
+    def std_dev(self):
+        return (self.m2 / self.count) ** 0.5 if self.count > 1 else 0
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "std_dev": self.std_dev,
+            "min": self.min_amount,
+            "max": self.max_amount
+        }
+
+
+class Vendor(db.Model):
+    """Known vendors keyed by canonical name (resolve_vendor), maintained as expenses are ingested."""
+    __table_args__ = (
+        db.Index("ix_vendor_transaction_count", "transaction_count"),
+        db.Index("ix_vendor_first_seen", "first_seen"),
+    )
+
+    name = db.Column(db.String(255), primary_key=True)
+    display_name = db.Column(db.String(255))
+    transaction_count = db.Column(db.Integer, nullable=False, default=0)
+    first_seen = db.Column(db.DateTime)
+    last_seen = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            "name": self.display_name,
+            "transactions": self.transaction_count,
+            "firstSeen": self.first_seen.isoformat() + "Z" if self.first_seen else None,
+            "lastSeen": self.last_seen.isoformat() + "Z" if self.last_seen else None
+        }
+
+
+class ExpenseRollup(db.Model):
+    """Expense totals per day, month, category and vendor, maintained on write (see utils/rollups.py)."""
+    grain = db.Column(db.String(10), primary_key=True)
+    bucket = db.Column(db.String(255), primary_key=True)
+    category = db.Column(db.String(100), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    amount = db.Column(db.Float, nullable=False, default=0.0)
+    flagged_count = db.Column(db.Integer, nullable=False, default=0)
+    flagged_amount = db.Column(db.Float, nullable=False, default=0.0)
+    first_expense_id = db.Column(db.Integer)
+
+
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(255), unique=True, nullable=False)
@@ -218,15 +408,25 @@ class User(db.Model):
 # ------------------------
 # Load NLP Models
 # ------------------------
-try:
-    ner_pipeline = pipeline("ner", aggregation_strategy="simple")
-except Exception:
-    ner_pipeline = None
-
-try:
-    sentiment_pipeline = pipeline("sentiment-analysis")
-except Exception:
-    sentiment_pipeline = None
+# Pipelines load lazily on first use; set MODEL_WARMUP=1 to load them on a
+# background thread at startup instead.
+if os.environ.get("MODEL_WARMUP", "").lower() in ("1", "true", "yes"):
+    model_registry.warm_up([CLASSIFIER_MODEL, "ner"])
+
+# Concurrent /ocr and /analyze requests share one zero-shot forward pass.
+classification_batcher = MicroBatcher(
+    classify_texts_with_scores,
+    max_batch_size=int(os.environ.get("CLASSIFIER_MAX_BATCH", "8")),
+    max_wait_ms=float(os.environ.get("CLASSIFIER_BATCH_WINDOW_MS", "5")),
+    name="classifier-batcher"
+)
+
+# Vendor NER runs on the receipt header only, batched across concurrent
+# uploads and cached by header hash (see utils/vendor_ner.py).
+vendor_ner = VendorNER(
+    max_batch_size=int(os.environ.get("NER_MAX_BATCH", "8")),
+    max_wait_ms=float(os.environ.get("NER_BATCH_WINDOW_MS", "5"))
+)
 
 # Limit recent uploads
 RECENT_UPLOAD_LIMIT = 20
@@ -237,231 +437,843 @@ recent_uploads = deque(maxlen=RECENT_UPLOAD_LIMIT)
 # Helper Functions
 # ------------------------
 def extract_amount(text: str) -> float:
-    """Extract the total amount from receipt text using multiple strategies."""
+    """Extract the total amount from receipt text (see utils/receipt_parser.py)."""
+    return parse_receipt(text).total
 
-    # Convert to uppercase for easier matching
-    text_upper = text.upper()
 
-    # Look for lines containing total amounts
-    lines = text_upper.split('\n')
-
-    # Strategy 1: Look for lines with "TOTAL" and extract the amount
-    total_patterns = [
-        r'TOTAL[:\s]\$?(\d+(?:,\d{3})(?:\.\d{2})?)',
-        r'AMOUNT DUE[:\s]\$?(\d+(?:,\d{3})(?:\.\d{2})?)',
-        r'GRAND TOTAL[:\s]\$?(\d+(?:,\d{3})(?:\.\d{2})?)',
-        r'FINAL TOTAL[:\s]\$?(\d+(?:,\d{3})(?:\.\d{2})?)',
-        r'BALANCE DUE[:\s]\$?(\d+(?:,\d{3})(?:\.\d{2})?)'
-    ]
+def extract_entities(text: str) -> Dict:
+    # Totals, subtotal, tax, date, currency and a header vendor guess in one scan
+    parsed = parse_receipt(text)
+    entities = parsed.to_dict()
+    entities["vendor"] = extract_vendor(text, parsed.vendor)
+    return entities
 
-    for pattern in total_patterns:
-        matches = re.findall(pattern, text_upper)
-        if matches:
-            # Clean the amount (remove commas) and convert to float
-            amount_str = matches[0].replace(',', '')
-            try:
-                return float(amount_str)
-            except ValueError:
-                continue
 
-    # Strategy 2: Find all monetary amounts and return the largest one
-    # More comprehensive regex for amounts
-    amount_pattern = r'\$?(\d+(?:,\d{3})*(?:\.\d{1,2})?)'
-    all_amounts = re.findall(amount_pattern, text)
+def extract_vendor(text: str, fallback: str = None) -> str:
+    """Extract vendor name from receipt text: NER first, then header heuristics."""
+    if not any(len(line.strip()) > 2 for line in text.split('\n')):
+        return ""
 
-    if all_amounts:
-        # Convert to floats, filter out obviously wrong amounts (like years, phone numbers, etc.)
-        valid_amounts = []
-        for amt_str in all_amounts:
-            amt_str = amt_str.replace(',', '')
-            try:
-                amt = float(amt_str)
-                # Filter: amounts should be reasonable (not too large, not zero, not obviously wrong)
-                if 0.01 <= amt <= 10000.0:  # Reasonable range for receipts
-                    valid_amounts.append(amt)
-            except ValueError:
-                continue
+    vendor_name = vendor_ner(text)
+    if vendor_name:
+        return vendor_name
+
+    return guess_vendor(text) if fallback is None else fallback
+
+
+def get_category_stats(category: str):
+    """Return the running statistics snapshot for a category, or None."""
+    if not category:
+        return None
+    stats = db.session.get(CategoryStats, category)
+    return stats.snapshot() if stats and stats.count > 0 else None
+
+
+def empty_category_stats() -> dict:
+    """Snapshot of a category with no earlier positive amounts."""
+    return {"count": 0, "mean": 0.0, "std_dev": 0, "min": None, "max": None}
+
+
+def update_category_stats(category: str, amount: float):
+    """Fold an amount into the category's running statistics.
+
+    Runs inside the caller's transaction as a single upsert and returns the
+    snapshot from before the amount was added, so the new expense is scored
+    against its predecessors only. A category with no history yet returns
+    empty_category_stats(), never None.
+    """
+    previous = get_category_stats(category) or empty_category_stats()
+    if not category or not amount or amount <= 0:
+        return previous
+
+    from sqlalchemy import case
+    from sqlalchemy.dialects.sqlite import insert
+
+    table = CategoryStats.__table__
+    new_count = table.c.count + 1
+    delta = amount - table.c.mean
+    new_mean = table.c.mean + delta / new_count
+    stmt = insert(table).values(
+        category=category, count=1, mean=amount, m2=0.0, min_amount=amount, max_amount=amount
+    ).on_conflict_do_update(
+        index_elements=[table.c.category],
+        set_={
+            "count": new_count,
+            "mean": new_mean,
+            "m2": table.c.m2 + delta * (amount - new_mean),
+            "min_amount": case((table.c.min_amount <= amount, table.c.min_amount), else_=amount),
+            "max_amount": case((table.c.max_amount >= amount, table.c.max_amount), else_=amount)
+        }
+    )
+    db.session.execute(stmt)
+    db.session.expire_all()
+    return previous
+
+
+def rebuild_category_stats():
+    """Recompute every CategoryStats row from the expense table.
+
+    Two passes in one query: the per-category mean first, then the sum of
+    squared deviations from it. The textbook ``sum(x^2) - n * mean^2`` cancels
+    catastrophically for large, similar amounts and would disagree with the
+    incremental Welford update.
+    """
+    positive = [Expense.category.isnot(None), Expense.amount > 0]
+    means = db.session.query(
+        Expense.category.label("category"),
+        db.func.count(Expense.amount).label("count"),
+        db.func.avg(Expense.amount).label("mean"),
+        db.func.min(Expense.amount).label("min_amount"),
+        db.func.max(Expense.amount).label("max_amount")
+    ).filter(*positive).group_by(Expense.category).subquery()
+    deviation = Expense.amount - means.c.mean
+    rows = db.session.query(
+        means.c.category, means.c.count, means.c.mean, db.func.sum(deviation * deviation),
+        means.c.min_amount, means.c.max_amount
+    ).join(Expense, Expense.category == means.c.category).filter(*positive).group_by(
+        means.c.category, means.c.count, means.c.mean, means.c.min_amount, means.c.max_amount
+    ).all()
+
+    CategoryStats.query.delete()
+    for category, count, mean, m2, min_amount, max_amount in rows:
+        db.session.add(CategoryStats(
+            category=category,
+            count=count,
+            mean=mean,
+            m2=m2,
+            min_amount=min_amount,
+            max_amount=max_amount
+        ))
+    db.session.commit()
+    return len(rows)
+
+
+# Raw OCR vendor strings are mapped onto known vendors (see utils/vendor_index.py).
+# The index is loaded from the vendor table on first use; on a miss it picks up
+# vendors other workers have added since the last refresh.
+vendor_index = VendorIndex(float(os.environ.get("VENDOR_MATCH_THRESHOLD", DEFAULT_THRESHOLD)))
+VENDOR_REFRESH_SECONDS = 1.0
+_vendor_index_refreshed = None
+
+
+def refresh_vendor_index() -> None:
+    global _vendor_index_refreshed
+    now = datetime.utcnow()
+    query = db.session.query(Vendor.name)
+    if _vendor_index_refreshed is not None:
+        # Overlap the window so rows committed late by other workers are not missed
+        query = query.filter(Vendor.first_seen >= _vendor_index_refreshed - timedelta(minutes=5))
+    for (name,) in query:
+        vendor_index.add(name)
+    _vendor_index_refreshed = now
+
+
+def resolve_vendor(vendor: str) -> str:
+    """Canonical vendor key for a raw OCR vendor string, or "" when there is no name."""
+    key = canonical_key(vendor)
+    if not key or key in vendor_index:
+        return key
+    stale = _vendor_index_refreshed is None or \
+        (datetime.utcnow() - _vendor_index_refreshed).total_seconds() > VENDOR_REFRESH_SECONDS
+    if stale:
+        refresh_vendor_index()
+    return vendor_index.resolve(vendor)
+
+
+def get_vendor_stats(vendor: str):
+    """Transactions recorded for a vendor and whether any other vendor is known, or None without a name."""
+    name = resolve_vendor(vendor)
+    if not name:
+        return None
+    transactions, has_history = db.session.query(
+        db.select(Vendor.transaction_count).where(Vendor.name == name).scalar_subquery(),
+        db.select(Vendor.name).where(Vendor.name != name).exists()
+    ).one()
+    return {"name": name, "transactions": transactions or 0, "has_history": bool(has_history)}
+
+
+def record_vendor(vendor: str, seen_at=None):
+    """Count a transaction against the vendor table.
+
+    Like update_category_stats, runs as one upsert in the caller's transaction
+    and returns the snapshot from before this transaction; without a vendor
+    name that is an empty snapshot with no transactions and no history.
+    """
+    previous = get_vendor_stats(vendor)
+    if previous is None:
+        return {"name": "", "transactions": 0, "has_history": False}
+
+    from sqlalchemy import case
+    from sqlalchemy.dialects.sqlite import insert
+
+    seen_at = seen_at or datetime.utcnow()
+    table = Vendor.__table__
+    stmt = insert(table).values(
+        name=previous["name"], display_name=vendor.strip(), transaction_count=1, first_seen=seen_at, last_seen=seen_at
+    ).on_conflict_do_update(
+        index_elements=[table.c.name],
+        set_={
+            "transaction_count": table.c.transaction_count + 1,
+            "first_seen": case((table.c.first_seen <= seen_at, table.c.first_seen), else_=seen_at),
+            "last_seen": case((table.c.last_seen >= seen_at, table.c.last_seen), else_=seen_at)
+        }
+    )
+    db.session.execute(stmt)
+    vendor_index.add(previous["name"])
+    return previous
+
+
+def fingerprint_expense(expense: Expense, text: str) -> None:
+    """Set the duplicate fingerprint and OCR-text MinHash on an unsaved expense."""
+    if expense.uploaded_at is None:
+        expense.uploaded_at = datetime.utcnow()
+    expense.fingerprint = receipt_fingerprint(resolve_vendor(expense.vendor), expense.amount, expense.uploaded_at)
+    expense.text_minhash = minhash(text)
+
+
+def index_minhash_bands(expenses: list) -> None:
+    """Insert the MinHash band rows for flushed expenses in one executemany."""
+    rows = [
+        {"band": band, "value": value, "expense_id": expense.id}
+        for expense in expenses if expense.text_minhash is not None
+        for band, value in enumerate(minhash_bands(expense.text_minhash))
+    ]
+    if rows:
+        db.session.execute(db.insert(ExpenseMinhashBand), rows)
+
+
+def find_duplicate(expense_id: int, vendor: str, amount: float, uploaded_at, text_minhash: bytes = None):
+    """Find an earlier upload of the same receipt.
+
+    Returns ``(expense, "fingerprint")`` for the same canonical vendor, amount and day
+    (or the day before), ``(expense, "minhash")`` for near-identical OCR text,
+    and ``(None, None)`` otherwise. Both lookups are index probes.
+    """
+    uploaded_at = uploaded_at or datetime.utcnow()
+    vendor_key = resolve_vendor(vendor)
+    fingerprints = [fp for fp in (
+        receipt_fingerprint(vendor_key, amount, uploaded_at),
+        receipt_fingerprint(vendor_key, amount, uploaded_at - timedelta(days=1))
+    ) if fp]
+    if fingerprints:
+        duplicate = Expense.query.filter(
+            Expense.fingerprint.in_(fingerprints),
+            Expense.id < expense_id
+        ).order_by(Expense.id).first()
+        if duplicate:
+            return duplicate, "fingerprint"
+
+    if text_minhash is not None:
+        candidates = Expense.query.join(
+            ExpenseMinhashBand, ExpenseMinhashBand.expense_id == Expense.id
+        ).filter(
+            db.or_(*[
+                db.and_(ExpenseMinhashBand.band == band, ExpenseMinhashBand.value == value)
+                for band, value in enumerate(minhash_bands(text_minhash))
+            ]),
+            Expense.id < expense_id
+        ).order_by(Expense.id).distinct().all()
+        for candidate in candidates:
+            if similarity(candidate.text_minhash, text_minhash) >= MINHASH_THRESHOLD:
+                return candidate, "minhash"
+
+    return None, None
+
+
+# Anomaly rules run through one registry (see utils/anomaly_rules.py);
+# GET /anomalies/rules/stats reports the time spent in each feature and rule.
+anomaly_rules = RuleEngine(default_rules())
+
+
+def ingest_batch(rows: list) -> ExpenseBatch:
+    """Rule batch for freshly ingested expenses, with features read from the database.
+
+    ``rows`` are dicts with ``expense_id``, ``amount``, ``vendor``, ``category``,
+    ``uploaded_at``, ``text_minhash`` and the ``category_stats`` / ``vendor_stats``
+    snapshots returned by update_category_stats and record_vendor. Only a
+    missing snapshot key is read from the current CategoryStats or Vendor row;
+    that row already counts the batch, so ingest paths always pass snapshots.
+    """
+    def category_stats(batch):
+        snapshots = [(row["category_stats"] if "category_stats" in row else get_category_stats(row["category"]))
+                     or empty_category_stats() for row in rows]
+        return {
+            "count": np.array([snapshot["count"] for snapshot in snapshots]),
+            "mean": np.array([snapshot["mean"] for snapshot in snapshots], dtype=float),
+            "std_dev": np.array([snapshot["std_dev"] for snapshot in snapshots], dtype=float),
+            "max": np.array([snapshot["max"] or 0.0 for snapshot in snapshots], dtype=float)
+        }
 
-        if valid_amounts:
-            # Return the largest amount (usually the total)
-            return max(valid_amounts)
+    def duplicate(batch):
+        matches = [find_duplicate(row["expense_id"], row["vendor"], row["amount"], row["uploaded_at"],
+                                  row["text_minhash"]) for row in rows]
+        return {
+            "kind": np.array([{"fingerprint": 1, "minhash": 2}.get(matched_on, 0) for _, matched_on in matches]),
+            "expense_id": np.array([expense.id if expense else 0 for expense, _ in matches]),
+            "day": [expense.uploaded_at.strftime('%Y-%m-%d') if expense else None for expense, _ in matches]
+        }
 
-    # Strategy 3: Fallback to original simple regex
-    amounts = re.findall(r"\$?\s*(\d+\.?\d*)", text)
-    if amounts:
-        try:
-            # Clean and convert
-            amount_str = amounts[0].replace(',', '').strip()
-            return float(amount_str)
-        except ValueError:
-            pass
+    def new_vendor(batch):
+        flags = []
+        for row in rows:
+            stats = row["vendor_stats"] if "vendor_stats" in row else get_vendor_stats(row["vendor"])
+            flags.append(bool(stats and stats["transactions"] == 0 and stats["has_history"]))
+        return np.array(flags, dtype=bool)
+
+    return ExpenseBatch({
+        "id": np.array([row["expense_id"] for row in rows], dtype=np.int64),
+        "amount": np.array([row["amount"] for row in rows], dtype=float),
+        "vendor": np.array([row["vendor"] for row in rows], dtype=object)
+    }, {"category_stats": category_stats, "duplicate": duplicate, "new_vendor": new_vendor})
+
+
+def score_expenses(rows: list) -> list:
+    """Run the anomaly rules over ingested expenses (see ingest_batch) and return unsaved AnomalyDetection rows."""
+    if not rows:
+        return []
+    batch = ingest_batch(rows)
+    return [AnomalyDetection(
+        expense_id=int(batch["id"][finding.row]),
+        anomaly_type=finding.anomaly_type,
+        severity=finding.severity,
+        confidence=finding.confidence,
+        description=finding.description,
+        status="Pending"
+    ) for finding in anomaly_rules.evaluate(batch)]
+
+
+def score_anomalies(expense_id: int, amount: float, vendor: str, category: str, uploaded_at, category_stats=None,
+                    text_minhash: bytes = None, vendor_stats=None) -> list:
+    """Run the anomaly rules for an expense and return unsaved AnomalyDetection rows.
+
+    ``category_stats`` and ``vendor_stats`` are the snapshots returned by
+    update_category_stats and record_vendor; when omitted (None) the current
+    CategoryStats and Vendor rows are used.
+    ``text_minhash`` enables the near-duplicate check on the receipt's OCR text.
+    """
+    row = {
+        "expense_id": expense_id, "amount": amount, "vendor": vendor, "category": category,
+        "uploaded_at": uploaded_at, "text_minhash": text_minhash
+    }
+    if category_stats is not None:
+        row["category_stats"] = category_stats
+    if vendor_stats is not None:
+        row["vendor_stats"] = vendor_stats
+    return score_expenses([row])
+
+
+def record_anomalies(anomalies: list) -> None:
+    """Stage anomalies and their activity log rows in the current transaction."""
+    if not anomalies:
+        return
+    db.session.add_all(anomalies)
+    db.session.execute(db.insert(ActivityLog), [{
+        "user": "System",
+        "action": "Anomaly Detected",
+        "action_type": "flagged",
+        "details": f"{anomaly.anomaly_type}: {anomaly.description}",
+        "expense_id": anomaly.expense_id,
+        "ip_address": "system"
+    } for anomaly in anomalies])
+
+
+def has_open_anomaly(expense_id: int, exclude_id: int = None) -> bool:
+    """Whether the expense has an anomaly that has not been rejected (optionally ignoring one)."""
+    query = db.session.query(AnomalyDetection.id).filter(
+        AnomalyDetection.expense_id == expense_id,
+        db.func.coalesce(AnomalyDetection.status, "Pending") != CLEARED_STATUS
+    )
+    if exclude_id is not None:
+        query = query.filter(AnomalyDetection.id != exclude_id)
+    return db.session.query(query.exists()).scalar()
+
+
+def is_flagged():
+    """Boolean column expression: the expense has an anomaly that has not been rejected.
+
+    Correlated, so listings probe ix_anomaly_detection_expense_id per row
+    instead of collecting every flagged id first.
+    """
+    return db.session.query(AnomalyDetection.id).filter(
+        AnomalyDetection.expense_id == Expense.id,
+        db.func.coalesce(AnomalyDetection.status, "Pending") != CLEARED_STATUS
+    ).exists()
+
+
+def apply_rollup_deltas(deltas: dict) -> None:
+    """Upsert accumulated rollup deltas (utils.rollups.add_delta) in the caller's transaction."""
+    if not deltas:
+        return
+
+    from sqlalchemy import case
+    from sqlalchemy.dialects.sqlite import insert
+
+    table = ExpenseRollup.__table__
+    stmt = insert(table)
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.grain, table.c.bucket, table.c.category],
+        set_={
+            "count": table.c.count + excluded["count"],
+            "amount": table.c.amount + excluded["amount"],
+            "flagged_count": table.c.flagged_count + excluded["flagged_count"],
+            "flagged_amount": table.c.flagged_amount + excluded["flagged_amount"],
+            "first_expense_id": case(
+                (table.c.first_expense_id <= excluded["first_expense_id"], table.c.first_expense_id),
+                else_=db.func.coalesce(excluded["first_expense_id"], table.c.first_expense_id)
+            )
+        }
+    )
+    db.session.execute(stmt, list(deltas.values()))
+
+
+def expense_rollup_keys(expense: Expense) -> list:
+    return rollup_keys(day_bucket(expense.uploaded_at), expense.category, resolve_vendor(expense.vendor))
+
+
+def record_rollups(expenses: list, anomalies: list) -> None:
+    """Count newly ingested expenses into the dashboard rollups; those with anomalies count as flagged."""
+    flagged_ids = {anomaly.expense_id for anomaly in anomalies if anomaly.status != CLEARED_STATUS}
+    deltas = {}
+    for expense in expenses:
+        amount = expense.amount or 0.0
+        flagged = 1 if expense.id in flagged_ids else 0
+        add_delta(deltas, expense_rollup_keys(expense), 1, amount, flagged, flagged * amount, expense.id)
+    apply_rollup_deltas(deltas)
+
+
+def shift_flagged_rollups(expenses: list, direction: int) -> None:
+    """Move existing expenses into (direction=1) or out of (direction=-1) the flagged totals."""
+    deltas = {}
+    for expense in expenses:
+        add_delta(deltas, expense_rollup_keys(expense), 0, 0.0, direction, direction * (expense.amount or 0.0))
+    apply_rollup_deltas(deltas)
+
+
+def rebuild_dashboard_rollups() -> int:
+    """Recompute the dashboard rollup table from the expense history."""
+    count = rebuild_rollups(db.session.connection(), resolve_vendor)
+    db.session.commit()
+    return count
+
+
+# Dashboard totals are read from the ExpenseRollup rows maintained above, so
+# their cost depends on the number of categories and months, not on the size
+# of the expense history.
+def rollup_filters(category=None, since=None) -> list:
+    """ExpenseRollup criteria for the optional category and upload-date filters.
+
+    Without a date filter the per-category rows are read; with one, the daily
+    rows from the day of ``since`` onwards.
+    """
+    if since is None:
+        criteria = [ExpenseRollup.grain == "category"]
+    else:
+        criteria = [ExpenseRollup.grain == "day", ExpenseRollup.bucket >= day_bucket(since)]
+    if category and category != "All Categories":
+        criteria.append(ExpenseRollup.category == category)
+    return criteria
+
+
+def rollup_totals(category=None, since=None) -> tuple:
+    """Return (count, total_amount, flagged_count, flagged_amount) for matching expenses."""
+    count, total, flagged_count, flagged_amount = db.session.query(
+        db.func.coalesce(db.func.sum(ExpenseRollup.count), 0),
+        db.func.coalesce(db.func.sum(ExpenseRollup.amount), 0.0),
+        db.func.coalesce(db.func.sum(ExpenseRollup.flagged_count), 0),
+        db.func.coalesce(db.func.sum(ExpenseRollup.flagged_amount), 0.0)
+    ).filter(*rollup_filters(category, since)).one()
+    return count, total, flagged_count, flagged_amount
+
+
+def rollup_by_category(category=None, since=None) -> list:
+    """Return [(category, count, total_amount)] in order of first appearance."""
+    rows = db.session.query(
+        ExpenseRollup.category,
+        db.func.sum(ExpenseRollup.count),
+        db.func.sum(ExpenseRollup.amount)
+    ).filter(*rollup_filters(category, since), ExpenseRollup.count > 0).group_by(
+        ExpenseRollup.category
+    ).order_by(db.func.min(ExpenseRollup.first_expense_id)).all()
+    return [(category or None, count, amount) for category, count, amount in rows]
+
+
+def rollup_by_month(category=None, since=None) -> list:
+    """Return [('YYYY-MM', category, count, total_amount, flagged_count)] ordered by month."""
+    if since is None:
+        month = ExpenseRollup.bucket
+        criteria = [ExpenseRollup.grain == "month"]
+        if category and category != "All Categories":
+            criteria.append(ExpenseRollup.category == category)
+    else:
+        month = db.func.substr(ExpenseRollup.bucket, 1, 7)
+        criteria = rollup_filters(category, since)
+    rows = db.session.query(
+        month,
+        ExpenseRollup.category,
+        db.func.sum(ExpenseRollup.count),
+        db.func.sum(ExpenseRollup.amount),
+        db.func.sum(ExpenseRollup.flagged_count)
+    ).filter(*criteria, ExpenseRollup.count > 0).group_by(month, ExpenseRollup.category).order_by(month).all()
+    return [(month or None, category or None, count, amount, flagged) for month, category, count, amount, flagged in rows]
 
-    return 0.0
 
+# ------------------------
+# Anomaly Rescoring
+# ------------------------
+# `flask rescore-anomalies` runs the registered anomaly rules over the whole
+# history at once, with features replayed in NumPy so every expense is
+# scored against the ones before it (see utils/rescore.py), and writes only
+# the differences
+# from the stored AnomalyDetection rows, one chunk of expenses per commit:
+# new findings are inserted as Pending, changed ones are updated in place
+# with their review status kept, and Pending ones whose rule no longer fires
+# are removed. Reviewed anomalies and types the rules do not produce are
+# left alone.
+RESCORE_CHUNK_SIZE = int(os.environ.get("RESCORE_CHUNK_SIZE", "50000"))
+
+
+def load_expense_arrays(chunk_size: int) -> dict:
+    """Read every expense's id, upload day, category, vendor and amount into NumPy arrays, chunk by chunk.
+
+    Strings are stored as integer codes; ``dayNames``, ``vendorNames`` and
+    the code-indexed arrays map them back.
+    """
+    days, categories, vendors = {}, {}, {}
+    parts = {"id": [], "day": [], "category": [], "vendor": [], "amount": []}
+    # A Core read: ORM row handling would cost more than the scoring itself
+    result = db.session.connection().execute(
+        db.select(Expense.id, db.func.date(Expense.uploaded_at), Expense.category, Expense.vendor, Expense.amount)
+        .order_by(Expense.id).execution_options(yield_per=chunk_size)
+    )
+    for partition in result.partitions():
+        ids, day, category, vendor, amount = zip(*partition)
+        parts["id"].append(np.array(ids, dtype=np.int64))
+        parts["day"].append(np.array([days.setdefault(value, len(days)) for value in day], dtype=np.int64))
+        parts["category"].append(np.array([categories.setdefault(value, len(categories)) for value in category],
+                                          dtype=np.int64))
+        parts["vendor"].append(np.array([vendors.setdefault(value, len(vendors)) for value in vendor],
+                                        dtype=np.int64))
+        parts["amount"].append(np.array(amount, dtype=float))
+    arrays = {name: np.concatenate(chunks) if chunks else np.array([], dtype=np.int64)
+              for name, chunks in parts.items()}
+
+    # Vendor codes are re-keyed by canonical vendor, as the vendor table counts them
+    keys = {}
+    vendor_keys = np.array([keys.setdefault(resolve_vendor(name), len(keys)) for name in vendors], dtype=np.int64)
+    arrays["dayNames"] = list(days)
+    arrays["dayOrdinals"] = np.array([date.fromisoformat(name).toordinal() if name else -1 for name in days],
+                                     dtype=np.int64)
+    arrays["categoryCodes"] = np.array([code if name else -1 for code, name in enumerate(categories)],
+                                       dtype=np.int64)
+    arrays["vendorNames"] = list(vendors)
+    arrays["vendorKeys"] = vendor_keys
+    arrays["namedKeys"] = np.array([bool(key) for key in keys], dtype=bool)
+    return arrays
+
+
+def match_receipt_text(ids: np.ndarray, duplicates: np.ndarray) -> dict:
+    """Row index -> earlier row index with near-identical OCR text, for rows without a fingerprint match."""
+    groups = db.session.query(db.func.group_concat(ExpenseMinhashBand.expense_id)).group_by(
+        ExpenseMinhashBand.band, ExpenseMinhashBand.value
+    ).having(db.func.count() > 1)
+    candidates = earlier_candidates([int(value) for value in members.split(",")] for (members,) in groups)
+
+    def row_of(expense_id):
+        row = int(np.searchsorted(ids, expense_id))
+        return row if row < len(ids) and ids[row] == expense_id else None
+
+    pending = {}
+    for expense_id, earlier in candidates.items():
+        row = row_of(expense_id)
+        if row is not None and duplicates[row] < 0:
+            pending[expense_id] = earlier
+    wanted = sorted(set(pending).union(*pending.values())) if pending else []
+    signatures = {}
+    for start in range(0, len(wanted), 500):
+        signatures.update(db.session.query(Expense.id, Expense.text_minhash).filter(
+            Expense.id.in_(wanted[start:start + 500])
+        ))
+
+    matches = {}
+    for expense_id, earlier in pending.items():
+        signature = signatures.get(expense_id)
+        if signature is None:
+            continue
+        for candidate in earlier:
+            other = signatures.get(candidate)
+            if other is not None and row_of(candidate) is not None \
+                    and similarity(other, signature) >= MINHASH_THRESHOLD:
+                matches[row_of(expense_id)] = row_of(candidate)
+                break
+    return matches
+
+
+def history_batch(arrays: dict) -> ExpenseBatch:
+    """Rule batch over the loaded history; each row's features describe the expenses before it."""
+    days = arrays["dayOrdinals"][arrays["day"]]
+    vendors = arrays["vendorKeys"][arrays["vendor"]]
+
+    def category_stats(batch):
+        count, mean, std_dev, maximum = category_stats_before(arrays["categoryCodes"][arrays["category"]],
+                                                              batch["amount"])
+        return {"count": count, "mean": mean, "std_dev": std_dev, "max": maximum}
+
+    def duplicate(batch):
+        amounts = batch["amount"]
+        cents = np.where(np.isnan(amounts) | (days < 0), 0, np.rint(np.nan_to_num(amounts) * 100)).astype(np.int64)
+        matches = fingerprint_duplicates(vendors, cents, days)
+        kind = np.where(matches >= 0, 1, 0)
+        for row, earlier in match_receipt_text(arrays["id"], matches).items():
+            matches[row], kind[row] = earlier, 2
+        matches = np.maximum(matches, 0)
+        return {
+            "kind": kind,
+            "expense_id": arrays["id"][matches],
+            "day": np.array(arrays["dayNames"], dtype=object)[arrays["day"][matches]]
+        }
 
-def extract_entities(text: str) -> Dict:
-    amount = extract_amount(text)
-    vendor = extract_vendor(text)
+    def new_vendor(batch):
+        return unknown_vendors(vendors, arrays["namedKeys"][vendors])
+
+    return ExpenseBatch({
+        "id": arrays["id"],
+        "amount": arrays["amount"].astype(float),
+        "vendor": np.array(arrays["vendorNames"], dtype=object)[arrays["vendor"]]
+    }, {"category_stats": category_stats, "duplicate": duplicate, "new_vendor": new_vendor})
+
+
+def rescore_anomalies(chunk_size: int = None, dry_run: bool = False) -> dict:
+    """Rescore the whole expense history and apply the differences; returns counts of the changes."""
+    started = time.perf_counter()
+    chunk_size = chunk_size or RESCORE_CHUNK_SIZE
+    arrays = load_expense_arrays(chunk_size)
+    ids = arrays["id"]
+    batch = history_batch(arrays)
+    # The same registry as ingest; rescoring timings are reported here rather than in its stats
+    expected_by_row = {}
+    for finding in anomaly_rules.evaluate(batch, record=False):
+        expected_by_row.setdefault(finding.row, {})[finding.anomaly_type] = (
+            finding.severity, finding.confidence, finding.description
+        )
+    if batch.errors:
+        # Writing now would clear every Pending anomaly of the failed rules
+        raise RuntimeError(f"Anomaly rules failed: {', '.join(batch.errors)}")
+    rule_types = {rule.anomaly_type for rule in anomaly_rules.rules}
+    flagged_rows = np.array(list(expected_by_row), dtype=np.int64)
+    summary = {"expenses": len(ids), "flagged": len(expected_by_row), "inserted": 0, "updated": 0, "removed": 0,
+               "timings": {name: round(seconds * 1000, 1) for name, seconds in batch.timings.items()}}
+
+    for start in range(0, len(ids), chunk_size):
+        end = min(start + chunk_size, len(ids))
+        low, high = int(ids[start]), int(ids[end - 1])
+        expected = {}
+        for row in flagged_rows[np.searchsorted(flagged_rows, start):np.searchsorted(flagged_rows, end)]:
+            for anomaly_type, values in expected_by_row[row].items():
+                expected[(int(ids[row]), anomaly_type)] = values
+
+        existing = db.session.query(
+            AnomalyDetection.id, AnomalyDetection.expense_id, AnomalyDetection.anomaly_type,
+            AnomalyDetection.severity, AnomalyDetection.confidence, AnomalyDetection.description,
+            AnomalyDetection.status
+        ).filter(AnomalyDetection.expense_id.between(low, high)).order_by(AnomalyDetection.id).all()
+
+        open_before, open_after = set(), set()
+        kept, updates, removed = set(), [], []
+        for anomaly in existing:
+            is_open = (anomaly.status or "Pending") != CLEARED_STATUS
+            if is_open:
+                open_before.add(anomaly.expense_id)
+            key = (anomaly.expense_id, anomaly.anomaly_type)
+            if anomaly.anomaly_type in rule_types and (key not in expected or key in kept) \
+                    and (anomaly.status or "Pending") == "Pending":
+                removed.append(anomaly.id)
+                continue
+            if is_open:
+                open_after.add(anomaly.expense_id)
+            if key in expected and key not in kept:
+                kept.add(key)
+                severity, confidence, description = expected[key]
+                if (anomaly.severity, anomaly.description) != (severity, description) \
+                        or abs((anomaly.confidence or 0) - confidence) > 1e-9:
+                    updates.append({"id": anomaly.id, "severity": severity, "confidence": confidence,
+                                    "description": description})
+        inserts = [{
+            "expense_id": expense_id, "anomaly_type": anomaly_type, "severity": severity,
+            "confidence": confidence, "description": description, "status": "Pending"
+        } for (expense_id, anomaly_type), (severity, confidence, description) in expected.items()
+            if (expense_id, anomaly_type) not in kept]
+        open_after.update(row["expense_id"] for row in inserts)
+
+        summary["inserted"] += len(inserts)
+        summary["updated"] += len(updates)
+        summary["removed"] += len(removed)
+        if dry_run or not (inserts or updates or removed):
+            continue
 
-    return {"vendor": vendor, "date": "", "total": amount}
+        if inserts:
+            db.session.execute(db.insert(AnomalyDetection), inserts)
+            db.session.execute(db.insert(ActivityLog), [{
+                "user": "System",
+                "action": "Anomaly Detected",
+                "action_type": "flagged",
+                "details": f"{row['anomaly_type']}: {row['description']}",
+                "expense_id": row["expense_id"],
+                "ip_address": "system"
+            } for row in inserts])
+        if updates:
+            db.session.execute(db.update(AnomalyDetection), updates)
+        for position in range(0, len(removed), 500):
+            db.session.execute(db.delete(AnomalyDetection).where(
+                AnomalyDetection.id.in_(removed[position:position + 500])
+            ))
+
+        changed = open_before ^ open_after
+        if changed:
+            rows = [row for row in db.session.query(
+                Expense.id, Expense.uploaded_at, Expense.category, Expense.vendor, Expense.amount
+            ).filter(Expense.id.between(low, high)) if row.id in changed]
+            shift_flagged_rollups([row for row in rows if row.id in open_after], 1)
+            shift_flagged_rollups([row for row in rows if row.id in open_before], -1)
+        db.session.commit()
 
+    if not dry_run and (summary["inserted"] or summary["updated"] or summary["removed"]):
+        db.session.add(ActivityLog(
+            user="System",
+            action="Anomalies Rescored",
+            action_type="flagged",
+            details=f"{summary['inserted']} new, {summary['updated']} updated, {summary['removed']} cleared "
+                    f"across {summary['expenses']} expenses",
+            ip_address="system"
+        ))
+        db.session.commit()
+    db.session.rollback()
+    summary["seconds"] = round(time.perf_counter() - started, 2)
+    return summary
 
-def extract_vendor(text: str) -> str:
-    """Extract vendor name from receipt text using multiple heuristics."""
-    lines = [line.strip() for line in text.split('\n') if line.strip()]
 
-    # Remove empty lines and very short lines
-    lines = [line for line in lines if len(line) > 2]
+# ------------------------
+# Expense Listing
+# ------------------------
+# Listings page newest first with a keyset cursor on (uploaded_at, id), which
+# ix_expense_uploaded_at_id serves without OFFSET scans. Pages are read as
+# column-projected tuples, never as Expense objects.
+
+# Serialized field name -> column, as in Expense.row_to_dict
+EXPENSE_FIELDS = {
+    "id": Expense.id,
+    "file": Expense.filename,
+    "uploadedAt": Expense.uploaded_at,
+    "category": Expense.category,
+    "vendor": Expense.vendor,
+    "total": Expense.amount,
+    "textPreview": Expense.text_preview,
+    "status": Expense.status,
+}
+EXPENSE_PAGE_SIZE = 50
+EXPENSE_PAGE_MAX = 500
+
+
+def encode_cursor(uploaded_at, expense_id: int) -> str:
+    raw = json.dumps([uploaded_at.isoformat(), expense_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """(uploaded_at, id) from an encode_cursor() token; raises ValueError when malformed."""
+    try:
+        uploaded_at, expense_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(uploaded_at), int(expense_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
 
-    if not lines:
-        return ""
 
-    # Try NER first if available
-    if ner_pipeline is not None:
-        try:
-            entities = ner_pipeline(text[:512])
-            for entity in entities:
-                if entity["entity_group"] == "ORG":
-                    vendor_name = entity["word"].strip()
-                    if len(vendor_name) > 2:  # Filter out very short names
-                        return vendor_name
-        except Exception:
-            pass
+def parse_date_arg(value: str, end: bool = False) -> datetime:
+    """YYYY-MM-DD or an ISO timestamp; a bare end date covers the whole day."""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError as e:
+        raise ValueError(f"Invalid date: {value}") from e
+    return parsed + timedelta(days=1) if end and len(value) == 10 else parsed
+
+
+def listing_fields(value: str = None, available: dict = EXPENSE_FIELDS) -> list:
+    """Requested fields (comma-separated) out of ``available``, all of them by default."""
+    if not value:
+        return list(available)
+    fields = [field.strip() for field in value.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in available]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}; expected {', '.join(available)}")
+    return fields
+
+
+def date_range_filters(column, args) -> list:
+    """Criteria on ``column`` for the startDate/endDate query arguments."""
+    criteria = []
+    if args.get("startDate"):
+        criteria.append(column >= parse_date_arg(args["startDate"]))
+    if args.get("endDate"):
+        criteria.append(column < parse_date_arg(args["endDate"], end=True))
+    return criteria
+
+
+def listing_filters(args) -> list:
+    """Expense criteria from listing query arguments; raises ValueError on malformed values."""
+    criteria = []
+    category = args.get("category")
+    if category and category != "All Categories":
+        criteria.append(Expense.category == category)
+    if args.get("vendor"):
+        criteria.append(Expense.vendor == args["vendor"])
+    if args.get("status"):
+        criteria.append(Expense.status == args["status"])
+    try:
+        if args.get("minAmount"):
+            criteria.append(Expense.amount >= float(args["minAmount"]))
+        if args.get("maxAmount"):
+            criteria.append(Expense.amount <= float(args["maxAmount"]))
+    except ValueError as e:
+        raise ValueError("minAmount and maxAmount must be numbers") from e
+    criteria += date_range_filters(Expense.uploaded_at, args)
+    if args.get("cursor"):
+        uploaded_at, expense_id = decode_cursor(args["cursor"])
+        criteria.append(db.tuple_(Expense.uploaded_at, Expense.id) < db.tuple_(uploaded_at, expense_id))
+    return criteria
+
+
+def expense_page_query(criteria: list, fields: list, limit: int):
+    """Rows of (uploaded_at, id, *fields) newest first, one past ``limit`` to detect a next page."""
+    return db.select(Expense.uploaded_at, Expense.id, *(EXPENSE_FIELDS[field] for field in fields)).where(
+        *criteria
+    ).order_by(Expense.uploaded_at.desc(), Expense.id.desc()).limit(limit + 1)
+
+
+def expense_row_dict(fields: list, row) -> dict:
+    return {
+        field: value.isoformat() + "Z" if isinstance(value, datetime) else value
+        for field, value in zip(fields, row[2:])
+    }
 
-    # Fallback heuristics for vendor extraction
-    potential_vendors = []
 
-    # Look for lines that are likely business names (all caps, title case, etc.)
-    for i, line in enumerate(lines[:10]):  # Check first 10 lines
-        line = line.strip()
+def fetch_expense_page(criteria: list, fields: list, limit: int) -> tuple:
+    """Return ([serialized expense], next_cursor or None) for one page."""
+    rows = db.session.execute(expense_page_query(criteria, fields, limit)).all()
+    next_cursor = encode_cursor(*rows[limit - 1][:2]) if len(rows) > limit else None
+    return [expense_row_dict(fields, row) for row in rows[:limit]], next_cursor
 
-        # Skip common receipt headers/footers
-        skip_words = ['RECEIPT', 'INVOICE', 'CASH', 'CHANGE', 'TOTAL', 'SUBTOTAL', 'TAX', 'DATE', 'TIME', 'THANK YOU', 'CUSTOMER', 'SALESPERSON']
-        if any(skip_word in line.upper() for skip_word in skip_words):
-            continue
 
-        # Look for lines that look like business names
-        if (line.isupper() and len(line) > 3 and len(line) < 50) or \
-           (line.istitle() and len(line) > 3 and len(line) < 50) or \
-           (any(char.isupper() for char in line) and len(line) > 3 and len(line) < 50):
-            # Clean up the line
-            cleaned = re.sub(r'[^\w\s&\-\.]', '', line).strip()
-            if cleaned and len(cleaned) > 2:
-                potential_vendors.append(cleaned)
+def month_abbr(month_number: str, default: str = "Nov") -> str:
+    """Map a '%m' bucket from SQLite to the '%b' month name."""
+    if not month_number:
+        return default
+    return datetime(2000, int(month_number), 1).strftime("%b")
 
-    # Return the first potential vendor found
-    if potential_vendors:
-        return potential_vendors[0]
 
-    # Last resort: return first non-empty line
-    return lines[0] if lines else ""
-
-
-def detect_anomalies(expense_id: int, amount: float, vendor: str, category: str, uploaded_at) -> list:
-    """Detect anomalies in the expense and create AnomalyDetection records"""
-    anomalies = []
-    
-    try:
-        all_expenses = Expense.query.all()
-        
-        if len(all_expenses) <= 1:
-            return anomalies
-        
-        similar_category_expenses = [e for e in all_expenses if e.category == category and e.id != expense_id]
-        
-        if similar_category_expenses:
-            amounts = [e.amount for e in similar_category_expenses if e.amount > 0]
-            
-            if amounts:
-                avg_amount = sum(amounts) / len(amounts)
-                max_amount = max(amounts)
-                min_amount = min(amounts)
-                std_dev = (sum((x - avg_amount) ** 2 for x in amounts) / len(amounts)) ** 0.5 if len(amounts) > 1 else 0
-                
-                if std_dev > 0:
-                    z_score = abs((amount - avg_amount) / std_dev)
-                else:
-                    z_score = abs(amount - avg_amount) / (avg_amount + 1)
-                
-                if z_score > 2:
-                    anomaly = AnomalyDetection(
-                        expense_id=expense_id,
-                        anomaly_type="Unusual Amount",
-                        severity="Critical" if z_score > 3 else "High" if z_score > 2.5 else "Medium",
-                        confidence=min(95, 50 + (z_score * 10)),
-                        description=f"Transaction amount ${amount:.2f} deviates significantly from category average ${avg_amount:.2f}",
-                        status="Pending"
-                    )
-                    anomalies.append(anomaly)
-                
-                if amount > (max_amount * 1.5):
-                    anomaly = AnomalyDetection(
-                        expense_id=expense_id,
-                        anomaly_type="Unusual Amount",
-                        severity="High",
-                        confidence=85,
-                        description=f"Transaction amount ${amount:.2f} exceeds typical spending pattern (max: ${max_amount:.2f})",
-                        status="Pending"
-                    )
-                    if not any(a.anomaly_type == "Unusual Amount" for a in anomalies):
-                        anomalies.append(anomaly)
-        
-        duplicate_expense = Expense.query.filter(
-            Expense.vendor == vendor,
-            Expense.amount == amount,
-            Expense.category == category,
-            Expense.id != expense_id,
-            Expense.uploaded_at >= (uploaded_at - db.func.cast(db.literal('1 day'), db.Interval))
-        ).first()
-        
-        if duplicate_expense:
-            anomaly = AnomalyDetection(
-                expense_id=expense_id,
-                anomaly_type="Duplicate Detection",
-                severity="High",
-                confidence=90,
-                description=f"Potential duplicate: Similar transaction found for {vendor} on {duplicate_expense.uploaded_at.strftime('%Y-%m-%d')}",
-                status="Pending"
-            )
-            anomalies.append(anomaly)
-        
-        known_vendors = set(e.vendor.lower() for e in all_expenses if e.vendor)
-        if vendor.lower() not in known_vendors and len(known_vendors) > 0:
-            vendor_count = len([e for e in all_expenses if e.vendor.lower() == vendor.lower()])
-            
-            if vendor_count == 1:
-                anomaly = AnomalyDetection(
-                    expense_id=expense_id,
-                    anomaly_type="Unknown Vendor",
-                    severity="Low",
-                    confidence=70,
-                    description=f"Vendor '{vendor}' not found in previous transaction history",
-                    status="Pending"
-                )
-                anomalies.append(anomaly)
-        
-        for anomaly in anomalies:
-            db.session.add(anomaly)
-        
-        if anomalies:
-            db.session.commit()
-            
-            for anomaly in anomalies:
-                activity = ActivityLog(
-                    user="System",
-                    action="Anomaly Detected",
-                    action_type="flagged",
-                    details=f"{anomaly.anomaly_type}: {anomaly.description}",
-                    expense_id=expense_id,
-                    ip_address="system"
-                )
-                db.session.add(activity)
-            db.session.commit()
-    
-    except Exception as e:
-        print(f"Error detecting anomalies: {str(e)}")
-    
-    return anomalies
+def serialize_anomalies(query) -> list:
+    """Serialize anomalies from one query with their expenses joined in."""
+    from sqlalchemy.orm import joinedload
+    return [a.to_dict() for a in query.options(joinedload(AnomalyDetection.expense))]
 
 
 # ------------------------
@@ -472,26 +1284,60 @@ def home():
     return jsonify({"status": "success", "message": "Transparency-AI backend running"})
 
 
-@app.route("/ocr", methods=["POST"])
-def ocr():
-    if "file" not in request.files:
-        return jsonify({"error": "No file uploaded"}), 400
+@app.route("/health/models", methods=["GET"])
+def model_readiness():
+    ready = model_registry.is_ready()
+    return jsonify({
+        "success": True,
+        "ready": ready,
+        "models": model_registry.status(),
+        "errors": model_registry.errors(),
+        "classifierBatching": classification_batcher.stats(),
+        "nerBatching": vendor_ner.stats()
+    }), 200 if ready else 503
 
-    file = request.files["file"]
 
-    if file.filename == "":
-        return jsonify({"error": "No selected file"}), 400
+@app.route("/health/db", methods=["GET"])
+def database_health():
+    try:
+        with db.engine.connect() as connection:
+            settings = sqlite_settings(connection) if db.engine.dialect.name == "sqlite" else {}
+        return jsonify({"success": True, "dialect": db.engine.dialect.name, "profile": DB_PRAGMAS, "settings": settings})
+    except Exception as e:
+        return jsonify({"error": f"Failed to inspect database: {str(e)}"}), 500
+
+
+def process_receipt(data: bytes, filename: str, user: str, ip_address: str, filepath: str = None) -> dict:
+    """Run the full ingest pipeline for one uploaded receipt.
 
-    filepath = os.path.join(UPLOAD_FOLDER, file.filename)
-    file.save(filepath)
+    OCR reads ``filepath`` when given; otherwise ``data`` is written to a
+    temporary upload file on a cache miss and removed afterwards.
+    """
+    digest = OCRCache.digest(data)
+    temp_path = None
 
     try:
-        text = extract_text_from_image(filepath)
-        category = classify_text(text)
-        entities = extract_entities(text)
+        cached = ocr_cache.get(digest)
+        if cached:
+            text = cached["text"]
+            category, score = cached["classification"]["label"], cached["classification"]["score"]
+            entities = cached["entities"]
+        else:
+            if filepath is None:
+                filepath = temp_path = os.path.join(UPLOAD_FOLDER, f"{uuid4()}_{secure_filename(filename)}")
+                with open(temp_path, "wb") as f:
+                    f.write(data)
+            text = extract_text_from_image(filepath)
+            category, score = classification_batcher(text)
+            entities = extract_entities(text)
+            ocr_cache.put(digest, {
+                "text": text,
+                "classification": {"label": category, "score": score},
+                "entities": entities
+            })
 
         expense = Expense(
-            filename=file.filename,
+            filename=filename,
             category=category,
             vendor=entities["vendor"],
             amount=entities["total"],
@@ -499,37 +1345,336 @@ def ocr():
             status="Processed" if text else "Needs Review"
         )
 
+        # The expense, its activity row, the category stats, any anomalies and
+        # the dashboard rollups are written as one unit of work with a single commit
+        fingerprint_expense(expense, text)
+        category_stats = update_category_stats(category, entities["total"])
+        vendor_stats = record_vendor(entities["vendor"], expense.uploaded_at)
         db.session.add(expense)
-        db.session.commit()
+        db.session.flush()
+        index_minhash_bands([expense])
 
-        activity = ActivityLog(
-            user=request.headers.get('X-User-Name', 'Unknown User'),
+        db.session.add(ActivityLog(
+            user=user,
             action="Uploaded Receipt",
             action_type="uploaded",
             details=f"{entities['vendor']} - ${entities['total']}",
             expense_id=expense.id,
-            ip_address=request.remote_addr
-        )
-        db.session.add(activity)
+            ip_address=ip_address
+        ))
+        anomalies = score_anomalies(expense.id, entities["total"], entities["vendor"], category,
+                                    expense.uploaded_at, category_stats=category_stats,
+                                    text_minhash=expense.text_minhash, vendor_stats=vendor_stats)
+        record_anomalies(anomalies)
+        record_rollups([expense], anomalies)
         db.session.commit()
 
-        detect_anomalies(expense.id, entities["total"], entities["vendor"], category, expense.uploaded_at)
-
         recent_uploads.appendleft(expense.to_dict())
 
-        os.remove(filepath)
-
-        return jsonify({
+        return {
             "success": True,
+            "expenseId": expense.id,
             "text": text,
-            "classification": {"label": category, "score": 0.0},
-            "entities": entities
+            "classification": {"label": category, "score": score},
+            "entities": entities,
+            "cached": cached is not None
+        }
+    finally:
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def run_ingest_job(payload: dict) -> dict:
+    """Job queue handler: ingest a receipt that /ocr persisted to disk."""
+    path = payload["path"]
+    with app.app_context():
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            return process_receipt(data, payload["filename"], payload["user"], payload["ipAddress"], filepath=path)
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+ingest_queue = JobQueue(
+    os.environ.get("JOB_QUEUE_PATH", os.path.join(app.instance_path, "jobs.db")),
+    run_ingest_job,
+    workers=int(os.environ.get("INGEST_WORKERS", "2")),
+    lease_seconds=float(os.environ.get("JOB_LEASE_SECONDS", "60"))
+)
+INGEST_ASYNC = os.environ.get("INGEST_MODE", "sync").lower() == "async"
+JOB_FOLDER = os.path.join(UPLOAD_FOLDER, "jobs")
+
+
+@app.route("/ocr", methods=["POST"])
+def ocr():
+    if "file" not in request.files:
+        return jsonify({"error": "No file uploaded"}), 400
+
+    file = request.files["file"]
+
+    if file.filename == "":
+        return jsonify({"error": "No selected file"}), 400
+
+    user = request.headers.get('X-User-Name', 'Unknown User')
+    run_async = request.args.get("async", "1" if INGEST_ASYNC else "0").lower() in ("1", "true", "yes")
+
+    if run_async:
+        os.makedirs(JOB_FOLDER, exist_ok=True)
+        path = os.path.join(JOB_FOLDER, f"{uuid4()}_{secure_filename(file.filename)}")
+        file.save(path)
+        job_id = ingest_queue.enqueue("ocr", {
+            "path": path,
+            "filename": file.filename,
+            "user": user,
+            "ipAddress": request.remote_addr
         })
+        return jsonify({
+            "success": True,
+            "jobId": job_id,
+            "status": "queued",
+            "statusUrl": f"/jobs/{job_id}"
+        }), 202
+
+    try:
+        return jsonify(process_receipt(file.read(), file.filename, user, request.remote_addr))
+    except Exception as error:
+        db.session.rollback()
+        return jsonify({"error": str(error)}), 500
+
+
+OCR_BATCH_MAX_FILES = int(os.environ.get("OCR_BATCH_MAX_FILES", "1000"))
+_ocr_pool = None
+
+
+def get_ocr_pool() -> ProcessPoolExecutor:
+    """Process pool for Tesseract, created on first batch upload.
+
+    Workers are spawned rather than forked: the first batch arrives on a
+    request thread while the job queue worker, SQLAlchemy pool and loaded
+    models are live, and a forked child would inherit their locks mid-use.
+    """
+    global _ocr_pool
+    if _ocr_pool is None:
+        _ocr_pool = ProcessPoolExecutor(max_workers=int(os.environ.get("OCR_PROCESSES", os.cpu_count() or 1)),
+                                        mp_context=multiprocessing.get_context("spawn"))
+    return _ocr_pool
+
+
+def read_batch_uploads() -> list:
+    """Collect (filename, bytes) pairs from multi-file and zip uploads.
+
+    Zip members are counted and their declared sizes summed before any of
+    them is decompressed; raises ValueError past OCR_BATCH_MAX_FILES files
+    or MAX_CONTENT_LENGTH uncompressed bytes.
+    """
+    max_bytes = app.config['MAX_CONTENT_LENGTH']
+    items = []
+    for upload in request.files.getlist("files") + request.files.getlist("file"):
+        if not upload.filename:
+            continue
+        if upload.filename.lower().endswith(".zip"):
+            with zipfile.ZipFile(upload.stream) as archive:
+                members, total = [], 0
+                for info in archive.infolist():
+                    name = os.path.basename(info.filename)
+                    if info.is_dir() or not allowed_file(name):
+                        continue
+                    members.append((name, info))
+                    total += info.file_size
+                    if len(items) + len(members) > OCR_BATCH_MAX_FILES:
+                        raise ValueError(f"Too many files (max {OCR_BATCH_MAX_FILES})")
+                    if total > max_bytes:
+                        raise ValueError(f"Archive too large (max {max_bytes} bytes uncompressed)")
+                for name, info in members:
+                    # Read at most the declared size so a forged header cannot inflate past the cap
+                    with archive.open(info) as member:
+                        items.append((name, member.read(info.file_size)))
+        else:
+            if len(items) >= OCR_BATCH_MAX_FILES:
+                raise ValueError(f"Too many files (max {OCR_BATCH_MAX_FILES})")
+            items.append((upload.filename, upload.read()))
+    return items
+
+
+@app.route("/ocr/batch", methods=["POST"])
+def ocr_batch():
+    started = time.perf_counter()
+    try:
+        items = read_batch_uploads()
+    except (ValueError, zipfile.BadZipFile) as e:
+        return jsonify({"error": str(e)}), 400
+    if not items:
+        return jsonify({"error": "No files uploaded"}), 400
+
+    user = request.headers.get('X-User-Name', 'Unknown User')
+    results = [{"file": name} for name, _ in items]
+    texts = [None] * len(items)
+    digests = [OCRCache.digest(data) for _, data in items]
+    cached = [ocr_cache.get(digest) for digest in digests]
+    temp_paths = {}
+
+    try:
+        # OCR every cache miss in parallel
+        futures = {}
+        for i, (name, data) in enumerate(items):
+            if cached[i]:
+                texts[i] = cached[i]["text"]
+                continue
+            path = os.path.join(UPLOAD_FOLDER, f"{uuid4()}_{secure_filename(name)}")
+            with open(path, "wb") as f:
+                f.write(data)
+            temp_paths[i] = path
+            futures[i] = get_ocr_pool().submit(extract_text_from_image, path)
+        for i, future in futures.items():
+            try:
+                texts[i] = future.result()
+            except Exception as error:
+                results[i].update({"success": False, "error": str(error)})
+
+        # Classify and tag vendors for all fresh texts in one batched call each
+        to_classify = [i for i in futures if texts[i] is not None]
+        scored = classify_texts_with_scores([texts[i] for i in to_classify])
+        vendor_ner.prefetch([texts[i] for i in to_classify])
+        classifications = {i: result for i, result in zip(to_classify, scored)}
+
+        expenses = []
+        for i, text in enumerate(texts):
+            if text is None:
+                continue
+            if cached[i]:
+                category = cached[i]["classification"]["label"]
+                score = cached[i]["classification"]["score"]
+                entities = cached[i]["entities"]
+            else:
+                category, score = classifications[i]
+                entities = extract_entities(text)
+                ocr_cache.put(digests[i], {
+                    "text": text,
+                    "classification": {"label": category, "score": score},
+                    "entities": entities
+                })
+            expense = Expense(
+                filename=items[i][0],
+                category=category,
+                vendor=entities["vendor"],
+                amount=entities["total"],
+                text_preview=text[:200],
+                status="Processed" if text else "Needs Review"
+            )
+            fingerprint_expense(expense, text)
+            expenses.append((i, expense, {
+                "category_stats": update_category_stats(category, entities["total"]),
+                "vendor_stats": record_vendor(entities["vendor"], expense.uploaded_at)
+            }))
+            results[i].update({
+                "success": True,
+                "text": text,
+                "classification": {"label": category, "score": score},
+                "entities": entities,
+                "cached": cached[i] is not None
+            })
+
+        # One transaction for every expense, activity row and anomaly
+        db.session.add_all([expense for _, expense, _ in expenses])
+        db.session.flush()
+        if expenses:
+            db.session.execute(db.insert(ActivityLog), [{
+                "user": user,
+                "action": "Uploaded Receipt",
+                "action_type": "uploaded",
+                "details": f"{expense.vendor} - ${expense.amount}",
+                "expense_id": expense.id,
+                "ip_address": request.remote_addr
+            } for _, expense, _ in expenses])
+        index_minhash_bands([expense for _, expense, _ in expenses])
+        anomalies = score_expenses([{
+            "expense_id": expense.id, "amount": expense.amount, "vendor": expense.vendor,
+            "category": expense.category, "uploaded_at": expense.uploaded_at,
+            "text_minhash": expense.text_minhash, **snapshots
+        } for _, expense, snapshots in expenses])
+        record_anomalies(anomalies)
+        record_rollups([expense for _, expense, _ in expenses], anomalies)
+        db.session.commit()
+
+        for i, expense, _ in expenses:
+            results[i]["expenseId"] = expense.id
+            recent_uploads.appendleft(expense.to_dict())
 
     except Exception as error:
-        if os.path.exists(filepath):
-            os.remove(filepath)
+        db.session.rollback()
         return jsonify({"error": str(error)}), 500
+    finally:
+        for path in temp_paths.values():
+            if os.path.exists(path):
+                os.remove(path)
+
+    elapsed = time.perf_counter() - started
+    processed = sum(1 for r in results if r.get("success"))
+    return jsonify({
+        "success": True,
+        "results": results,
+        "processed": processed,
+        "failed": len(results) - processed,
+        "elapsedSeconds": round(elapsed, 3),
+        "receiptsPerSecond": round(len(results) / elapsed, 2) if elapsed > 0 else None
+    })
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    job = ingest_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify({"success": True, "job": job})
+
+
+@app.route("/jobs/<job_id>/events", methods=["GET"])
+def job_events(job_id):
+    if ingest_queue.get(job_id) is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    def stream():
+        last_status = None
+        while True:
+            job = ingest_queue.get(job_id)
+            if job["status"] != last_status:
+                last_status = job["status"]
+                yield f"event: {last_status}\ndata: {json.dumps(job)}\n\n"
+            if last_status in ("done", "failed"):
+                return
+            time.sleep(0.5)
+
+    return Response(stream(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.route("/jobs/stats", methods=["GET"])
+def job_stats():
+    return jsonify({"success": True, "jobs": ingest_queue.counts()})
+
+
+@app.route("/ocr/cache/stats", methods=["GET"])
+def ocr_cache_stats():
+    return jsonify({"success": True, "cache": ocr_cache.stats()})
+
+
+@app.route("/responses/cache/stats", methods=["GET"])
+def response_cache_stats():
+    return jsonify({"success": True, "cache": response_cache.stats()})
+
+
+@app.route("/anomalies/rules/stats", methods=["GET"])
+def anomaly_rule_stats():
+    return jsonify({
+        "success": True,
+        "rules": [{"name": rule.name, "anomalyType": rule.anomaly_type, "features": list(rule.features)}
+                  for rule in anomaly_rules.rules],
+        "timings": anomaly_rules.stats()
+    })
 
 
 # ----------------
@@ -622,13 +1767,13 @@ def analyze():
     text = data["text"]
 
     try:
-        category = classify_text(text)
+        category, score = classification_batcher(text)
         entities = extract_entities(text)
 
         return jsonify({
             "success": True,
             "text": text,
-            "classification": {"label": category, "score": 0.0},
+            "classification": {"label": category, "score": score},
             "entities": entities,
             "length": len(text)
         })
@@ -644,12 +1789,34 @@ def recent_uploads_api():
 
 @app.route("/expenses", methods=["GET"])
 def get_expenses():
-    expenses = Expense.query.all()
-    return jsonify({
-        "success": True,
-        "expenses": [e.to_dict() for e in expenses],
-        "count": len(expenses)
-    })
+    """One page of expenses, newest first.
+
+    Query arguments: limit, cursor (nextCursor of the previous page),
+    category, vendor, status, minAmount, maxAmount, startDate, endDate and
+    fields (comma-separated subset of the expense fields).
+    """
+    try:
+        criteria = listing_filters(request.args)
+        fields = listing_fields(request.args.get("fields"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    limit = min(max(request.args.get("limit", EXPENSE_PAGE_SIZE, type=int), 1), EXPENSE_PAGE_MAX)
+
+    def stream():
+        # Rows are serialized as they come off the cursor
+        result = db.session.execute(expense_page_query(criteria, fields, limit))
+        count, last, next_cursor = 0, None, None
+        yield '{"success": true, "expenses": ['
+        for row in result:
+            if count == limit:
+                next_cursor = encode_cursor(*last)
+                break
+            yield ("," if count else "") + json.dumps(expense_row_dict(fields, row))
+            count, last = count + 1, row[:2]
+        result.close()
+        yield f'], "count": {count}, "nextCursor": {json.dumps(next_cursor)}}}'
+
+    return Response(stream_with_context(stream()), mimetype="application/json")
 
 
 @app.route("/expenses/non-anomalous", methods=["GET"])
@@ -675,21 +1842,14 @@ def get_non_anomalous_expenses():
 
 
 @app.route("/expenses/stats", methods=["GET"])
+@cached_response
 def get_expenses_stats():
     try:
-        expenses = Expense.query.all()
-
         # Calculate total stats
-        total_expenses = len(expenses)
-        total_amount = sum(expense.amount for expense in expenses)
+        total_expenses, total_amount, _, _ = rollup_totals()
 
         # Calculate by category
-        by_category = {}
-        for expense in expenses:
-            category = expense.category
-            if category not in by_category:
-                by_category[category] = 0
-            by_category[category] += expense.amount
+        by_category = {category: amount for category, _, amount in rollup_by_category()}
 
         # Calculate category percentages
         category_percentages = {}
@@ -715,48 +1875,42 @@ def get_expenses_stats():
 
 @app.route("/expenses/by-category", methods=["GET"])
 def get_expenses_by_category():
+    """Totals per category with the newest ``limit`` expenses of each (default 20).
+
+    Further expenses of a category are paged from /expenses with the
+    category's nextCursor.
+    """
     try:
-        expenses = Expense.query.all()
+        fields = listing_fields(request.args.get("fields"))
+        limit = min(max(request.args.get("limit", 20, type=int), 1), EXPENSE_PAGE_MAX)
 
-        # Group expenses by category
         categories = {}
-        for expense in expenses:
-            category = expense.category
-            if category not in categories:
-                categories[category] = {
-                    "total": 0,
-                    "count": 0,
-                    "expenses": []
-                }
-
-            categories[category]["total"] += expense.amount
-            categories[category]["count"] += 1
-            categories[category]["expenses"].append(expense.to_dict())
+        for category, count, amount in rollup_by_category():
+            expenses, next_cursor = fetch_expense_page([Expense.category == category], fields, limit)
+            categories[category] = {"total": amount, "count": count, "expenses": expenses, "nextCursor": next_cursor}
 
         return jsonify({
             "success": True,
             "by_category": categories
         })
 
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Failed to get expenses by category: {str(e)}"}), 500
 
 
 @app.route("/expenses/trends", methods=["GET"])
+@cached_response
 def get_monthly_trends():
     try:
         from collections import defaultdict
-        from datetime import datetime
-
-        expenses = Expense.query.all()
 
         # Group expenses by month and category
         monthly_data = defaultdict(lambda: defaultdict(float))
 
-        for expense in expenses:
-            # Extract month-year from uploaded_at
-            month_year = expense.uploaded_at.strftime("%Y-%m") if expense.uploaded_at else "2024-11"
-            monthly_data[month_year][expense.category] += expense.amount
+        for month_year, category, _, amount, _ in rollup_by_month():
+            monthly_data[month_year or "2024-11"][category] += amount
 
         # Convert to list format for frontend
         trends_data = []
@@ -791,10 +1945,10 @@ def get_monthly_trends():
 @app.route("/anomalies", methods=["GET"])
 def get_anomalies():
     try:
-        anomalies = AnomalyDetection.query.all()
+        anomalies = serialize_anomalies(AnomalyDetection.query)
         return jsonify({
             "success": True,
-            "anomalies": [a.to_dict() for a in anomalies],
+            "anomalies": anomalies,
             "count": len(anomalies)
         })
     except Exception as e:
@@ -802,27 +1956,30 @@ def get_anomalies():
 
 
 @app.route("/anomalies/stats", methods=["GET"])
+@cached_response
 def get_anomalies_stats():
     try:
-        anomalies = AnomalyDetection.query.all()
+        total_anomalies, avg_confidence, flagged_count = db.session.query(
+            db.func.count(AnomalyDetection.id),
+            db.func.coalesce(db.func.avg(AnomalyDetection.confidence), 0),
+            db.func.count(db.distinct(AnomalyDetection.expense_id))
+        ).one()
         
-        total_anomalies = len(anomalies)
         severity_counts = {"Critical": 0, "High": 0, "Medium": 0, "Low": 0}
-        anomaly_types = {}
+        for severity, count in db.session.query(
+            AnomalyDetection.severity, db.func.count(AnomalyDetection.id)
+        ).group_by(AnomalyDetection.severity):
+            severity_counts[severity] = count
         
-        for anomaly in anomalies:
-            severity_counts[anomaly.severity] = severity_counts.get(anomaly.severity, 0) + 1
-            atype = anomaly.anomaly_type
-            anomaly_types[atype] = anomaly_types.get(atype, 0) + 1
+        anomaly_types = dict(db.session.query(
+            AnomalyDetection.anomaly_type, db.func.count(AnomalyDetection.id)
+        ).group_by(AnomalyDetection.anomaly_type).all())
         
-        avg_confidence = sum(a.confidence for a in anomalies) / len(anomalies) if anomalies else 0
-        
-        expenses = Expense.query.all()
-        flagged_count = len(set(a.expense_id for a in anomalies))
+        total_charges = db.session.query(db.func.coalesce(db.func.sum(Expense.amount), 0.0)).scalar()
         
         return jsonify({
             "success": True,
-            "totalCharges": sum(e.amount for e in expenses),
+            "totalCharges": total_charges,
             "anomalousTransactions": total_anomalies,
             "flaggedExpenses": flagged_count,
             "detectionAccuracy": min(100, 70 + (avg_confidence * 0.3)),
@@ -837,13 +1994,13 @@ def get_anomalies_stats():
 @app.route("/anomalies/by-severity", methods=["GET"])
 def get_anomalies_by_severity():
     try:
-        anomalies = AnomalyDetection.query.all()
+        anomalies = serialize_anomalies(AnomalyDetection.query)
         by_severity = {"Critical": [], "High": [], "Medium": [], "Low": []}
         
         for anomaly in anomalies:
-            severity = anomaly.severity
+            severity = anomaly["severity"]
             if severity in by_severity:
-                by_severity[severity].append(anomaly.to_dict())
+                by_severity[severity].append(anomaly)
         
         return jsonify({
             "success": True,
@@ -857,17 +2014,60 @@ def get_anomalies_by_severity():
 def get_recent_anomalies():
     try:
         limit = request.args.get("limit", 10, type=int)
-        anomalies = AnomalyDetection.query.order_by(AnomalyDetection.detected_at.desc()).limit(limit).all()
+        anomalies = serialize_anomalies(
+            AnomalyDetection.query.order_by(AnomalyDetection.detected_at.desc()).limit(limit)
+        )
         
         return jsonify({
             "success": True,
-            "anomalies": [a.to_dict() for a in anomalies],
+            "anomalies": anomalies,
             "count": len(anomalies)
         })
     except Exception as e:
         return jsonify({"error": f"Failed to get recent anomalies: {str(e)}"}), 500
 
 
+ANOMALY_STATUSES = ("Pending", "Approved", CLEARED_STATUS)
+
+
+@app.route("/anomalies/<int:anomaly_id>/status", methods=["PUT"])
+def update_anomaly_status(anomaly_id):
+    try:
+        data = request.get_json() or {}
+        status = data.get("status")
+        if status not in ANOMALY_STATUSES:
+            return jsonify({"error": f"Status must be one of: {', '.join(ANOMALY_STATUSES)}"}), 400
+
+        anomaly = db.session.get(AnomalyDetection, anomaly_id)
+        if not anomaly:
+            return jsonify({"error": "Anomaly not found"}), 404
+
+        previous = anomaly.status or "Pending"
+        anomaly.status = status
+        # Rejecting the last open anomaly clears the expense's flag; reopening one sets it again
+        if (previous == CLEARED_STATUS) != (status == CLEARED_STATUS) and \
+                not has_open_anomaly(anomaly.expense_id, exclude_id=anomaly.id):
+            shift_flagged_rollups([anomaly.expense], -1 if status == CLEARED_STATUS else 1)
+
+        db.session.add(ActivityLog(
+            user=data.get("user", "Auditor"),
+            action=f"Anomaly {status}",
+            action_type="flagged" if status == "Pending" else status.lower(),
+            details=f"{anomaly.anomaly_type}: {previous} -> {status}",
+            expense_id=anomaly.expense_id,
+            ip_address=request.remote_addr
+        ))
+        db.session.commit()
+
+        return jsonify({
+            "success": True,
+            "anomaly": anomaly.to_dict()
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Failed to update anomaly status: {str(e)}"}), 500
+
+
 # ------------------------
 # Admin Reports API
 # ------------------------
@@ -885,48 +2085,31 @@ def get_categories():
 
 
 @app.route("/api/admin/reports", methods=["GET"])
+@cached_response
 def get_admin_reports():
     try:
         category_filter = request.args.get("category", None)
-        expenses = Expense.query.all()
-        
-        if category_filter and category_filter != "All Categories":
-            expenses = [e for e in expenses if e.category == category_filter]
-        
-        anomalies = AnomalyDetection.query.all()
-        
-        total_expenses = len(expenses)
-        total_amount = sum(e.amount for e in expenses) if expenses else 0
-        
-        by_category = {}
-        for expense in expenses:
-            category = expense.category
-            if category not in by_category:
-                by_category[category] = 0
-            by_category[category] += expense.amount
+        total_expenses, total_amount, _, _ = rollup_totals(category=category_filter)
         
         category_spending_data = [
             {"category": cat, "amount": amt} 
-            for cat, amt in by_category.items()
+            for cat, _, amt in rollup_by_category(category=category_filter)
         ]
         
         from collections import defaultdict
-        monthly_data = defaultdict(lambda: defaultdict(float))
+        monthly_data = defaultdict(float)
         
-        for expense in expenses:
-            month_year = expense.uploaded_at.strftime("%Y-%m") if expense.uploaded_at else "2024-11"
-            monthly_data[month_year][expense.category] += expense.amount
+        for month_year, _, _, amount, _ in rollup_by_month(category=category_filter):
+            monthly_data[month_year or "2024-11"] += amount
         
         expense_trend_data = []
         for month_year in sorted(monthly_data.keys()):
             month_name = datetime.strptime(month_year, "%Y-%m").strftime("%b")
-            amount = sum(monthly_data[month_year].values())
-            expense_trend_data.append({"month": month_name, "amount": amount})
+            expense_trend_data.append({"month": month_name, "amount": monthly_data[month_year]})
         
         average_per_transaction = (total_amount / total_expenses) if total_expenses > 0 else 0
         
-        anomalous_expense_ids = set(a.expense_id for a in anomalies)
-        flagged_items = len(anomalous_expense_ids)
+        _, _, flagged_items, _ = rollup_totals()
         
         compliance_rate = ((total_expenses - flagged_items) / total_expenses * 100) if total_expenses > 0 else 100
         compliance_rate = round(min(100, max(0, compliance_rate)), 1)
@@ -936,7 +2119,7 @@ def get_admin_reports():
                 "id": "insight-1",
                 "type": "Spending Insight",
                 "severity": "Info",
-                "message": f"Total expenses tracked: {len(expenses)} receipts with ${total_amount:.2f} spending."
+                "message": f"Total expenses tracked: {total_expenses} receipts with ${total_amount:.2f} spending."
             }
         ]
         
@@ -979,6 +2162,7 @@ def get_admin_reports():
 
 
 @app.route("/api/auditor/reports", methods=["GET"])
+@cached_response
 def get_auditor_reports():
     try:
         from collections import defaultdict
@@ -986,8 +2170,6 @@ def get_auditor_reports():
         category_filter = request.args.get("category", None)
         date_range = request.args.get("dateRange", "All Time")
         
-        expenses = Expense.query.all()
-        
         date_cutoff = None
         if date_range == "Last 3 Months":
             date_cutoff = datetime.utcnow() - timedelta(days=90)
@@ -996,57 +2178,43 @@ def get_auditor_reports():
         elif date_range == "Last Year":
             date_cutoff = datetime.utcnow() - timedelta(days=365)
         
-        if date_cutoff:
-            expenses = [e for e in expenses if e.uploaded_at and e.uploaded_at >= date_cutoff]
+        total_transactions, total_amount, _, flagged_amount = rollup_totals(category=category_filter, since=date_cutoff)
         
-        if category_filter and category_filter != "All Categories":
-            expenses = [e for e in expenses if e.category == category_filter]
-        
-        anomalies = AnomalyDetection.query.all()
-        
-        if date_cutoff:
-            anomalies = [a for a in anomalies if a.detected_at and a.detected_at >= date_cutoff]
-        
-        total_transactions = len(expenses)
-        total_amount = sum(e.amount for e in expenses) if expenses else 0
-        
-        by_category = defaultdict(float)
-        for expense in expenses:
-            by_category[expense.category] += expense.amount
+        by_category = rollup_by_category(category=category_filter, since=date_cutoff)
         
         category_spending_data = [
             {"category": cat, "amount": round(amt, 2)} 
-            for cat, amt in sorted(by_category.items(), key=lambda x: x[1], reverse=True)
+            for cat, _, amt in sorted(by_category, key=lambda x: x[2], reverse=True)
         ]
         
-        monthly_data = defaultdict(lambda: defaultdict(float))
+        monthly_data = defaultdict(float)
         
-        for expense in expenses:
-            month_year = expense.uploaded_at.strftime("%Y-%m") if expense.uploaded_at else "2024-11"
-            monthly_data[month_year][expense.category] += expense.amount
+        for month_year, _, _, amount, _ in rollup_by_month(category=category_filter, since=date_cutoff):
+            monthly_data[month_year or "2024-11"] += amount
         
         expense_trend_data = []
         for month_year in sorted(monthly_data.keys()):
             month_name = datetime.strptime(month_year, "%Y-%m").strftime("%b %y")
-            amount = sum(monthly_data[month_year].values())
-            expense_trend_data.append({"month": month_name, "amount": round(amount, 2)})
+            expense_trend_data.append({"month": month_name, "amount": round(monthly_data[month_year], 2)})
         
         average_per_transaction = (total_amount / total_transactions) if total_transactions > 0 else 0
         
-        anomalous_expense_ids = set(a.expense_id for a in anomalies)
-        flagged_items = len(anomalous_expense_ids)
+        _, _, flagged_items, _ = rollup_totals(since=date_cutoff)
         
         compliance_rate = ((total_transactions - flagged_items) / total_transactions * 100) if total_transactions > 0 else 100
         compliance_rate = round(min(100, max(0, compliance_rate)), 1)
         
-        flagged_amount = sum(e.amount for e in expenses if e.id in anomalous_expense_ids)
+        anomaly_query = db.session.query(AnomalyDetection)
+        if category_filter and category_filter != "All Categories":
+            anomaly_query = anomaly_query.join(Expense, Expense.id == AnomalyDetection.expense_id).filter(
+                Expense.category == category_filter
+            )
+        if date_cutoff:
+            anomaly_query = anomaly_query.filter(AnomalyDetection.detected_at >= date_cutoff)
         
-        anomaly_types = defaultdict(int)
-        severity_counts = defaultdict(int)
-        for anomaly in anomalies:
-            if anomaly.expense_id in [e.id for e in expenses]:
-                anomaly_types[anomaly.anomaly_type] += 1
-                severity_counts[anomaly.severity] += 1
+        anomaly_types = dict(anomaly_query.with_entities(
+            AnomalyDetection.anomaly_type, db.func.count(AnomalyDetection.id)
+        ).group_by(AnomalyDetection.anomaly_type).all())
         
         fraud_detection_data = [
             {"category": atype, "count": count, "fill": "#ff6b6b" if count > 0 else "#cccccc"} 
@@ -1442,6 +2610,7 @@ def update_settings(role):
 # AI Insights
 # ------------------------
 @app.route("/api/admin/ai-insights", methods=["GET"])
+@cached_response
 def get_ai_insights():
     try:
         expenses = Expense.query.all()
@@ -1456,12 +2625,9 @@ def get_ai_insights():
         insights = []
         
         amounts = [e.amount for e in expenses if e.amount > 0]
-        vendors = {}
         categories = {}
         
         for expense in expenses:
-            if expense.vendor:
-                vendors[expense.vendor.lower()] = vendors.get(expense.vendor.lower(), 0) + 1
             if expense.category:
                 categories[expense.category] = categories.get(expense.category, 0) + expense.amount
         
@@ -1492,18 +2658,29 @@ def get_ai_insights():
                         "details": f"Recent average: ${recent_avg:.2f} | Previous average: ${older_avg:.2f}"
                     })
         
-        if vendors:
-            top_vendors = sorted(vendors.items(), key=lambda x: x[1], reverse=True)[:3]
-            top_vendor_name = top_vendors[0][0].title() if top_vendors else "Unknown"
-            top_vendor_count = top_vendors[0][1] if top_vendors else 0
-            
-            if top_vendor_count > 1:
-                insights.append({
-                    "type": "recommendation",
-                    "title": "Top Vendor Opportunity",
-                    "description": f"You've made {top_vendor_count} transactions with {top_vendor_name}. Consider negotiating bulk discounts or loyalty programs to reduce costs.",
-                    "details": f"Vendor: {top_vendor_name} | Transactions: {top_vendor_count}"
-                })
+        top_vendor = Vendor.query.order_by(Vendor.transaction_count.desc(), Vendor.first_seen).first()
+        if top_vendor and top_vendor.transaction_count > 1:
+            top_vendor_name = top_vendor.display_name
+            top_vendor_count = top_vendor.transaction_count
+            insights.append({
+                "type": "recommendation",
+                "title": "Top Vendor Opportunity",
+                "description": f"You've made {top_vendor_count} transactions with {top_vendor_name}. Consider negotiating bulk discounts or loyalty programs to reduce costs.",
+                "details": f"Vendor: {top_vendor_name} | Transactions: {top_vendor_count}"
+            })
+        
+        vendor_cutoff = datetime.utcnow() - timedelta(days=30)
+        new_vendors, known_vendors = db.session.query(
+            db.func.count(Vendor.name).filter(Vendor.first_seen >= vendor_cutoff),
+            db.func.count(Vendor.name)
+        ).one()
+        if 0 < new_vendors < known_vendors:
+            insights.append({
+                "type": "anomaly",
+                "title": f"{new_vendors} New Vendor{'s' if new_vendors != 1 else ''} This Month",
+                "description": f"{new_vendors} vendor{'s' if new_vendors != 1 else ''} appeared for the first time in the last 30 days. Confirm new suppliers are approved before reimbursing.",
+                "details": f"New vendors: {new_vendors} | Known vendors: {known_vendors}"
+            })
         
         documentation_complete = sum(1 for e in expenses if e.vendor and e.category and e.amount > 0)
         documentation_rate = (documentation_complete / len(expenses) * 100) if expenses else 0
@@ -1564,6 +2741,7 @@ def get_ai_insights():
 
 
 @app.route("/api/auditor/ai-insights", methods=["GET"])
+@cached_response
 def get_auditor_ai_insights():
     try:
         expenses = Expense.query.all()
@@ -1764,34 +2942,273 @@ def upload_logo(role):
 
 
 # ------------------------
-# DB Migration
+# Exports
 # ------------------------
-def migrate_database():
+# Full-table exports stream NDJSON (default) or CSV with ?format=, gzipped
+# with ?gzip=1. Rows are fetched EXPORT_BATCH_SIZE at a time from a
+# column-projected query and written out batch by batch, so memory stays
+# flat however large the table is. ?fields= selects columns.
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", "1000"))
+
+ANOMALY_EXPORT_FIELDS = {
+    "id": AnomalyDetection.id,
+    "expenseId": AnomalyDetection.expense_id,
+    "dateTime": Expense.uploaded_at,
+    "vendorName": Expense.vendor,
+    "category": Expense.category,
+    "amount": Expense.amount,
+    "anomalyType": AnomalyDetection.anomaly_type,
+    "severity": AnomalyDetection.severity,
+    "confidence": AnomalyDetection.confidence,
+    "description": AnomalyDetection.description,
+    "detectedAt": AnomalyDetection.detected_at,
+    "status": AnomalyDetection.status,
+}
+
+ACTIVITY_EXPORT_FIELDS = {
+    "id": ActivityLog.id,
+    "timestamp": ActivityLog.timestamp,
+    "user": ActivityLog.user,
+    "action": ActivityLog.action,
+    "actionType": ActivityLog.action_type,
+    "details": ActivityLog.details,
+    "expenseId": ActivityLog.expense_id,
+    "ipAddress": ActivityLog.ip_address,
+}
+
+
+def stream_export(name: str, available: dict, build_query):
+    """Stream the rows of ``build_query(columns)`` as an attachment in the requested format."""
+    export_format = request.args.get("format", "ndjson").lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
     try:
-        from sqlalchemy import inspect, text
-        inspector = inspect(db.engine)
-        cols = [c["name"] for c in inspector.get_columns("user_settings")]
+        fields = listing_fields(request.args.get("fields"), available)
+        query = build_query([available[field] for field in fields])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-        needed = False
+    def rows():
+        result = db.session.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        try:
+            yield from result
+        finally:
+            result.close()
+
+    write = ndjson_chunks if export_format == "ndjson" else csv_chunks
+    chunks = write(fields, rows(), EXPORT_BATCH_SIZE)
+    filename = f"{name}.{export_format}"
+    mimetype = EXPORT_FORMATS[export_format]
+    if request.args.get("gzip", "").lower() in ("1", "true", "yes"):
+        chunks = gzip_chunks(chunks)
+        filename += ".gz"
+        mimetype = "application/gzip"
+    return Response(stream_with_context(chunks), mimetype=mimetype,
+                    headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+@app.route("/export/expenses", methods=["GET"])
+def export_expenses():
+    """Expenses in id order; accepts the /expenses filters."""
+    def build_query(columns):
+        args = request.args.to_dict()
+        args.pop("cursor", None)
+        return db.select(*columns).where(*listing_filters(args)).order_by(Expense.id)
+
+    return stream_export("expenses", EXPENSE_FIELDS, build_query)
+
+
+@app.route("/export/anomalies", methods=["GET"])
+def export_anomalies():
+    """Anomalies with their expense columns; filters: severity, status, anomalyType, startDate/endDate (detection time)."""
+    def build_query(columns):
+        criteria = date_range_filters(AnomalyDetection.detected_at, request.args)
+        for arg, column in (("severity", AnomalyDetection.severity), ("status", AnomalyDetection.status),
+                            ("anomalyType", AnomalyDetection.anomaly_type)):
+            if request.args.get(arg):
+                criteria.append(column == request.args[arg])
+        return db.select(*columns).select_from(AnomalyDetection).outerjoin(
+            Expense, Expense.id == AnomalyDetection.expense_id
+        ).where(*criteria).order_by(AnomalyDetection.id)
+
+    return stream_export("anomalies", ANOMALY_EXPORT_FIELDS, build_query)
+
+
+@app.route("/export/activity-logs", methods=["GET"])
+def export_activity_logs():
+    """The audit trail in id order; filters: actionType, user, startDate/endDate."""
+    def build_query(columns):
+        criteria = date_range_filters(ActivityLog.timestamp, request.args)
+        for arg, column in (("actionType", ActivityLog.action_type), ("user", ActivityLog.user)):
+            if request.args.get(arg):
+                criteria.append(column == request.args[arg])
+        return db.select(*columns).where(*criteria).order_by(ActivityLog.id)
+
+    return stream_export("activity-logs", ACTIVITY_EXPORT_FIELDS, build_query)
+
+
+# Columnar snapshots (see utils/snapshot.py) give analysts a Parquet or Arrow
+# IPC copy of the history to query offline instead of the live database.
+# Each run appends the rows added since the previous one.
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", os.path.join(app.instance_path, "snapshots"))
+SNAPSHOT_FORMAT = os.environ.get("SNAPSHOT_FORMAT", "parquet")
+SNAPSHOT_COMPRESSION = os.environ.get("SNAPSHOT_COMPRESSION", "zstd")
+SNAPSHOT_BATCH_SIZE = int(os.environ.get("SNAPSHOT_BATCH_SIZE", "50000"))
+
+# table -> [(column name, snapshot type, column)], id first
+SNAPSHOT_TABLES = {
+    "expense": [
+        ("id", "int", Expense.id), ("filename", "string", Expense.filename),
+        ("uploaded_at", "timestamp", Expense.uploaded_at), ("category", "string", Expense.category),
+        ("vendor", "string", Expense.vendor), ("amount", "float", Expense.amount),
+        ("status", "string", Expense.status), ("fingerprint", "string", Expense.fingerprint),
+        ("text_preview", "string", Expense.text_preview),
+    ],
+    "anomaly_detection": [
+        ("id", "int", AnomalyDetection.id), ("expense_id", "int", AnomalyDetection.expense_id),
+        ("anomaly_type", "string", AnomalyDetection.anomaly_type), ("severity", "string", AnomalyDetection.severity),
+        ("confidence", "float", AnomalyDetection.confidence), ("description", "string", AnomalyDetection.description),
+        ("detected_at", "timestamp", AnomalyDetection.detected_at), ("status", "string", AnomalyDetection.status),
+    ],
+    "activity_log": [
+        ("id", "int", ActivityLog.id), ("timestamp", "timestamp", ActivityLog.timestamp),
+        ("user", "string", ActivityLog.user), ("action", "string", ActivityLog.action),
+        ("action_type", "string", ActivityLog.action_type), ("details", "string", ActivityLog.details),
+        ("expense_id", "int", ActivityLog.expense_id), ("ip_address", "string", ActivityLog.ip_address),
+    ],
+}
+_snapshot_lock = threading.Lock()
+
+
+def write_snapshot(full: bool = False, snapshot_format: str = None) -> dict:
+    """Append rows added since the last snapshot (or rewrite everything) and return rows written per table.
+
+    A full snapshot also runs when a table has none yet or the format changed;
+    anomaly status changes are only picked up by a full snapshot.
+    """
+    snapshot_format = snapshot_format or SNAPSHOT_FORMAT
+    if not snapshots_available():
+        raise RuntimeError("Snapshots need pyarrow: pip install pyarrow")
+    if snapshot_format not in SNAPSHOT_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(SNAPSHOT_FORMATS)}")
+    if not _snapshot_lock.acquire(blocking=False):
+        raise RuntimeError("A snapshot is already running")
 
-        if "logo_path" not in cols:
-            db.session.execute(text("ALTER TABLE user_settings ADD COLUMN logo_path VARCHAR(255)"))
-            needed = True
+    try:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        manifest = load_manifest(SNAPSHOT_DIR)
+        written = {}
+        for table, columns in SNAPSHOT_TABLES.items():
+            state = manifest["tables"].get(table)
+            rebuild = full or state is None or state["format"] != snapshot_format
+            id_column = columns[0][2]
+            query = db.select(*(column for _, _, column in columns)).where(
+                id_column > (0 if rebuild else state["lastId"])
+            ).order_by(id_column)
+
+            def batches():
+                result = db.session.execute(query.execution_options(yield_per=SNAPSHOT_BATCH_SIZE))
+                try:
+                    for partition in result.partitions():
+                        yield [tuple(row) for row in partition]
+                finally:
+                    result.close()
+
+            part = write_part(SNAPSHOT_DIR, table, [(name, kind) for name, kind, _ in columns], batches(),
+                              snapshot_format, SNAPSHOT_COMPRESSION)
+            if rebuild:
+                remove_parts(SNAPSHOT_DIR, table, keep=part.get("file"))
+                state = {"format": snapshot_format, "lastId": 0, "rows": 0, "parts": []}
+            if part["rows"]:
+                state["parts"].append(part)
+                state["lastId"] = part["lastId"]
+                state["rows"] += part["rows"]
+            state["updatedAt"] = datetime.utcnow().isoformat() + "Z"
+            manifest["tables"][table] = state
+            # Recorded per table, so a failure later on never re-appends these rows
+            save_manifest(SNAPSHOT_DIR, manifest)
+            written[table] = part["rows"]
+        return written
+    finally:
+        db.session.rollback()
+        _snapshot_lock.release()
 
-        if "contact_info" not in cols:
-            db.session.execute(text("ALTER TABLE user_settings ADD COLUMN contact_info TEXT"))
-            needed = True
 
-        if "help_content" not in cols:
-            db.session.execute(text("ALTER TABLE user_settings ADD COLUMN help_content TEXT"))
-            needed = True
+@app.route("/snapshots", methods=["GET"])
+def get_snapshots():
+    return jsonify({"success": True, "available": snapshots_available(), "directory": SNAPSHOT_DIR,
+                    "manifest": load_manifest(SNAPSHOT_DIR)})
 
-        if needed:
-            db.session.commit()
 
+@app.route("/snapshots", methods=["POST"])
+def create_snapshot():
+    if not snapshots_available():
+        return jsonify({"error": "Snapshots need pyarrow: pip install pyarrow"}), 503
+    data = request.get_json(silent=True) or {}
+    try:
+        written = write_snapshot(full=bool(data.get("full")), snapshot_format=data.get("format"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
     except Exception as e:
-        print("Migration skipped:", e)
-        db.session.rollback()
+        return jsonify({"error": f"Failed to write snapshot: {str(e)}"}), 500
+    return jsonify({"success": True, "written": written, "manifest": load_manifest(SNAPSHOT_DIR)})
+
+
+# ------------------------
+# DB Migration
+# ------------------------
+def migrate_database():
+    """Bring the database schema up to date with the versioned migrations."""
+    return run_migrations(db.engine)
+
+
+@app.cli.command("migrate")
+def migrate_command():
+    """Apply pending schema migrations."""
+    db.create_all()
+    version = migrate_database()
+    print(f"Database schema at version {version}")
+
+
+@app.cli.command("rebuild-category-stats")
+def rebuild_category_stats_command():
+    """Recompute per-category running statistics from the expense table."""
+    count = rebuild_category_stats()
+    print(f"Rebuilt statistics for {count} categories")
+
+
+@app.cli.command("rebuild-rollups")
+def rebuild_rollups_command():
+    """Recompute the dashboard rollup table from the expense and anomaly history."""
+    count = rebuild_dashboard_rollups()
+    print(f"Rebuilt {count} dashboard rollup rows")
+
+
+@app.cli.command("snapshot")
+@click.option("--full", is_flag=True, help="Rewrite every table instead of appending new rows.")
+@click.option("--format", "snapshot_format", type=click.Choice(list(SNAPSHOT_FORMATS)), default=None,
+              help="Parquet or Arrow IPC files (default: SNAPSHOT_FORMAT).")
+def snapshot_command(full, snapshot_format):
+    """Write Parquet/Arrow snapshots of the expense, anomaly and activity tables."""
+    written = write_snapshot(full=full, snapshot_format=snapshot_format)
+    for table, rows in written.items():
+        print(f"{table}: {rows} new rows")
+    print(f"Snapshots in {SNAPSHOT_DIR}")
+
+
+@app.cli.command("rescore-anomalies")
+@click.option("--chunk-size", type=int, default=None, help="Expenses per read batch and per commit.")
+@click.option("--dry-run", is_flag=True, help="Report the changes without writing them.")
+def rescore_anomalies_command(chunk_size, dry_run):
+    """Re-run the anomaly rules over every expense and apply the differences."""
+    summary = rescore_anomalies(chunk_size=chunk_size, dry_run=dry_run)
+    print(f"Rescored {summary['expenses']} expenses in {summary['seconds']}s: {summary['flagged']} flagged")
+    print(f"{'Would insert' if dry_run else 'Inserted'} {summary['inserted']}, "
+          f"updated {summary['updated']}, removed {summary['removed']} anomalies")
+    for name, milliseconds in summary["timings"].items():
+        print(f"  {name}: {milliseconds}ms")
 
 
 # ------------------------
@@ -1890,19 +3307,14 @@ def get_audit_trail():
 
 
 @app.route("/dashboard/auditor-overview", methods=["GET"])
+@cached_response
 def get_auditor_overview():
     try:
-        expenses = Expense.query.all()
-        anomalies = AnomalyDetection.query.all()
-        activities = ActivityLog.query.all()
-        
-        total_transactions = len(expenses)
-        total_amount = sum(e.amount for e in expenses)
-        
-        anomalous_ids = set(a.expense_id for a in anomalies)
-        flagged_count = len(anomalous_ids)
+        total_transactions, _, flagged_count, _ = rollup_totals()
         
-        compliance_violations = len([a for a in anomalies if a.severity in ["Critical", "High"]])
+        compliance_violations = AnomalyDetection.query.filter(
+            AnomalyDetection.severity.in_(["Critical", "High"])
+        ).count()
         
         compliance_rate = ((total_transactions - compliance_violations) / total_transactions * 100) if total_transactions > 0 else 0
         
@@ -1915,12 +3327,10 @@ def get_auditor_overview():
         from collections import defaultdict
         monthly_data = defaultdict(lambda: {"verified": 0, "flagged": 0})
         
-        for expense in expenses:
-            month_year = expense.uploaded_at.strftime("%b") if expense.uploaded_at else "Nov"
-            if expense.id in anomalous_ids:
-                monthly_data[month_year]["flagged"] += 1
-            else:
-                monthly_data[month_year]["verified"] += 1
+        for month_year, _, count, _, flagged_expenses in rollup_by_month():
+            month = month_abbr(month_year[5:7] if month_year else None)
+            monthly_data[month]["verified"] += count - flagged_expenses
+            monthly_data[month]["flagged"] += flagged_expenses
         
         review_stats = []
         months_order = ["Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
@@ -1933,8 +3343,12 @@ def get_auditor_overview():
                 })
         
         transactions_data = []
-        for expense in expenses[:20]:
-            status = "Flagged" if expense.id in anomalous_ids else "Verified" if expense.status == "Processed" else "Pending"
+        first_expenses = db.session.query(
+            Expense.id, Expense.uploaded_at, Expense.vendor, Expense.amount,
+            Expense.category, Expense.status, is_flagged().label("flagged")
+        ).order_by(Expense.id).limit(20).all()
+        for expense in first_expenses:
+            status = "Flagged" if expense.flagged else "Verified" if expense.status == "Processed" else "Pending"
             transactions_data.append({
                 "date": expense.uploaded_at.strftime("%Y-%m-%d") if expense.uploaded_at else "N/A",
                 "user": "User " + str((expense.id % 10) + 1),
@@ -1942,7 +3356,7 @@ def get_auditor_overview():
                 "amount": f"${expense.amount}",
                 "category": expense.category or "Other",
                 "status": status,
-                "aiFlag": "Flagged" if expense.id in anomalous_ids else "Clean"
+                "aiFlag": "Flagged" if expense.flagged else "Clean"
             })
         
         recent_audit_trail = ActivityLog.query.order_by(ActivityLog.timestamp.desc()).limit(3).all()
@@ -1970,33 +3384,85 @@ def get_auditor_overview():
         return jsonify({"error": f"Failed to get auditor overview: {str(e)}"}), 500
 
 
+def auditor_expense_page(rows: list, limit: int) -> tuple:
+    """Return ([serialized expense], next_cursor or None) from up to ``limit`` + 1 rows, newest first."""
+    next_cursor = encode_cursor(rows[limit - 1].uploaded_at, rows[limit - 1].id) if len(rows) > limit else None
+    return [{
+        "date": expense.uploaded_at.strftime("%Y-%m-%d") if expense.uploaded_at else "N/A",
+        "vendor": expense.vendor or "Unknown",
+        "amount": expense.amount,
+        "status": "Flagged" if expense.flagged else "Verified"
+    } for expense in rows[:limit]], next_cursor
+
+
+def auditor_first_pages(limit: int) -> dict:
+    """Newest ``limit`` + 1 expense rows of every category, from one windowed query.
+
+    Expenses without a category are listed under "Other".
+    """
+    position = db.func.row_number().over(
+        partition_by=Expense.category, order_by=(Expense.uploaded_at.desc(), Expense.id.desc())
+    )
+    ranked = db.select(Expense.id, position.label("position")).subquery()
+    rows = db.session.execute(db.select(
+        Expense.category, Expense.uploaded_at, Expense.id, Expense.vendor, Expense.amount,
+        is_flagged().label("flagged")
+    ).join(ranked, ranked.c.id == Expense.id).where(ranked.c.position <= limit + 1)).all()
+
+    pages = {}
+    for row in rows:
+        pages.setdefault(row.category or "Other", []).append(row)
+    # "Other" may merge several partitions
+    for page in pages.values():
+        page.sort(key=lambda row: (row.uploaded_at, row.id), reverse=True)
+    return pages
+
+
+def auditor_next_page(category: str, cursor: str, limit: int) -> list:
+    """Up to ``limit`` + 1 expense rows of one category after a categoryCursors token."""
+    if category == "Other":
+        criteria = [db.or_(Expense.category.is_(None), Expense.category.in_(["", "Other"]))]
+    else:
+        criteria = [Expense.category == category]
+    uploaded_at, expense_id = decode_cursor(cursor)
+    criteria.append(db.tuple_(Expense.uploaded_at, Expense.id) < db.tuple_(uploaded_at, expense_id))
+    return db.session.execute(db.select(
+        Expense.uploaded_at, Expense.id, Expense.vendor, Expense.amount, is_flagged().label("flagged")
+    ).where(*criteria).order_by(Expense.uploaded_at.desc(), Expense.id.desc()).limit(limit + 1)).all()
+
+
 @app.route("/auditor/expenses", methods=["GET"])
+@cached_response
 def get_auditor_expenses():
+    """Category spending with the newest ``limit`` expenses of each category (default 20).
+
+    categoryCursors holds each category's nextCursor; passing it back with
+    ``category`` returns that category's next page in categoryExpenses.
+    """
+    limit = min(max(request.args.get("limit", 20, type=int), 1), EXPENSE_PAGE_MAX)
+    page_category, cursor = request.args.get("category"), request.args.get("cursor")
     try:
-        expenses = Expense.query.all()
-        anomalies = AnomalyDetection.query.all()
-        anomalous_ids = set(a.expense_id for a in anomalies)
-        
         category_spending = {}
         category_expenses = {}
+        category_cursors = {}
         
-        for expense in expenses:
-            category = expense.category or "Other"
-            
+        for category, count, amount in rollup_by_category():
+            category = category or "Other"
             if category not in category_spending:
                 category_spending[category] = {"amount": 0, "count": 0}
-                category_expenses[category] = []
-            
-            category_spending[category]["amount"] += expense.amount
-            category_spending[category]["count"] += 1
-            
-            status = "Flagged" if expense.id in anomalous_ids else "Verified"
-            category_expenses[category].append({
-                "date": expense.uploaded_at.strftime("%Y-%m-%d") if expense.uploaded_at else "N/A",
-                "vendor": expense.vendor or "Unknown",
-                "amount": expense.amount,
-                "status": status
-            })
+            category_spending[category]["amount"] += amount
+            category_spending[category]["count"] += count
+        
+        if page_category and cursor:
+            pages = {page_category: auditor_next_page(page_category, cursor, limit)}
+        else:
+            pages = auditor_first_pages(limit)
+        for category in category_spending:
+            if page_category and category != page_category:
+                continue
+            category_expenses[category], category_cursors[category] = auditor_expense_page(
+                pages.get(category, []), limit
+            )
         
         category_spending_cards = []
         for category, data in category_spending.items():
@@ -2007,7 +3473,9 @@ def get_auditor_expenses():
             })
         
         spending_distribution = []
-        total_amount = sum(e.amount for e in expenses) if expenses else 1
+        expense_count, total_amount, _, _ = rollup_totals()
+        if not expense_count:
+            total_amount = 1
         for category, data in category_spending.items():
             percentage = (data["amount"] / total_amount * 100) if total_amount > 0 else 0
             spending_distribution.append({
@@ -2018,18 +3486,15 @@ def get_auditor_expenses():
         from collections import defaultdict
         category_trends = defaultdict(lambda: {})
         
+        monthly_category_totals = defaultdict(float)
+        for month_year, category, _, amount, _ in rollup_by_month():
+            monthly_category_totals[(month_abbr(month_year[5:7] if month_year else None), category or "Other")] += amount
+        
         months_order = ["Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
         for month in months_order:
             month_data = {"month": month}
             for category in category_spending.keys():
-                month_data[category] = 0
-            
-            for expense in expenses:
-                exp_month = expense.uploaded_at.strftime("%b") if expense.uploaded_at else "Nov"
-                if exp_month == month:
-                    category = expense.category or "Other"
-                    if category in month_data:
-                        month_data[category] = month_data.get(category, 0) + expense.amount
+                month_data[category] = monthly_category_totals.get((month, category), 0)
             
             category_trends[month] = month_data
         
@@ -2040,17 +3505,21 @@ def get_auditor_expenses():
             "categorySpending": category_spending_cards,
             "spendingDistribution": spending_distribution,
             "categoryTrends": category_trends_list,
-            "categoryExpenses": category_expenses
+            "categoryExpenses": category_expenses,
+            "categoryCursors": category_cursors
         })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Failed to get auditor expenses: {str(e)}"}), 500
 
 
 @app.route("/auditor/anomalies", methods=["GET"])
+@cached_response
 def get_auditor_anomalies():
     try:
-        anomalies = AnomalyDetection.query.all()
-        expenses = Expense.query.all()
+        from sqlalchemy.orm import joinedload
+        anomalies = AnomalyDetection.query.options(joinedload(AnomalyDetection.expense)).all()
         
         total_flagged = len(anomalies)
         pending_reviews = len([a for a in anomalies if a.status == "Pending"])
@@ -2062,7 +3531,7 @@ def get_auditor_anomalies():
         anomalies_by_month = defaultdict(int)
         
         for anomaly in anomalies:
-            expense = Expense.query.get(anomaly.expense_id)
+            expense = anomaly.expense
             if expense and expense.uploaded_at:
                 month = expense.uploaded_at.strftime("%b")
                 anomalies_by_month[month] += 1
@@ -2103,7 +3572,7 @@ def get_auditor_anomalies():
         
         flagged_transactions = []
         for anomaly in anomalies[:20]:
-            expense = Expense.query.get(anomaly.expense_id)
+            expense = anomaly.expense
             if expense:
                 severity_map = {"Critical": "high", "High": "high", "Medium": "medium", "Low": "low"}
                 flagged_transactions.append({
@@ -2119,7 +3588,7 @@ def get_auditor_anomalies():
         
         explainability_data = []
         for anomaly in anomalies[:3]:
-            expense = Expense.query.get(anomaly.expense_id)
+            expense = anomaly.expense
             if expense:
                 severity_map = {"Critical": "high", "High": "high", "Medium": "medium", "Low": "low"}
                 explainability_data.append({
@@ -2157,7 +3626,10 @@ if __name__ == "__main__":
         db.create_all()
         try:
             migrate_database()
-        except:
-            pass
+        except Exception as e:
+            print("Migration skipped:", e)
+        ingest_queue.start()
+        if CategoryStats.query.first() is None and Expense.query.first() is not None:
+            rebuild_category_stats()
 
     app.run(host="127.0.0.1", port=5000, debug=True)
\ No newline at end of file
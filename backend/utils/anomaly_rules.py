@@ -0,0 +1,248 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+# Anomaly rules.
+#
+# A rule is an object with a name, the anomaly type it produces, the
+# features it reads and an evaluate(batch) method that returns a Finding for
+# every row of an ExpenseBatch that trips it. Rules work on whole columns,
+# so the same rule scores one upload or the full history.
+#
+# Features are supplied per batch by providers the caller registers on the
+# batch (database snapshots at ingest, NumPy replays when rescoring, see
+# utils/rescore.py). RuleEngine computes each feature the registered rules
+# need once per batch, then runs the rules in registration order; a row gets
+# at most one anomaly of each type, so earlier rules take precedence. Every
+# feature and rule is timed and counted on its own, and one that raises is
+# reported and skipped without losing the other rules' findings.
+#
+# Features used by the built-in rules, one entry per row:
+#
+#   category_stats  {"count", "mean", "std_dev", "max"} of the earlier
+#                   positive amounts in the expense's category
+#   duplicate       {"kind": 0 none / 1 fingerprint / 2 receipt text,
+#                   "expense_id", "day"} of the earlier upload it repeats
+#   new_vendor      the vendor had no earlier transaction while others did
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Finding:
+    row: int
+    anomaly_type: str
+    severity: str
+    confidence: float
+    description: str
+
+
+class ExpenseBatch:
+    """Columns of a batch of expenses and the features computed for them.
+
+    ``columns`` holds ``id`` and ``amount`` arrays (NaN for a missing amount)
+    and an object array of raw ``vendor`` names; ``providers`` maps feature
+    names to callables taking the batch.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], providers: Dict[str, Callable]):
+        self.columns = columns
+        self.providers = providers
+        self.features = {}
+        self.timings = {}
+        self.errors = []
+
+    def __len__(self) -> int:
+        return len(self.columns["id"])
+
+    def __getitem__(self, name: str):
+        return self.columns[name] if name in self.columns else self.features[name]
+
+
+class AnomalyRule:
+    name = ""
+    anomaly_type = ""
+    features: Sequence[str] = ()
+
+    def evaluate(self, batch: ExpenseBatch) -> List[Finding]:
+        raise NotImplementedError
+
+
+class AmountDeviationRule(AnomalyRule):
+    """Amount more than 2 standard deviations from the category mean."""
+    name = "amount_deviation"
+    anomaly_type = "Unusual Amount"
+    features = ("category_stats",)
+
+    def evaluate(self, batch):
+        stats = batch["category_stats"]
+        amounts = batch["amount"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z_scores = np.where(stats["std_dev"] > 0, np.abs((amounts - stats["mean"]) / stats["std_dev"]),
+                                np.abs(amounts - stats["mean"]) / (stats["mean"] + 1))
+        findings = []
+        for row in np.flatnonzero((stats["count"] > 0) & (z_scores > 2)):
+            z_score = float(z_scores[row])
+            findings.append(Finding(
+                row, self.anomaly_type,
+                "Critical" if z_score > 3 else "High" if z_score > 2.5 else "Medium",
+                min(95, 50 + (z_score * 10)),
+                f"Transaction amount ${amounts[row]:.2f} deviates significantly from category average "
+                f"${stats['mean'][row]:.2f}"
+            ))
+        return findings
+
+
+class AmountAboveMaxRule(AnomalyRule):
+    """Amount above 1.5x the largest earlier amount in the category."""
+    name = "amount_above_max"
+    anomaly_type = "Unusual Amount"
+    features = ("category_stats",)
+
+    def evaluate(self, batch):
+        stats = batch["category_stats"]
+        amounts = batch["amount"]
+        return [
+            Finding(row, self.anomaly_type, "High", 85,
+                    f"Transaction amount ${amounts[row]:.2f} exceeds typical spending pattern "
+                    f"(max: ${stats['max'][row]:.2f})")
+            for row in np.flatnonzero((stats["count"] > 0) & (amounts > stats["max"] * 1.5))
+        ]
+
+
+class DuplicateRule(AnomalyRule):
+    """The same receipt was uploaded before."""
+    name = "duplicate_receipt"
+    anomaly_type = "Duplicate Detection"
+    features = ("duplicate",)
+
+    def evaluate(self, batch):
+        duplicate = batch["duplicate"]
+        findings = []
+        for row in np.flatnonzero(duplicate["kind"] > 0):
+            if duplicate["kind"][row] == 1:
+                findings.append(Finding(
+                    row, self.anomaly_type, "High", 90,
+                    f"Potential duplicate: Similar transaction found for {batch['vendor'][row]} on "
+                    f"{duplicate['day'][row]}"
+                ))
+            else:
+                findings.append(Finding(
+                    row, self.anomaly_type, "High", 80,
+                    f"Potential duplicate: Receipt text matches expense #{duplicate['expense_id'][row]} uploaded on "
+                    f"{duplicate['day'][row]}"
+                ))
+        return findings
+
+
+class UnknownVendorRule(AnomalyRule):
+    """First transaction with a vendor, once other vendors are known."""
+    name = "unknown_vendor"
+    anomaly_type = "Unknown Vendor"
+    features = ("new_vendor",)
+
+    def evaluate(self, batch):
+        return [
+            Finding(row, self.anomaly_type, "Low", 70,
+                    f"Vendor '{batch['vendor'][row]}' not found in previous transaction history")
+            for row in np.flatnonzero(batch["new_vendor"])
+        ]
+
+
+def default_rules() -> List[AnomalyRule]:
+    return [AmountDeviationRule(), AmountAboveMaxRule(), DuplicateRule(), UnknownVendorRule()]
+
+
+class RuleEngine:
+    """Registry of anomaly rules with per-feature and per-rule timing."""
+
+    def __init__(self, rules: Sequence[AnomalyRule] = ()):
+        self.rules: List[AnomalyRule] = []
+        self._stats = {"features": {}, "rules": {}}
+        self._lock = threading.Lock()
+        for rule in rules:
+            self.register(rule)
+
+    def register(self, rule: AnomalyRule) -> AnomalyRule:
+        if any(existing.name == rule.name for existing in self.rules):
+            raise ValueError(f"Anomaly rule {rule.name!r} is already registered")
+        self.rules.append(rule)
+        return rule
+
+    def unregister(self, name: str) -> None:
+        self.rules = [rule for rule in self.rules if rule.name != name]
+
+    def evaluate(self, batch: ExpenseBatch, record: bool = True) -> List[Finding]:
+        """Run every rule over the batch; findings are ordered by row, then rule.
+
+        Per-step seconds for this batch are left in ``batch.timings`` and the
+        names of features and rules that raised in ``batch.errors``;
+        ``record`` also adds them to the engine's running stats().
+        """
+        failed = set()
+        for name in dict.fromkeys(feature for rule in self.rules for feature in rule.features):
+            if name in batch.features:
+                continue
+            started = time.perf_counter()
+            try:
+                batch.features[name] = batch.providers[name](batch)
+            except Exception:
+                logger.exception("Error computing anomaly feature %s", name)
+                failed.add(name)
+                batch.errors.append(name)
+            batch.timings[name] = time.perf_counter() - started
+            if record:
+                self._record("features", name, batch, batch.timings[name], error=name in failed)
+
+        findings, seen = [], set()
+        for rule in self.rules:
+            started = time.perf_counter()
+            error = False
+            try:
+                if failed.intersection(rule.features):
+                    raise RuntimeError(f"missing features {', '.join(sorted(failed.intersection(rule.features)))}")
+                results = rule.evaluate(batch)
+            except Exception:
+                logger.exception("Error in anomaly rule %s", rule.name)
+                results, error = [], True
+                batch.errors.append(rule.name)
+            kept = [finding for finding in results if (finding.row, finding.anomaly_type) not in seen]
+            seen.update((finding.row, finding.anomaly_type) for finding in kept)
+            findings.extend(kept)
+            batch.timings[rule.name] = time.perf_counter() - started
+            if record:
+                self._record("rules", rule.name, batch, batch.timings[rule.name], error=error, flagged=len(kept))
+        findings.sort(key=lambda finding: finding.row)
+        return findings
+
+    def _record(self, kind: str, name: str, batch: ExpenseBatch, seconds: float, error: bool = False,
+                flagged: int = None) -> None:
+        with self._lock:
+            entry = self._stats[kind].setdefault(name, {"batches": 0, "rows": 0, "errors": 0, "seconds": 0.0})
+            entry["batches"] += 1
+            entry["rows"] += len(batch)
+            entry["errors"] += int(error)
+            entry["seconds"] += seconds
+            if flagged is not None:
+                entry["flagged"] = entry.get("flagged", 0) + flagged
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                kind: {
+                    name: {
+                        "batches": entry["batches"],
+                        "rows": entry["rows"],
+                        **({"flagged": entry["flagged"]} if "flagged" in entry else {}),
+                        "errors": entry["errors"],
+                        "totalMs": round(entry["seconds"] * 1000, 3),
+                        "avgMs": round(entry["seconds"] * 1000 / entry["batches"], 3)
+                    }
+                    for name, entry in entries.items()
+                }
+                for kind, entries in self._stats.items()
+            }
@@ -1,7 +1,8 @@
 import os
 import json
-from typing import List, Set
-from transformers import pipeline
+from typing import List, Set, Tuple
+
+from .model_registry import registry
 
 BASE_CATEGORIES = [
     "Travel",
@@ -75,54 +76,111 @@ def load_categories() -> List[str]:
 
 FINAL_CATEGORY_LIST = load_categories()
 
-try:
-    zero_shot_classifier = pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
-except Exception:
-    zero_shot_classifier = None
-
 def clean_text(text: str) -> str:
     return text.strip().lower()
 
-def classify_text(text: str) -> str:
-    cleaned = clean_text(text)
-    if not cleaned:
-        return "Miscellaneous"
-    if zero_shot_classifier:
-        try:
-            result = zero_shot_classifier(cleaned[:512], FINAL_CATEGORY_LIST)
-            return result['labels'][0]
-        except:
-            pass
-    # Fallback to keyword matching
-    keywords = {
-        "Food": ["restaurant", "cafe", "food", "meal", "dinner", "lunch", "eat"],
-        "Groceries": ["grocery", "supermarket", "market", "store"],
-        "Travel": ["flight", "hotel", "travel", "trip", "vacation"],
-        "Transportation": ["taxi", "bus", "train", "uber", "lyft"],
-        "Entertainment": ["movie", "cinema", "theater", "concert", "game"],
-        "Utilities": ["electricity", "water", "gas", "internet", "phone"],
-        "Healthcare": ["doctor", "hospital", "pharmacy", "medical", "health"],
-        "Fuel": ["gas", "petrol", "fuel", "station"],
-        "Clothing": ["clothes", "shirt", "pants", "dress", "shoe"],
-        "Electronics": ["phone", "computer", "laptop", "tv", "electronic"],
-        "Lodging": ["hotel", "motel", "inn", "lodging", "stay"],
-        "Office Supplies": ["office", "supplies", "paper", "pen", "printer"],
-        "Online Services": ["netflix", "amazon", "subscription", "online"],
-        "Banking & Finance": ["bank", "atm", "fee", "finance"],
-        "Education": ["school", "book", "course", "education"],
-        "Telecommunications": ["phone", "mobile", "telecom"],
-        "Household Supplies": ["household", "cleaning", "supplies"],
-        "Gifts & Donations": ["gift", "donation", "charity"],
-        "Personal Care": ["cosmetic", "beauty", "care", "salon"],
-        "Hardware & Tools": ["hardware", "tool", "repair"],
-        "Professional Services": ["lawyer", "consultant", "service"],
-        "Subscription Services": ["subscription", "monthly", "service"],
-        "Pharmacy": ["pharmacy", "drug", "medicine"],
-        "Books & Stationery": ["book", "stationery", "paper"],
-        "Repair & Maintenance": ["repair", "maintenance", "fix"],
-        "Miscellaneous": []
-    }
-    for category, words in keywords.items():
+# Zero-shot pairs every text with each category, so batch_size counts
+# (text, label) pairs fed through the model per padded forward pass.
+ZERO_SHOT_BATCH_SIZE = int(os.environ.get("CLASSIFIER_BATCH_SIZE", "32"))
+
+# "zero-shot" (bart-large-mnli NLI) or "embedding" (cached label vectors)
+CLASSIFIER_BACKEND = os.environ.get("CLASSIFIER_BACKEND", "zero-shot")
+EMBEDDING_CACHE_DIR = os.environ.get(
+    "EMBEDDING_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "instance", "embedding_cache")
+)
+
+def _load_embedding_classifier():
+    from .embedding_classifier import EmbeddingClassifier
+    embedder = registry.get("embedding")
+    if embedder is None:
+        raise RuntimeError("Embedding model unavailable")
+    return EmbeddingClassifier(
+        FINAL_CATEGORY_LIST,
+        embedder,
+        model_name=os.environ.get("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"),
+        cache_dir=EMBEDDING_CACHE_DIR
+    )
+
+registry.register("embedding-classifier", _load_embedding_classifier)
+
+CLASSIFIER_MODEL = "embedding-classifier" if CLASSIFIER_BACKEND == "embedding" else "zero-shot"
+
+KEYWORDS = {
+    "Food": ["restaurant", "cafe", "food", "meal", "dinner", "lunch", "eat"],
+    "Groceries": ["grocery", "supermarket", "market", "store"],
+    "Travel": ["flight", "hotel", "travel", "trip", "vacation"],
+    "Transportation": ["taxi", "bus", "train", "uber", "lyft"],
+    "Entertainment": ["movie", "cinema", "theater", "concert", "game"],
+    "Utilities": ["electricity", "water", "gas", "internet", "phone"],
+    "Healthcare": ["doctor", "hospital", "pharmacy", "medical", "health"],
+    "Fuel": ["gas", "petrol", "fuel", "station"],
+    "Clothing": ["clothes", "shirt", "pants", "dress", "shoe"],
+    "Electronics": ["phone", "computer", "laptop", "tv", "electronic"],
+    "Lodging": ["hotel", "motel", "inn", "lodging", "stay"],
+    "Office Supplies": ["office", "supplies", "paper", "pen", "printer"],
+    "Online Services": ["netflix", "amazon", "subscription", "online"],
+    "Banking & Finance": ["bank", "atm", "fee", "finance"],
+    "Education": ["school", "book", "course", "education"],
+    "Telecommunications": ["phone", "mobile", "telecom"],
+    "Household Supplies": ["household", "cleaning", "supplies"],
+    "Gifts & Donations": ["gift", "donation", "charity"],
+    "Personal Care": ["cosmetic", "beauty", "care", "salon"],
+    "Hardware & Tools": ["hardware", "tool", "repair"],
+    "Professional Services": ["lawyer", "consultant", "service"],
+    "Subscription Services": ["subscription", "monthly", "service"],
+    "Pharmacy": ["pharmacy", "drug", "medicine"],
+    "Books & Stationery": ["book", "stationery", "paper"],
+    "Repair & Maintenance": ["repair", "maintenance", "fix"],
+    "Miscellaneous": []
+}
+
+def keyword_category(cleaned: str) -> str:
+    for category, words in KEYWORDS.items():
         if any(word in cleaned for word in words):
             return category
-    return "Miscellaneous"
\ No newline at end of file
+    return "Miscellaneous"
+
+def _model_scores(texts: List[str]) -> List[Tuple[str, float]]:
+    model = registry.get(CLASSIFIER_MODEL)
+    if model is None:
+        return None
+    if CLASSIFIER_MODEL == "embedding-classifier":
+        return model.classify(texts)
+    results = model(texts, FINAL_CATEGORY_LIST, batch_size=ZERO_SHOT_BATCH_SIZE)
+    if isinstance(results, dict):
+        results = [results]
+    return [(result['labels'][0], float(result['scores'][0])) for result in results]
+
+def classify_texts_with_scores(texts: List[str]) -> List[Tuple[str, float]]:
+    """Classify a batch of receipt texts, returning (label, score) per text.
+
+    The configured backend runs once for the whole batch; keyword fallback
+    results carry a score of 0.0.
+    """
+    cleaned = [clean_text(text) for text in texts]
+    results = [("Miscellaneous", 0.0)] * len(texts)
+    pending = [i for i, text in enumerate(cleaned) if text]
+    if not pending:
+        return results
+    try:
+        scored = _model_scores([cleaned[i][:512] for i in pending])
+        if scored is not None:
+            for i, result in zip(pending, scored):
+                results[i] = result
+            return results
+    except:
+        pass
+    # Fallback to keyword matching
+    for i in pending:
+        results[i] = (keyword_category(cleaned[i]), 0.0)
+    return results
+
+def classify_texts(texts: List[str]) -> List[str]:
+    return [label for label, _ in classify_texts_with_scores(texts)]
+
+def classify_text_with_score(text: str) -> Tuple[str, float]:
+    return classify_texts_with_scores([text])[0]
+
+def classify_text(text: str) -> str:
+    return classify_texts([text])[0]
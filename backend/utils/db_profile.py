@@ -0,0 +1,56 @@
+import os
+from typing import Dict
+
+from sqlalchemy import event
+
+# Connection profiles for the SQLite database. "wal" lets dashboard readers
+# run alongside an upload's write transaction instead of blocking on the
+# rollback journal, and trades the per-commit fsync of synchronous=FULL for
+# one at checkpoint time (still durable against application crashes).
+# "default" leaves SQLite's own settings alone, mainly for benchmarking.
+#
+# Tune with DB_PROFILE, SQLITE_CACHE_MB, SQLITE_MMAP_MB and
+# SQLITE_BUSY_TIMEOUT_MS.
+
+
+def sqlite_pragmas(profile: str = None) -> Dict[str, object]:
+    """Pragmas to run on every new connection for the given profile."""
+    profile = (profile or os.environ.get("DB_PROFILE", "wal")).lower()
+    busy_timeout = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    if profile == "default":
+        return {"busy_timeout": busy_timeout}
+    if profile != "wal":
+        raise ValueError(f"Unknown DB_PROFILE: {profile}")
+    return {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        # Negative cache_size is in KiB rather than pages
+        "cache_size": -int(os.environ.get("SQLITE_CACHE_MB", "64")) * 1024,
+        "mmap_size": int(os.environ.get("SQLITE_MMAP_MB", "256")) * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": busy_timeout,
+    }
+
+
+def apply_sqlite_profile(engine, profile: str = None) -> Dict[str, object]:
+    """Register a connect hook applying the profile's pragmas; no-op for other databases."""
+    if engine.dialect.name != "sqlite":
+        return {}
+    pragmas = sqlite_pragmas(profile)
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    return pragmas
+
+
+def sqlite_settings(connection) -> Dict[str, object]:
+    """Current values of the profiled pragmas on a SQLAlchemy connection."""
+    names = ("journal_mode", "synchronous", "cache_size", "mmap_size", "temp_store", "busy_timeout")
+    return {name: connection.exec_driver_sql(f"PRAGMA {name}").scalar() for name in names}
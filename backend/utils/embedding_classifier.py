@@ -0,0 +1,59 @@
+import hashlib
+import os
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+LABEL_TEMPLATE = "This receipt is for {}."
+SCORE_TEMPERATURE = 0.05
+
+
+class EmbeddingClassifier:
+    """Nearest-label classifier over sentence embeddings.
+
+    Each category label is embedded once and cached on disk, so classifying a
+    receipt costs a single text embedding plus one matrix-vector product
+    instead of one NLI forward pass per label.
+    """
+
+    def __init__(self, labels: List[str], embedder: Callable, model_name: str, cache_dir: str):
+        self.labels = list(labels)
+        self.embedder = embedder
+        self.model_name = model_name
+        self.cache_dir = cache_dir
+        self.label_matrix = self._load_label_matrix()
+
+    def _cache_path(self) -> str:
+        key = hashlib.sha256("\n".join([self.model_name, LABEL_TEMPLATE] + self.labels).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"labels-{key[:16]}.npy")
+
+    def _load_label_matrix(self) -> np.ndarray:
+        path = self._cache_path()
+        if os.path.exists(path):
+            matrix = np.load(path)
+            if matrix.shape[0] == len(self.labels):
+                return matrix
+        matrix = self.embed([LABEL_TEMPLATE.format(label) for label in self.labels])
+        os.makedirs(self.cache_dir, exist_ok=True)
+        np.save(path, matrix)
+        return matrix
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Mean-pool token embeddings and L2-normalize one row per text."""
+        outputs = self.embedder(texts)
+        vectors = np.stack([np.asarray(output, dtype=np.float32).reshape(-1, np.shape(output)[-1]).mean(axis=0)
+                            for output in outputs])
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def classify(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """Return (label, score) per text; score is a softmax over label similarities."""
+        if not texts:
+            return []
+        similarities = self.embed(texts) @ self.label_matrix.T
+        logits = similarities / SCORE_TEMPERATURE
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        best = probabilities.argmax(axis=1)
+        return [(self.labels[i], float(probabilities[row, i])) for row, i in enumerate(best)]
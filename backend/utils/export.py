@@ -0,0 +1,57 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Iterable, Iterator, List, Sequence
+
+# Streaming table exports.
+#
+# Rows arrive as plain value tuples from a server-side batched query and
+# leave as text chunks of up to ``batch_size`` rows, so memory stays
+# constant however many rows are exported.
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _value(value):
+    return value.isoformat() + "Z" if isinstance(value, datetime) else value
+
+
+def ndjson_chunks(fields: List[str], rows: Iterable[Sequence], batch_size: int = 1000) -> Iterator[str]:
+    """One JSON object per line."""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({field: _value(value) for field, value in zip(fields, row)}))
+        if len(lines) == batch_size:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def csv_chunks(fields: List[str], rows: Iterable[Sequence], batch_size: int = 1000) -> Iterator[str]:
+    """A header line, then one CSV record per row."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    pending = 0
+    for row in rows:
+        writer.writerow([_value(value) for value in row])
+        pending += 1
+        if pending == batch_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+
+def gzip_chunks(chunks: Iterable[str], level: int = 6) -> Iterator[bytes]:
+    """Gzip a text stream incrementally."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
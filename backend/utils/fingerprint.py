@@ -0,0 +1,140 @@
+import hashlib
+import random
+import re
+import struct
+from datetime import date, datetime
+from typing import List, Optional
+
+import numpy as np
+
+# Duplicate-receipt fingerprints.
+#
+# receipt_fingerprint() keys an expense by normalized vendor, amount in cents
+# and calendar day, so "same purchase uploaded twice" is one equality probe on
+# an indexed column.
+#
+# minhash() catches rescans of the same paper receipt, where OCR misreads can
+# change the vendor or total: it estimates the Jaccard similarity of the
+# texts' character shingles. The signature is split into MINHASH_BANDS bands
+# of MINHASH_ROWS values; two receipts become candidates when any band hashes
+# equal (likely above ~0.6 similarity, rare below ~0.3), and candidates are
+# confirmed against MINHASH_THRESHOLD using the full signatures. All
+# permutations are applied to all shingle hashes at once with NumPy, using
+# exact 61-bit modular arithmetic in 32-bit limbs so signatures match the
+# (a * h + b) mod (2^61 - 1) definition bit for bit.
+
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16
+MINHASH_ROWS = MINHASH_PERMUTATIONS // MINHASH_BANDS
+MINHASH_THRESHOLD = 0.8
+SHINGLE_SIZE = 5
+MIN_SHINGLES = 40
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_rng = random.Random(20240501)
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+                 for _ in range(MINHASH_PERMUTATIONS)]
+_SIGNATURE = struct.Struct(f">{MINHASH_PERMUTATIONS}I")
+_PRIME = np.uint64(_MERSENNE_PRIME)
+_LOW32 = np.uint64((1 << 32) - 1)
+_LOW29 = np.uint64((1 << 29) - 1)
+_A1 = np.array([a >> 32 for a, _ in _PERMUTATIONS], dtype=np.uint64)[:, None]
+_A0 = np.array([a & ((1 << 32) - 1) for a, _ in _PERMUTATIONS], dtype=np.uint64)[:, None]
+_B = np.array([b for _, b in _PERMUTATIONS], dtype=np.uint64)[:, None]
+# Shingle hashes per block, so the permutation buffers stay in cache
+_BLOCK = 512
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_vendor(vendor: Optional[str]) -> str:
+    """Lowercase, drop punctuation and collapse whitespace: "STARBUCKS Coffee, Inc." -> "starbucks coffee inc"."""
+    return _NON_ALNUM.sub(" ", (vendor or "").lower()).strip()
+
+
+def amount_cents(amount) -> Optional[int]:
+    if amount is None:
+        return None
+    return int(round(float(amount) * 100))
+
+
+def receipt_fingerprint(vendor: Optional[str], amount, day) -> Optional[str]:
+    """Hash of (normalized vendor, amount in cents, day); None without a positive amount."""
+    cents = amount_cents(amount)
+    if not cents or cents <= 0:
+        return None
+    if isinstance(day, datetime):
+        day = day.date()
+    if not isinstance(day, date):
+        return None
+    key = f"{normalize_vendor(vendor)}|{cents}|{day.isoformat()}"
+    return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+
+
+def _mod_prime(x: np.ndarray, scratch: np.ndarray) -> np.ndarray:
+    """Reduce uint64 ``x`` in place to x mod 2^61 - 1 (2^61 is congruent to 1), clobbering ``scratch``."""
+    np.right_shift(x, np.uint64(61), out=scratch)
+    x &= _PRIME
+    x += scratch
+    # x < 2p here; x - p wraps around to a huge value unless x >= p
+    np.subtract(x, _PRIME, out=scratch)
+    return np.minimum(x, scratch, out=x)
+
+
+def _permuted_hashes(h: np.ndarray) -> np.ndarray:
+    """(a * h + b) mod 2^61 - 1 for every permutation (rows) and hash h < 2^61 (columns).
+
+    With a = a1 * 2^32 + a0 and h = h1 * 2^32 + h0, 2^64 folds to 8 and the
+    cross terms' 2^32 shift splits at bit 29, so nothing overflows uint64.
+    Works in three buffers; fresh temporaries cost more than the arithmetic.
+    """
+    h1, h0 = h >> np.uint64(32), h & _LOW32
+    result = np.multiply(_A1, h1)
+    middle = np.multiply(_A1, h0)
+    scratch = np.multiply(_A0, h1)
+    result <<= np.uint64(3)
+    middle += scratch
+    np.bitwise_and(middle, _LOW29, out=scratch)
+    scratch <<= np.uint64(32)
+    result += scratch
+    middle >>= np.uint64(29)
+    result += middle
+    np.multiply(_A0, h0, out=scratch)
+    result += _mod_prime(scratch, middle)
+    _mod_prime(result, middle)
+    result += _B
+    return _mod_prime(result, middle)
+
+
+def minhash(text: Optional[str]) -> Optional[bytes]:
+    """MinHash signature of the text's character shingles, packed for storage.
+
+    Returns None for texts too short to compare reliably.
+    """
+    normalized = normalize_vendor(text)
+    shingles = {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+    if len(shingles) < MIN_SHINGLES:
+        return None
+    digests = b"".join(hashlib.blake2b(s.encode(), digest_size=8).digest() for s in shingles)
+    hashes = np.frombuffer(digests, dtype=">u8").astype(np.uint64)
+    hashes = _mod_prime(hashes, np.empty_like(hashes))[None, :]
+    signature = np.minimum.reduce([
+        _permuted_hashes(hashes[:, start:start + _BLOCK]).min(axis=1)
+        for start in range(0, hashes.shape[1], _BLOCK)
+    ])
+    return (signature & np.uint64(_MAX_HASH)).astype(">u4").tobytes()
+
+
+def minhash_bands(signature: bytes) -> List[int]:
+    """Hash each band of MINHASH_ROWS signature values to one integer."""
+    return [
+        int.from_bytes(hashlib.blake2b(signature[band * MINHASH_ROWS * 4:(band + 1) * MINHASH_ROWS * 4],
+                                       digest_size=4).digest(), "big")
+        for band in range(MINHASH_BANDS)
+    ]
+
+
+def similarity(a: bytes, b: bytes) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(x == y for x, y in zip(_SIGNATURE.unpack(a), _SIGNATURE.unpack(b))) / MINHASH_PERMUTATIONS
@@ -0,0 +1,172 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional
+from uuid import uuid4
+
+
+class JobQueue:
+    """Durable job queue stored in SQLite and drained by worker threads.
+
+    Several processes may drain the same file. A claimed job records the
+    claiming queue's ``worker_id`` and a lease that a heartbeat thread renews
+    while the job runs; workers only take over a ``running`` job once its
+    lease has expired, so jobs survive crashes and restarts without being run
+    twice by live processes. Worker threads start on the first enqueue or an
+    explicit start(). ``handler`` receives the job payload and returns a
+    JSON-serializable result.
+    """
+
+    def __init__(self, path: str, handler: Callable[[dict], dict], workers: int = 2,
+                 poll_interval: float = 1.0, lease_seconds: float = 60.0):
+        self.path = path
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self._wakeup = threading.Condition()
+        self._threads = []
+        self._started = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " kind TEXT NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " result TEXT,"
+                " error TEXT,"
+                " created_at REAL NOT NULL,"
+                " started_at REAL,"
+                " finished_at REAL,"
+                " worker_id TEXT,"
+                " lease_expires REAL)"
+            )
+            # Queue files from before leases
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for name, ddl_type in (("worker_id", "TEXT"), ("lease_expires", "REAL")):
+                if name not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {ddl_type}")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_status_created ON jobs (status, created_at)")
+            self._local.conn = conn
+        return conn
+
+    def start(self) -> None:
+        with self._lock:
+            if self._started:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            thread = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+            self._started = True
+
+    def enqueue(self, kind: str, payload: dict) -> str:
+        job_id = str(uuid4())
+        self._connection().execute(
+            "INSERT INTO jobs (id, kind, payload, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+            (job_id, kind, json.dumps(payload), time.time())
+        )
+        self.start()
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        row = self._connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "createdAt": row["created_at"],
+            "startedAt": row["started_at"],
+            "finishedAt": row["finished_at"]
+        }
+
+    def counts(self) -> dict:
+        rows = self._connection().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        """Take the oldest queued job, or a running one whose owner's lease has lapsed."""
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued'"
+                " OR (status = 'running' AND COALESCE(lease_expires, 0) < ?)"
+                " ORDER BY created_at LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, worker_id = ?, lease_expires = ? WHERE id = ?",
+                    (now, self.worker_id, now + self.lease_seconds, row["id"])
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return row
+
+    def _finish(self, job_id: str, status: str, result=None, error=None) -> None:
+        # A job whose lease lapsed and was claimed elsewhere belongs to the new owner
+        self._connection().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease_expires = NULL"
+            " WHERE id = ? AND worker_id = ?",
+            (status, json.dumps(result) if result is not None else None, error, time.time(), job_id,
+             self.worker_id)
+        )
+
+    def _heartbeat(self) -> None:
+        """Extend the lease of every job this queue is running, three times per lease."""
+        while True:
+            time.sleep(self.lease_seconds / 3)
+            try:
+                self._connection().execute(
+                    "UPDATE jobs SET lease_expires = ? WHERE status = 'running' AND worker_id = ?",
+                    (time.time() + self.lease_seconds, self.worker_id)
+                )
+            except sqlite3.OperationalError:
+                continue
+
+    def _work(self) -> None:
+        while True:
+            try:
+                row = self._claim()
+            except sqlite3.OperationalError:
+                row = None
+            if row is None:
+                with self._wakeup:
+                    self._wakeup.wait(self.poll_interval)
+                continue
+            try:
+                result = self.handler(json.loads(row["payload"]))
+            except Exception as e:
+                self._finish(row["id"], "failed", error=str(e))
+            else:
+                self._finish(row["id"], "done", result=result)
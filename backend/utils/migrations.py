@@ -0,0 +1,203 @@
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import inspect, text
+
+from .fingerprint import normalize_vendor, receipt_fingerprint
+from .rollups import create_rollup_table, rebuild_rollups
+from .vendor_index import VendorIndex
+
+# Versioned schema migrations. Each entry runs once, in order, inside its own
+# transaction, and is recorded in the schema_version table. Fresh databases
+# get the current schema from db.create_all(); migrations then bring older
+# databases up to the same shape and are no-ops on new ones.
+#
+# Append new migrations to the end of MIGRATIONS; never edit applied ones.
+
+
+def _add_missing_columns(conn, table: str, columns: dict) -> None:
+    existing = {c["name"] for c in inspect(conn).get_columns(table)}
+    for name, ddl_type in columns.items():
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl_type}"))
+
+
+def _user_settings_branding_columns(conn) -> None:
+    _add_missing_columns(conn, "user_settings", {
+        "logo_path": "VARCHAR(255)",
+        "contact_info": "TEXT",
+        "help_content": "TEXT"
+    })
+
+
+def _hot_path_indexes(conn) -> None:
+    statements = [
+        "CREATE INDEX IF NOT EXISTS ix_expense_category_uploaded_at ON expense (category, uploaded_at, amount)",
+        "CREATE INDEX IF NOT EXISTS ix_expense_uploaded_at_id ON expense (uploaded_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_expense_month_category ON expense (strftime('%Y-%m', uploaded_at), category, amount)",
+        "CREATE INDEX IF NOT EXISTS ix_expense_vendor ON expense (vendor)",
+        "CREATE INDEX IF NOT EXISTS ix_anomaly_detection_expense_id ON anomaly_detection (expense_id)",
+        "CREATE INDEX IF NOT EXISTS ix_anomaly_detection_detected_at ON anomaly_detection (detected_at)",
+        "CREATE INDEX IF NOT EXISTS ix_anomaly_detection_severity_status ON anomaly_detection (severity, status)",
+        "CREATE INDEX IF NOT EXISTS ix_anomaly_detection_type ON anomaly_detection (anomaly_type, detected_at, expense_id)",
+        "CREATE INDEX IF NOT EXISTS ix_activity_log_timestamp ON activity_log (timestamp)",
+        "CREATE INDEX IF NOT EXISTS ix_activity_log_action_type_timestamp ON activity_log (action_type, timestamp)",
+        "CREATE INDEX IF NOT EXISTS ix_user_settings_role_user_id ON user_settings (role, user_id)",
+    ]
+    for statement in statements:
+        conn.execute(text(statement))
+
+
+def _expense_fingerprints(conn) -> None:
+    _add_missing_columns(conn, "expense", {
+        "fingerprint": "VARCHAR(16)",
+        "text_minhash": "BLOB"
+    })
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_expense_fingerprint ON expense (fingerprint)"))
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS expense_minhash_band ("
+        " band INTEGER NOT NULL,"
+        " value INTEGER NOT NULL,"
+        " expense_id INTEGER NOT NULL REFERENCES expense (id),"
+        " PRIMARY KEY (band, value, expense_id))"
+    ))
+    # Backfill fingerprints; MinHashes need the full OCR text, so only new uploads get one
+    rows = conn.execute(text(
+        "SELECT id, vendor, amount, uploaded_at FROM expense WHERE fingerprint IS NULL AND amount > 0"
+    )).all()
+    updates = []
+    for expense_id, vendor, amount, uploaded_at in rows:
+        if isinstance(uploaded_at, str):
+            uploaded_at = datetime.fromisoformat(uploaded_at)
+        fingerprint = receipt_fingerprint(vendor, amount, uploaded_at)
+        if fingerprint:
+            updates.append({"id": expense_id, "fingerprint": fingerprint})
+    if updates:
+        conn.execute(text("UPDATE expense SET fingerprint = :fingerprint WHERE id = :id"), updates)
+
+
+def _vendor_table(conn) -> None:
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS vendor ("
+        " name VARCHAR(255) NOT NULL PRIMARY KEY,"
+        " display_name VARCHAR(255),"
+        " transaction_count INTEGER NOT NULL,"
+        " first_seen DATETIME,"
+        " last_seen DATETIME)"
+    ))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_vendor_transaction_count ON vendor (transaction_count)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_vendor_first_seen ON vendor (first_seen)"))
+    if conn.execute(text("SELECT 1 FROM vendor LIMIT 1")).first():
+        return
+
+    # Backfill from history; spellings that normalize alike are merged
+    vendors = {}
+    rows = conn.execute(text(
+        "SELECT vendor, COUNT(*), MIN(uploaded_at), MAX(uploaded_at) FROM expense"
+        " WHERE vendor IS NOT NULL GROUP BY vendor ORDER BY MIN(uploaded_at)"
+    ))
+    for vendor, count, first_seen, last_seen in rows:
+        name = normalize_vendor(vendor)
+        if not name:
+            continue
+        row = vendors.setdefault(name, {
+            "name": name, "display_name": vendor.strip(), "transaction_count": 0,
+            "first_seen": first_seen, "last_seen": last_seen
+        })
+        row["transaction_count"] += count
+        row["last_seen"] = max(row["last_seen"], last_seen)
+    if vendors:
+        conn.execute(text(
+            "INSERT INTO vendor (name, display_name, transaction_count, first_seen, last_seen)"
+            " VALUES (:name, :display_name, :transaction_count, :first_seen, :last_seen)"
+        ), list(vendors.values()))
+
+
+def _canonical_vendor_keys(conn) -> None:
+    # Re-key the vendor table and expense fingerprints by fuzzy-matched
+    # canonical vendor, replaying history in upload order as ingest would
+    index = VendorIndex()
+    vendors = {}
+    keys = {}
+    rows = conn.execute(text(
+        "SELECT vendor, COUNT(*), MIN(uploaded_at), MAX(uploaded_at) FROM expense"
+        " WHERE vendor IS NOT NULL GROUP BY vendor ORDER BY MIN(uploaded_at)"
+    ))
+    for vendor, count, first_seen, last_seen in rows:
+        key = index.resolve(vendor)
+        if not key:
+            continue
+        index.add(key)
+        keys[vendor] = key
+        row = vendors.setdefault(key, {
+            "name": key, "display_name": vendor.strip(), "transaction_count": 0,
+            "first_seen": first_seen, "last_seen": last_seen
+        })
+        row["transaction_count"] += count
+        row["last_seen"] = max(row["last_seen"], last_seen)
+
+    conn.execute(text("DELETE FROM vendor"))
+    if vendors:
+        conn.execute(text(
+            "INSERT INTO vendor (name, display_name, transaction_count, first_seen, last_seen)"
+            " VALUES (:name, :display_name, :transaction_count, :first_seen, :last_seen)"
+        ), list(vendors.values()))
+
+    updates = []
+    for expense_id, vendor, amount, uploaded_at in conn.execute(text(
+        "SELECT id, vendor, amount, uploaded_at FROM expense WHERE amount > 0"
+    )):
+        if isinstance(uploaded_at, str):
+            uploaded_at = datetime.fromisoformat(uploaded_at)
+        updates.append({"id": expense_id, "fingerprint": receipt_fingerprint(keys.get(vendor, ""), amount, uploaded_at)})
+    if updates:
+        conn.execute(text("UPDATE expense SET fingerprint = :fingerprint WHERE id = :id"), updates)
+
+
+def _expense_rollups(conn) -> None:
+    create_rollup_table(conn)
+    rebuild_rollups(conn)
+
+
+def _drop_month_category_index(conn) -> None:
+    # Monthly totals are read from expense_rollup, so nothing filters on strftime() any more
+    conn.execute(text("DROP INDEX IF EXISTS ix_expense_month_category"))
+
+
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "user_settings branding columns", _user_settings_branding_columns),
+    (2, "indexes for dashboard and ingest queries", _hot_path_indexes),
+    (3, "expense fingerprints for duplicate detection", _expense_fingerprints),
+    (4, "vendor table", _vendor_table),
+    (5, "canonical vendor keys", _canonical_vendor_keys),
+    (6, "dashboard rollup table", _expense_rollups),
+    (7, "drop unused month/category expression index", _drop_month_category_index),
+]
+
+
+def current_version(conn) -> int:
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        " version INTEGER PRIMARY KEY,"
+        " description VARCHAR(255),"
+        " applied_at DATETIME)"
+    ))
+    return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_version")).scalar()
+
+
+def run_migrations(engine, log=print) -> int:
+    """Apply every pending migration; returns the resulting schema version."""
+    with engine.begin() as conn:
+        version = current_version(conn)
+    for number, description, migrate in MIGRATIONS:
+        if number <= version:
+            continue
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(
+                text("INSERT INTO schema_version (version, description, applied_at) VALUES (:v, :d, :t)"),
+                {"v": number, "d": description, "t": datetime.utcnow()}
+            )
+        log(f"Applied migration {number}: {description}")
+        version = number
+    return version
@@ -0,0 +1,102 @@
+import os
+import threading
+from typing import Callable, Dict, Iterable, Optional
+
+# Models are only loaded on first use so that importing the backend (or a
+# maintenance script) never pulls in torch unless something classifies.
+
+
+class ModelRegistry:
+    """Lazily constructs named models and tracks their load state."""
+
+    def __init__(self):
+        self._factories: Dict[str, Callable] = {}
+        self._models: Dict[str, object] = {}
+        self._errors: Dict[str, str] = {}
+        self._loading = set()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._warmup_thread: Optional[threading.Thread] = None
+
+    def register(self, name: str, factory: Callable) -> None:
+        with self._lock:
+            self._factories[name] = factory
+            self._load_locks[name] = threading.Lock()
+
+    def get(self, name: str):
+        """Return the model, loading it on first use; None if it failed to load."""
+        if name in self._models:
+            return self._models[name]
+        if name in self._errors:
+            return None
+        if name not in self._factories:
+            raise KeyError(f"Unknown model: {name}")
+
+        with self._load_locks[name]:
+            if name in self._models:
+                return self._models[name]
+            if name in self._errors:
+                return None
+            self._loading.add(name)
+            try:
+                self._models[name] = self._factories[name]()
+            except Exception as e:
+                self._errors[name] = str(e)
+            finally:
+                self._loading.discard(name)
+        return self._models.get(name)
+
+    def status(self) -> Dict[str, str]:
+        states = {}
+        for name in self._factories:
+            if name in self._models:
+                states[name] = "ready"
+            elif name in self._errors:
+                states[name] = "failed"
+            elif name in self._loading:
+                states[name] = "loading"
+            else:
+                states[name] = "not_loaded"
+        return states
+
+    def errors(self) -> Dict[str, str]:
+        return dict(self._errors)
+
+    def is_ready(self) -> bool:
+        """True once no model is loading and any requested warm-up has finished."""
+        if self._warmup_thread is not None and self._warmup_thread.is_alive():
+            return False
+        return not self._loading
+
+    def warm_up(self, names: Optional[Iterable[str]] = None, background: bool = True):
+        """Load the given models (default: all) now, optionally on a daemon thread."""
+        names = list(names) if names is not None else list(self._factories)
+
+        def load_all():
+            for name in names:
+                self.get(name)
+
+        if not background:
+            load_all()
+            return None
+        self._warmup_thread = threading.Thread(target=load_all, name="model-warmup", daemon=True)
+        self._warmup_thread.start()
+        return self._warmup_thread
+
+
+def pipeline_factory(task: str, **kwargs) -> Callable:
+    """Build a factory that creates a transformers pipeline when first called."""
+    def load():
+        from transformers import pipeline
+        return pipeline(task, **kwargs)
+    return load
+
+
+registry = ModelRegistry()
+registry.register("zero-shot", pipeline_factory("zero-shot-classification", model="facebook/bart-large-mnli"))
+registry.register("ner", pipeline_factory("ner", aggregation_strategy="simple"))
+registry.register("sentiment", pipeline_factory("sentiment-analysis"))
+registry.register("embedding", pipeline_factory(
+    "feature-extraction",
+    model=os.environ.get("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+))
@@ -2,20 +2,27 @@ import pytesseract
 from PIL import Image
 import os
 
+from .preprocess import PreprocessConfig, is_available, preprocess_image
+
 # 👇 Update this path if Tesseract is installed elsewhere
 pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 
-def extract_text_from_image(image_path: str) -> str:
+def load_image(image_path: str, config: PreprocessConfig = None) -> Image.Image:
+    """Load the image Tesseract will read, preprocessed when OpenCV is available."""
+    config = config or PreprocessConfig.from_env()
+    if config.enabled and is_available():
+        return preprocess_image(image_path, config)
+    image = Image.open(image_path)
+    return image.convert('L')  # Convert to grayscale for better accuracy
+
+def extract_text_from_image(image_path: str, config: PreprocessConfig = None) -> str:
     """Extract text from an image file using Tesseract OCR."""
     if not os.path.exists(image_path):
         raise FileNotFoundError(f"File not found: {image_path}")
 
     try:
-        image = Image.open(image_path)
-        image = image.convert('L')  # Convert to grayscale for better accuracy
+        image = load_image(image_path, config)
         text = pytesseract.image_to_string(image)
         return text.strip()
     except Exception as e:
         raise RuntimeError(f"OCR processing failed: {str(e)}")
-
-
@@ -0,0 +1,142 @@
+import math
+import os
+from dataclasses import dataclass
+
+from PIL import Image
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:  # preprocessing is skipped when OpenCV is unavailable
+    cv2 = None
+    np = None
+
+# JPEG decoders can downscale by 2/4/8 while decoding, which avoids ever
+# materializing a full-resolution 12+ MP phone photo in memory.
+REDUCED_GRAYSCALE_FLAGS = (
+    (8, "IMREAD_REDUCED_GRAYSCALE_8"),
+    (4, "IMREAD_REDUCED_GRAYSCALE_4"),
+    (2, "IMREAD_REDUCED_GRAYSCALE_2"),
+)
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.environ.get(name, default).lower() in ("1", "true", "yes")
+
+
+@dataclass
+class PreprocessConfig:
+    enabled: bool = True
+    max_side: int = 2000
+    max_pixels: int = 3_000_000
+    max_dpi: int = 300
+    crop: bool = True
+    deskew: bool = True
+    binarize: bool = True
+
+    @classmethod
+    def from_env(cls) -> "PreprocessConfig":
+        return cls(
+            enabled=_env_flag("OCR_PREPROCESS", "1"),
+            max_side=int(os.environ.get("OCR_MAX_SIDE", "2000")),
+            max_pixels=int(os.environ.get("OCR_MAX_PIXELS", "3000000")),
+            max_dpi=int(os.environ.get("OCR_MAX_DPI", "300")),
+            crop=_env_flag("OCR_CROP", "1"),
+            deskew=_env_flag("OCR_DESKEW", "1"),
+            binarize=_env_flag("OCR_BINARIZE", "1"),
+        )
+
+
+def is_available() -> bool:
+    return cv2 is not None
+
+
+def target_scale(width: int, height: int, dpi, config: PreprocessConfig) -> float:
+    """Scale factor (<= 1) that satisfies the DPI, side-length and pixel caps."""
+    scale = 1.0
+    if dpi and dpi > config.max_dpi:
+        scale = min(scale, config.max_dpi / dpi)
+    if max(width, height) > config.max_side:
+        scale = min(scale, config.max_side / max(width, height))
+    if width * height > config.max_pixels:
+        scale = min(scale, math.sqrt(config.max_pixels / (width * height)))
+    return scale
+
+
+def load_grayscale(image_path: str, config: PreprocessConfig):
+    """Decode the image as grayscale at roughly the capped resolution."""
+    with Image.open(image_path) as image:
+        width, height = image.size
+        dpi = image.info.get("dpi")
+    dpi = max(dpi) if isinstance(dpi, tuple) else dpi
+    scale = target_scale(width, height, dpi, config)
+
+    flag = cv2.IMREAD_GRAYSCALE
+    for factor, name in REDUCED_GRAYSCALE_FLAGS:
+        if scale <= 1.0 / factor and hasattr(cv2, name):
+            flag = getattr(cv2, name)
+            break
+    gray = cv2.imread(image_path, flag)
+    if gray is None:
+        raise ValueError(f"Unsupported image: {image_path}")
+
+    target_width = max(1, int(round(width * scale)))
+    if gray.shape[1] > target_width:
+        target_height = max(1, int(round(gray.shape[0] * target_width / gray.shape[1])))
+        gray = cv2.resize(gray, (target_width, target_height), interpolation=cv2.INTER_AREA)
+    return gray
+
+
+def crop_to_receipt(gray):
+    """Crop to the largest bright quadrilateral-ish region (the paper)."""
+    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+    _, mask = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, np.ones((15, 15), np.uint8))
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return gray
+    x, y, w, h = cv2.boundingRect(max(contours, key=cv2.contourArea))
+    image_area = gray.shape[0] * gray.shape[1]
+    # Ignore tiny regions and crops that would barely change the image
+    if w * h < 0.2 * image_area or w * h > 0.95 * image_area:
+        return gray
+    margin = 10
+    return gray[max(0, y - margin):y + h + margin, max(0, x - margin):x + w + margin]
+
+
+def deskew(gray):
+    """Rotate so the text lines are horizontal, using the ink's minimum-area rectangle."""
+    _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    coords = cv2.findNonZero(ink)
+    if coords is None or len(coords) < 50:
+        return gray
+    angle = cv2.minAreaRect(coords)[-1]
+    # minAreaRect reports angles in [0, 90) (OpenCV >= 4.5) or [-90, 0)
+    if angle > 45:
+        angle -= 90
+    elif angle < -45:
+        angle += 90
+    if abs(angle) < 0.5 or abs(angle) > 30:
+        return gray
+    h, w = gray.shape
+    matrix = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+    return cv2.warpAffine(gray, matrix, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
+
+
+def binarize(gray):
+    blurred = cv2.GaussianBlur(gray, (3, 3), 0)
+    _, binary = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return binary
+
+
+def preprocess_image(image_path: str, config: PreprocessConfig = None) -> Image.Image:
+    """Downscale, crop, deskew and binarize a receipt photo for Tesseract."""
+    config = config or PreprocessConfig.from_env()
+    gray = load_grayscale(image_path, config)
+    if config.crop:
+        gray = crop_to_receipt(gray)
+    if config.deskew:
+        gray = deskew(gray)
+    if config.binarize:
+        gray = binarize(gray)
+    return Image.fromarray(gray)
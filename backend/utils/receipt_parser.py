@@ -0,0 +1,280 @@
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+# Single-pass receipt parser.
+#
+# One compiled pattern splits the upper-cased OCR text into tokens (words,
+# number-like runs, currency symbols, "%" and line breaks) with a single
+# findall() in C; one loop over the tokens then picks out totals, subtotal,
+# tax, date and currency. Labels are recognized from whole words with dict
+# lookups ("GRAND TOTAL", "TOTAL EXCLUDING GST", "TOTAL QTY", ...) and apply
+# to the last amount on their line (the right-hand column), or to the first
+# amount on the next line when OCR splits "TOTAL" from its value.
+#
+# A regex alternation that recognizes every field at every character offset
+# is several times slower than this in CPython: its branches are retried at
+# each position, while here only word and number boundaries reach Python.
+
+# Ambiguous numeric dates (05/06/2018) are read day-first, as on the
+# Malaysian/European receipts this app mostly sees; set RECEIPT_DAY_FIRST=0
+# for US-style month-first receipts.
+DAY_FIRST = os.environ.get("RECEIPT_DAY_FIRST", "1").lower() in ("1", "true", "yes")
+
+# Unlabelled amounts outside this range are store numbers, phone fragments, etc.
+MIN_AMOUNT = 0.01
+MAX_AMOUNT = 10000.0
+
+_TOKEN = re.compile(r"[A-Z]+|\d[\d.,/:-]*|[\n$€£₹%]")
+# 1,234.56 / 1234.56 / 12,50 (comma decimal) / 28; not times or phone numbers
+_AMOUNT = re.compile(r"\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?|\d+(?:[.,]\d{1,2})?")
+# 2018-06-13 / 13/06/2018 / 13.06.18
+_NUMERIC_DATE = re.compile(r"(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})|(\d{1,2})[-/.](\d{1,2})[-/.](\d{4}|\d{2})")
+_NUMBER_PUNCTUATION = ".,:/-"
+
+# Total labels by strength; the strongest label wins, and the last one on
+# the receipt breaks ties (the final figure after rounding/discounts).
+_TOTAL_RANK = {"total": 1, "due": 2}
+
+_LABEL_WORDS = {
+    "SUBTOTAL": "subtotal", "GST": "tax", "SST": "tax", "VAT": "tax", "TAX": "tax",
+    "CASH": "ignore", "CHANGE": "ignore", "TENDERED": "ignore", "ROUNDING": "ignore",
+    "DISCOUNT": "ignore", "QTY": "ignore",
+}
+# "<word> TOTAL"
+_TOTAL_PREFIXES = {"GRAND": "due", "FINAL": "due", "NET": "due", "ROUNDED": "due", "SUB": "subtotal"}
+_LABEL_PHRASES = {
+    ("AMOUNT", "DUE"): "due", ("BALANCE", "DUE"): "due", ("AMOUNT", "PAYABLE"): "due",
+    ("SALES", "TAX"): "tax", ("SERVICE", "TAX"): "tax", ("NET", "BEFORE"): "subtotal",
+}
+# Words after TOTAL that change what it totals; None keeps reading
+_TOTAL_MODIFIERS = {
+    "SALES": None, "OF": None, "AMOUNT": "due", "PAYABLE": "due", "DUE": "due",
+    "INCL": "due", "INCLUDING": "due", "INCLUSIVE": "due",
+    "EXCL": "subtotal", "EXCLUDING": "subtotal", "EXCLUSIVE": "subtotal", "BEFORE": "subtotal",
+    "GST": "tax", "SST": "tax", "VAT": "tax", "TAX": "tax",
+    "QTY": "ignore", "QUANTITY": "ignore", "ITEM": "ignore", "ITEMS": "ignore", "UNITS": "ignore",
+    "SAVINGS": "ignore", "DISCOUNT": "ignore", "DISCOUNTS": "ignore", "POINTS": "ignore",
+}
+
+# Words that can start a label, checked before the label is read
+_LABEL_STARTS = frozenset(_LABEL_WORDS) | frozenset(_TOTAL_PREFIXES) | {word for word, _ in _LABEL_PHRASES} | {"TOTAL"}
+
+_MONTHS = {name: number for number, names in enumerate((
+    ("JAN", "JANUARY"), ("FEB", "FEBRUARY"), ("MAR", "MARCH"), ("APR", "APRIL"),
+    ("MAY",), ("JUN", "JUNE"), ("JUL", "JULY"), ("AUG", "AUGUST"),
+    ("SEP", "SEPT", "SEPTEMBER"), ("OCT", "OCTOBER"), ("NOV", "NOVEMBER"), ("DEC", "DECEMBER"),
+), start=1) for name in names}
+
+_CURRENCIES = {
+    "RM": "MYR", "MYR": "MYR", "$": "USD", "USD": "USD", "SGD": "SGD",
+    "€": "EUR", "EUR": "EUR", "£": "GBP", "GBP": "GBP", "₹": "INR", "INR": "INR", "RS": "INR",
+}
+
+# Vendor heuristics: header lines that are not the business name
+_VENDOR_SKIP = re.compile(
+    r"RECEIPT|INVOICE|CASH|CHANGE|TOTAL|SUBTOTAL|TAX|DATE|TIME|THANK YOU|CUSTOMER|SALESPERSON",
+    re.IGNORECASE
+)
+_VENDOR_STRIP = re.compile(r"[^\w\s&\-\.]")
+VENDOR_HEADER_LINES = 10
+
+
+@dataclass
+class ParsedReceipt:
+    total: float = 0.0
+    subtotal: Optional[float] = None
+    tax: Optional[float] = None
+    date: Optional[date] = None
+    currency: Optional[str] = None
+    vendor: str = ""
+    amounts: List[float] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return {
+            "vendor": self.vendor,
+            "date": self.date.isoformat() if self.date else "",
+            "total": self.total,
+            "subtotal": self.subtotal,
+            "tax": self.tax,
+            "currency": self.currency or ""
+        }
+
+
+def _to_float(number: str) -> float:
+    # A comma followed by exactly two digits is a decimal comma (12,50)
+    if "," in number and "." not in number and len(number) - number.rindex(",") == 3:
+        return float(number.replace(",", "."))
+    return float(number.replace(",", ""))
+
+
+def _make_date(year: int, month: int, day: int) -> Optional[date]:
+    if year < 100:
+        year += 2000
+    try:
+        parsed = date(year, month, day)
+    except ValueError:
+        return None
+    return parsed if 1990 <= parsed.year <= 2100 else None
+
+
+def _numeric_date(number: str) -> Optional[date]:
+    match = _NUMERIC_DATE.fullmatch(number)
+    if match is None:
+        return None
+    if match.group(1):
+        return _make_date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+    first, second, year = int(match.group(4)), int(match.group(5)), int(match.group(6))
+    if first > 12 or (second <= 12 and DAY_FIRST):
+        return _make_date(year, second, first)
+    return _make_date(year, first, second)
+
+
+def _spelled_date(day: str, month: str, year: str) -> Optional[date]:
+    """13 JUN 2018 / JUN 13, 2018 from three tokens, or None."""
+    day, year = day.rstrip(_NUMBER_PUNCTUATION), year.rstrip(_NUMBER_PUNCTUATION)
+    if not (day.isdigit() and year.isdigit() and len(day) <= 2 and len(year) in (2, 4)):
+        return None
+    return _make_date(int(year), _MONTHS[month], int(day))
+
+
+def _read_label(tokens: List[str], i: int) -> Tuple[Optional[str], int]:
+    """Label starting at tokens[i] as (kind, index after it); kind is None for other words."""
+    word = tokens[i]
+    following = tokens[i + 1] if i + 1 < len(tokens) else ""
+    if following == "TOTAL" and word in _TOTAL_PREFIXES:
+        return _TOTAL_PREFIXES[word], i + 2
+    if (word, following) in _LABEL_PHRASES:
+        return _LABEL_PHRASES[word, following], i + 2
+    if word != "TOTAL":
+        return _LABEL_WORDS.get(word), i + 1
+
+    # TOTAL SALES (INCLUSIVE OF GST), TOTAL EXCLUDING GST, TOTAL QTY, ...
+    kind = "total"
+    i += 1
+    while i < len(tokens) and tokens[i] in _TOTAL_MODIFIERS:
+        modifier = _TOTAL_MODIFIERS[tokens[i]]
+        if modifier and kind == "total":
+            kind = modifier
+        i += 1
+    return kind, i
+
+
+def guess_vendor(text: str) -> str:
+    """Business name from the receipt header: the first line that looks like a name."""
+    lines = [line.strip() for line in text.split('\n') if len(line.strip()) > 2]
+    if not lines:
+        return ""
+
+    for line in lines[:VENDOR_HEADER_LINES]:
+        if _VENDOR_SKIP.search(line) or not 3 < len(line) < 50:
+            continue
+        if line.isupper() or line.istitle() or any(char.isupper() for char in line):
+            cleaned = _VENDOR_STRIP.sub('', line).strip()
+            if len(cleaned) > 2:
+                return cleaned
+
+    # Last resort: the first non-empty line
+    return lines[0]
+
+
+def parse_receipt(text: str) -> ParsedReceipt:
+    """Extract total, subtotal, tax, date, currency and a header vendor guess in one scan."""
+    result = ParsedReceipt()
+    if not text:
+        return result
+
+    tokens = _TOKEN.findall(text.upper())
+    count = len(tokens)
+    totals = []  # (rank, line number, amount)
+    unlabelled = []
+    label = carried = None
+    label_alone = False
+    amount = None
+    currency_on_line = False
+    line_number = 0
+
+    def settle(kind, value):
+        if kind in _TOTAL_RANK:
+            totals.append((_TOTAL_RANK[kind], line_number, value))
+        elif kind == "subtotal":
+            result.subtotal = value
+        elif kind == "tax":
+            result.tax = value
+
+    i = 0
+    while i < count:
+        token = tokens[i]
+        i += 1
+        if token == "\n":
+            if amount is not None:
+                settle(label, amount)
+                carried = None
+            elif label is not None:
+                # "TOTAL" alone on its line: the value is on the next line
+                carried = label if label_alone else None
+            label, amount, currency_on_line = None, None, False
+            line_number += 1
+
+        elif token[0].isdigit():
+            number = token.rstrip(_NUMBER_PUNCTUATION)
+            if i < count and tokens[i] == "%":
+                i += 1  # a rate: GST 6%
+                continue
+            if i + 1 < count and tokens[i] in _MONTHS:
+                spelled = _spelled_date(number, tokens[i], tokens[i + 1])
+                if spelled is not None:
+                    result.date = result.date or spelled
+                    i += 2
+                    continue
+            if not _AMOUNT.fullmatch(number):
+                if result.date is None:
+                    result.date = _numeric_date(number)
+                continue
+
+            value = _to_float(number)
+            result.amounts.append(value)
+            if carried is not None and label is None:
+                settle(carried, value)
+                carried, label, amount = None, "ignore", value
+                continue
+            amount = value
+            if label is None and (currency_on_line or "." in number or "," in number) \
+                    and MIN_AMOUNT <= value <= MAX_AMOUNT:
+                unlabelled.append(value)
+
+        elif token in _CURRENCIES:
+            currency_on_line = True
+            if result.currency is None:
+                # S$ is tokenized as "S", "$"
+                result.currency = "SGD" if token == "$" and tokens[i - 2] == "S" else _CURRENCIES[token]
+
+        elif token in _MONTHS and i + 1 < count:
+            spelled = _spelled_date(tokens[i], token, tokens[i + 1])
+            if spelled is not None:
+                result.date = result.date or spelled
+                i += 2
+
+        elif label is None:
+            if token not in _LABEL_STARTS:
+                continue
+            kind, after = _read_label(tokens, i - 1)
+            if kind is not None:
+                label, label_alone, i = kind, True, after
+        else:
+            label_alone = False
+
+    if amount is not None:
+        settle(label, amount)
+
+    if totals:
+        result.total = max(totals)[2]
+    elif result.subtotal is not None:
+        result.total = round(result.subtotal + (result.tax or 0.0), 2)
+    elif unlabelled:
+        result.total = max(unlabelled)
+
+    result.vendor = guess_vendor(text)
+    return result
@@ -0,0 +1,114 @@
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+# Vectorized anomaly rescoring.
+#
+# Computes the anomaly rule features (see utils/anomaly_rules.py) for the
+# whole expense history at once. Rows arrive as NumPy arrays in id order,
+# and each row's features describe the rows before it, as they were when it
+# was uploaded:
+#
+#   category_stats  running count, mean, population standard deviation and
+#                   max of the earlier positive amounts in the same category
+#                   (update_category_stats), as segmented cumulative sums
+#   duplicate       an earlier row with the same vendor key and amount in
+#                   cents, uploaded the same day or the day before
+#                   (receipt_fingerprint), as one sorted-key lookup
+#   new_vendor      the first row of a vendor key, once some other vendor is
+#                   known (record_vendor)
+#
+# Near-duplicate receipt text is matched from MinHash band collisions
+# (earlier_candidates) and confirmed by the caller with full signatures.
+
+
+def category_stats_before(categories: np.ndarray, amounts: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """Per-row (count, mean, std_dev, max) of the earlier positive amounts in the row's category.
+
+    ``categories`` holds integer codes, negative for rows without a category;
+    those rows get a count of 0, as do rows with no earlier positive amount.
+    """
+    n = len(amounts)
+    count = np.zeros(n, dtype=np.int64)
+    mean = np.zeros(n)
+    std_dev = np.zeros(n)
+    maximum = np.full(n, -np.inf)
+    positive = amounts > 0
+
+    order = np.argsort(categories, kind="stable")
+    ordered = categories[order]
+    starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]]) if n else np.array([], dtype=np.int64)
+    for start, end in zip(starts, np.r_[starts[1:], n]):
+        if ordered[start] < 0:
+            continue
+        rows = order[start:end]
+        weights = positive[rows]
+        if not weights.any():
+            continue
+        values = amounts[rows]
+        # Shift by the first amount so the sum of squares does not cancel catastrophically
+        shift = values[weights][0]
+        shifted = np.where(weights, values - shift, 0.0)
+        seen = np.r_[0, np.cumsum(weights)[:-1]]
+        total = np.r_[0.0, np.cumsum(shifted)[:-1]]
+        squares = np.r_[0.0, np.cumsum(shifted * shifted)[:-1]]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            offset = np.where(seen > 0, total / seen, 0.0)
+            m2 = np.maximum(squares - total * offset, 0.0)
+            std_dev[rows] = np.where(seen > 1, np.sqrt(m2 / seen), 0.0)
+        count[rows] = seen
+        mean[rows] = shift + offset
+        maximum[rows] = np.r_[-np.inf, np.maximum.accumulate(np.where(weights, values, -np.inf))[:-1]]
+    return count, mean, std_dev, maximum
+
+
+def fingerprint_duplicates(vendors: np.ndarray, cents: np.ndarray, days: np.ndarray) -> np.ndarray:
+    """Index of the first earlier row with the same vendor and cents uploaded the same day or the day before.
+
+    ``vendors`` are integer vendor-key codes and ``days`` day ordinals; rows
+    with no positive amount in ``cents`` are never matched. Returns -1 where
+    there is no match.
+    """
+    n = len(days)
+    matches = np.full(n, -1, dtype=np.int64)
+    rows = np.flatnonzero(cents > 0)
+    if not len(rows):
+        return matches
+
+    _, cent_codes = np.unique(cents[rows], return_inverse=True)
+    _, pairs = np.unique(vendors[rows].astype(np.int64) * (cent_codes.max() + 1) + cent_codes, return_inverse=True)
+    first_day = days[rows].min()
+    span = int(days[rows].max() - first_day) + 2
+    # Day slot 0 is left free so "the day before" the earliest day matches nothing
+    keys = pairs.astype(np.int64) * span + (days[rows] - first_day + 1)
+    unique_keys, first = np.unique(keys, return_index=True)
+
+    best = np.full(len(rows), n, dtype=np.int64)
+    for offset in (0, 1):
+        probe = keys - offset
+        position = np.minimum(np.searchsorted(unique_keys, probe), len(unique_keys) - 1)
+        candidate = np.where(unique_keys[position] == probe, rows[first[position]], n)
+        best = np.minimum(best, np.where(candidate < rows, candidate, n))
+    matches[rows] = np.where(best < n, best, -1)
+    return matches
+
+
+def unknown_vendors(vendors: np.ndarray, named: np.ndarray) -> np.ndarray:
+    """Rows with a vendor seen for the first time, after at least one other vendor was seen."""
+    n = len(vendors)
+    named_rows = np.flatnonzero(named)
+    if not len(named_rows):
+        return np.zeros(n, dtype=bool)
+    _, first, inverse = np.unique(vendors, return_index=True, return_inverse=True)
+    index = np.arange(n)
+    return named & (first[inverse] == index) & (index > named_rows[0])
+
+
+def earlier_candidates(groups: Iterable[Iterable[int]]) -> Dict[int, List[int]]:
+    """Map each expense id to the earlier ids it shares a MinHash band value with, ascending."""
+    candidates: Dict[int, set] = {}
+    for group in groups:
+        members = sorted(set(group))
+        for position in range(1, len(members)):
+            candidates.setdefault(members[position], set()).update(members[:position])
+    return {expense_id: sorted(earlier) for expense_id, earlier in candidates.items()}
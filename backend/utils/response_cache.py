@@ -0,0 +1,83 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+# Response cache for read-heavy GET endpoints.
+#
+# Entries are serialized response bodies keyed by route plus sorted query
+# arguments and tagged with the data version they were rendered from. Every
+# committed write bumps the version, so a hit is only served while nothing
+# has changed since; the TTL bounds staleness from writes the counter cannot
+# see (other worker processes, CLI commands). Bodies carry a content-hash
+# ETag so clients revalidating with If-None-Match get a 304 either way.
+
+
+def body_etag(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class ResponseCache:
+    """In-memory LRU of rendered responses, invalidated by a global data version."""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def bump(self) -> int:
+        """Record a committed write; every cached entry becomes stale."""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+            return self.version
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str, str]]:
+        """(body, mimetype, etag) for a fresh entry, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != self.version or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2:]
+
+    def put(self, key: str, version: int, body: bytes, mimetype: str) -> str:
+        """Store a body rendered at ``version``; returns its ETag."""
+        etag = body_etag(body)
+        with self._lock:
+            # A write committed while the body was rendered: it may already be stale
+            if version != self.version:
+                return etag
+            self._entries[key] = (version, time.monotonic() + self.ttl_seconds, body, mimetype, etag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return etag
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "version": self.version,
+            "entries": len(self._entries),
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 3) if lookups else 0,
+            "evictions": self.evictions
+        }
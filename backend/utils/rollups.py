@@ -0,0 +1,113 @@
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from .vendor_index import VendorIndex
+
+# Dashboard rollups.
+#
+# The expense_rollup table keeps running totals so dashboards read a few
+# pre-aggregated rows instead of aggregating the whole expense history.
+# Rows are keyed by (grain, bucket, category):
+#
+#   day       bucket 'YYYY-MM-DD' of the upload, one row per category
+#   month     bucket 'YYYY-MM', one row per category
+#   category  bucket '', one row per category
+#   vendor    bucket is the canonical vendor key, category ''
+#
+# Each row counts expenses and their amount, the flagged subset (expenses
+# with at least one anomaly that has not been rejected) and the lowest
+# expense id, so categories can be listed in order of first appearance.
+# Writers accumulate deltas with add_delta() and upsert them in their own
+# transaction; rebuild_rollups() recomputes the table from history.
+
+GRAINS = ("day", "month", "category", "vendor")
+
+# Reviewers reject false positives; a rejected anomaly no longer flags its expense
+CLEARED_STATUS = "Rejected"
+
+RollupKey = Tuple[str, str, str]
+
+
+def day_bucket(uploaded_at) -> str:
+    return uploaded_at.strftime("%Y-%m-%d") if uploaded_at else ""
+
+
+def rollup_keys(day: str, category: Optional[str], vendor_key: str) -> List[RollupKey]:
+    """Every rollup row an expense uploaded on ``day`` counts towards."""
+    category = category or ""
+    keys = [("day", day, category), ("month", day[:7], category), ("category", "", category)]
+    if vendor_key:
+        keys.append(("vendor", vendor_key, ""))
+    return keys
+
+
+def add_delta(deltas: Dict[RollupKey, dict], keys: List[RollupKey], count: int, amount: float,
+              flagged_count: int, flagged_amount: float, first_expense_id: Optional[int] = None) -> None:
+    """Fold a change into ``deltas`` under each key; rows are ready for an executemany upsert."""
+    for key in keys:
+        row = deltas.get(key)
+        if row is None:
+            row = deltas[key] = {
+                "grain": key[0], "bucket": key[1], "category": key[2], "count": 0, "amount": 0.0,
+                "flagged_count": 0, "flagged_amount": 0.0, "first_expense_id": first_expense_id
+            }
+        row["count"] += count
+        row["amount"] += amount
+        row["flagged_count"] += flagged_count
+        row["flagged_amount"] += flagged_amount
+        if first_expense_id is not None and (row["first_expense_id"] is None or first_expense_id < row["first_expense_id"]):
+            row["first_expense_id"] = first_expense_id
+
+
+def create_rollup_table(conn) -> None:
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS expense_rollup ("
+        " grain VARCHAR(10) NOT NULL,"
+        " bucket VARCHAR(255) NOT NULL,"
+        " category VARCHAR(100) NOT NULL,"
+        " count INTEGER NOT NULL,"
+        " amount FLOAT NOT NULL,"
+        " flagged_count INTEGER NOT NULL,"
+        " flagged_amount FLOAT NOT NULL,"
+        " first_expense_id INTEGER,"
+        " PRIMARY KEY (grain, bucket, category))"
+    ))
+
+
+def rebuild_rollups(conn, resolve: Callable[[str], str] = None) -> int:
+    """Recompute expense_rollup from the expense and anomaly tables; returns the row count.
+
+    ``resolve`` maps a raw vendor string to its canonical key; by default the
+    keys already in the vendor table are matched.
+    """
+    if resolve is None:
+        index = VendorIndex()
+        for (name,) in conn.execute(text("SELECT name FROM vendor")):
+            index.add(name)
+        resolve = index.resolve
+
+    deltas = {}
+    vendor_keys = {}
+    rows = conn.execute(text(
+        "SELECT date(e.uploaded_at), e.category, e.vendor, COUNT(*), SUM(COALESCE(e.amount, 0)),"
+        " COUNT(f.expense_id), SUM(CASE WHEN f.expense_id IS NULL THEN 0 ELSE COALESCE(e.amount, 0) END), MIN(e.id)"
+        " FROM expense e LEFT JOIN ("
+        "  SELECT DISTINCT expense_id FROM anomaly_detection WHERE COALESCE(status, 'Pending') != :cleared"
+        " ) f ON f.expense_id = e.id"
+        " GROUP BY 1, 2, 3"
+    ), {"cleared": CLEARED_STATUS})
+    for day, category, vendor, count, amount, flagged_count, flagged_amount, first_id in rows:
+        if vendor not in vendor_keys:
+            vendor_keys[vendor] = resolve(vendor) if vendor else ""
+        add_delta(deltas, rollup_keys(day or "", category, vendor_keys[vendor]),
+                  count, amount, flagged_count, flagged_amount, first_id)
+
+    conn.execute(text("DELETE FROM expense_rollup"))
+    if deltas:
+        conn.execute(text(
+            "INSERT INTO expense_rollup (grain, bucket, category, count, amount, flagged_count, flagged_amount,"
+            " first_expense_id) VALUES (:grain, :bucket, :category, :count, :amount, :flagged_count,"
+            " :flagged_amount, :first_expense_id)"
+        ), list(deltas.values()))
+    return len(deltas)
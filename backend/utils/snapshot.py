@@ -0,0 +1,118 @@
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:  # snapshots are unavailable without pyarrow
+    pa = None
+    ipc = None
+    pq = None
+
+# Columnar snapshots for offline analytics.
+#
+# Each table is written under <directory>/<table>/ as immutable part files,
+# one per snapshot run, holding the rows with ids above the previous run's
+# high-water mark. Parts are written batch by batch (one Parquet row group
+# or Arrow record batch each), renamed into place when complete and only
+# then recorded in manifest.json, so readers such as
+# pyarrow.dataset.dataset("<directory>/expense") never see a partial file.
+#
+# Appending by id captures new rows only; columns that change after insert
+# (anomaly status) are refreshed by a full snapshot.
+
+SNAPSHOT_FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+MANIFEST = "manifest.json"
+
+# Column type names used by table specs, mapped to Arrow types on use
+_ARROW_TYPES = {
+    "int": lambda: pa.int64(),
+    "float": lambda: pa.float64(),
+    "string": lambda: pa.string(),
+    "timestamp": lambda: pa.timestamp("us"),
+}
+
+
+def available() -> bool:
+    return pa is not None
+
+
+def arrow_schema(fields: Sequence[Tuple[str, str]]):
+    return pa.schema([(name, _ARROW_TYPES[kind]()) for name, kind in fields])
+
+
+def load_manifest(directory: str) -> Dict:
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return {"tables": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(directory: str, manifest: Dict) -> None:
+    path = os.path.join(directory, MANIFEST)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def write_part(directory: str, table: str, fields: Sequence[Tuple[str, str]], batches: Iterable[List[tuple]],
+               snapshot_format: str = "parquet", compression: str = "zstd") -> Dict:
+    """Write row batches (tuples in ``fields`` order, id first) as one part file.
+
+    Returns {"file", "rows", "firstId", "lastId"}, or {"rows": 0} when there
+    were no rows and nothing was written.
+    """
+    schema = arrow_schema(fields)
+    names = [name for name, _ in fields]
+    table_dir = os.path.join(directory, table)
+    os.makedirs(table_dir, exist_ok=True)
+    # Dot-prefixed files are skipped by pyarrow.dataset discovery
+    temp_path = os.path.join(table_dir, f".part-{os.getpid()}-{datetime.utcnow():%Y%m%d%H%M%S%f}.tmp")
+
+    writer = None
+    rows = 0
+    first_id = last_id = None
+    try:
+        for batch in batches:
+            if not batch:
+                continue
+            columns = list(zip(*batch))
+            record_batch = pa.RecordBatch.from_arrays(
+                [pa.array(column, type=schema.field(i).type) for i, column in enumerate(columns)], names=names
+            )
+            if writer is None:
+                if snapshot_format == "parquet":
+                    writer = pq.ParquetWriter(temp_path, schema, compression=compression)
+                else:
+                    writer = ipc.new_file(temp_path, schema, options=ipc.IpcWriteOptions(compression=compression))
+            writer.write_batch(record_batch)
+            rows += len(batch)
+            first_id = batch[0][0] if first_id is None else first_id
+            last_id = batch[-1][0]
+    except BaseException:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    if writer is None:
+        return {"rows": 0}
+    writer.close()
+    filename = f"part-{first_id:012d}-{last_id:012d}{SNAPSHOT_FORMATS[snapshot_format]}"
+    os.replace(temp_path, os.path.join(table_dir, filename))
+    return {"file": os.path.join(table, filename), "rows": rows, "firstId": first_id, "lastId": last_id}
+
+
+def remove_parts(directory: str, table: str, keep: str = None) -> None:
+    """Remove a table's part files except ``keep``, after a full snapshot replaced them."""
+    table_dir = os.path.join(directory, table)
+    if not os.path.isdir(table_dir):
+        return
+    for name in os.listdir(table_dir):
+        if name.startswith("part-") and os.path.join(table, name) != keep:
+            os.remove(os.path.join(table_dir, name))
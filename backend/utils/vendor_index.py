@@ -0,0 +1,171 @@
+import math
+import threading
+from array import array
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .fingerprint import normalize_vendor
+
+# Fuzzy vendor canonicalization.
+#
+# OCR turns one merchant into many strings ("STARBUCKS #1234", "Starbucks
+# Coffee", "STARBUCKS C0FFEE"). canonical_key() removes the deterministic
+# noise (case, punctuation, store numbers, digit-for-letter misreads, legal
+# suffixes); VendorIndex then maps what is left onto the closest known
+# vendor by trigram Dice similarity. A name wholly contained in the other
+# ("Starbucks" in "Starbucks Coffee") also matches, at a discount, when the
+# shorter one is long enough to be distinctive.
+#
+# Similarity is Dice over trigrams weighted by inverse document frequency, so
+# generic words ("coffee", "market", "foods") count for little and the
+# distinctive part of the name decides the match. Lookups use an inverted
+# index from trigram to vendor ids with weighted prefix filtering: a vendor
+# can only reach the threshold if it shares enough of the query's weight, so
+# only the postings of the query's heaviest (rarest) trigrams are read. Their
+# weights are summed per vendor with numpy, and the best MAX_CANDIDATES are
+# scored exactly.
+
+DEFAULT_THRESHOLD = 0.7
+MAX_CANDIDATES = 32
+MIN_CONTAINED_GRAMS = 8
+CONTAINMENT_DISCOUNT = 0.85
+
+_OCR_DIGITS = str.maketrans("0158", "olsb")
+_OCR_FOLDS = (("rn", "m"), ("vv", "w"), ("i", "l"), ("c", "e"))
+_SUFFIXES = {
+    "inc", "llc", "ltd", "co", "corp", "company", "limited", "plc", "gmbh",
+    "sdn", "bhd", "pte", "pty", "store", "shop", "no",
+}
+
+
+def canonical_key(vendor: Optional[str]) -> str:
+    """Normalized vendor name with store numbers, OCR digit misreads and legal suffixes removed."""
+    tokens = []
+    for token in normalize_vendor(vendor).split():
+        if token.isdigit():
+            continue
+        if not token.isalpha():
+            token = token.translate(_OCR_DIGITS)
+        tokens.append(token)
+    while len(tokens) > 1 and tokens[-1] in _SUFFIXES:
+        tokens.pop()
+    return " ".join(tokens) or normalize_vendor(vendor)
+
+
+def _fold(key: str) -> str:
+    """Collapse characters OCR commonly confuses, for matching only."""
+    for confusable, replacement in _OCR_FOLDS:
+        key = key.replace(confusable, replacement)
+    return key
+
+
+def trigrams(key: str) -> frozenset:
+    padded = f"  {_fold(key)} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class VendorIndex:
+    """In-memory trigram index mapping noisy vendor strings to known canonical keys."""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self._keys: List[str] = []
+        self._grams: List[frozenset] = []
+        self._ids: Dict[str, int] = {}
+        self._postings: Dict[str, array] = defaultdict(lambda: array("I"))
+        # IDF weights depend on the whole index, so they are cached until the next add
+        self._weights: Dict[str, float] = {}
+        self._totals: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._ids
+
+    def add(self, key: str) -> None:
+        """Index a canonical key; adding a known key is a no-op."""
+        if not key:
+            return
+        with self._lock:
+            if key in self._ids:
+                return
+            vendor_id = len(self._keys)
+            grams = trigrams(key)
+            self._keys.append(key)
+            self._grams.append(grams)
+            self._ids[key] = vendor_id
+            for gram in grams:
+                self._postings[gram].append(vendor_id)
+            self._weights.clear()
+            self._totals.clear()
+
+    def _weight(self, gram: str) -> float:
+        weight = self._weights.get(gram)
+        if weight is None:
+            weight = math.log((len(self._keys) + 1) / (len(self._postings.get(gram, ())) + 1)) + 1.0
+            self._weights[gram] = weight
+        return weight
+
+    def _total_weight(self, vendor_id: int) -> float:
+        total = self._totals.get(vendor_id)
+        if total is None:
+            total = self._totals[vendor_id] = sum(self._weight(gram) for gram in self._grams[vendor_id])
+        return total
+
+    def match(self, vendor: str) -> Optional[Tuple[str, float]]:
+        """Closest known key to a raw vendor string as (key, score), or None below the threshold."""
+        key = canonical_key(vendor)
+        if not key:
+            return None
+        if key in self._ids:
+            return key, 1.0
+
+        with self._lock:
+            weights = {gram: self._weight(gram) for gram in trigrams(key)}
+            query_weight = sum(weights.values())
+            # score = 2 * shared / (query + other) >= t with shared <= other
+            # means shared >= t * query / (2 - t); a candidate must share one
+            # of the heaviest grams before the remaining ones fall below that
+            min_shared = self.threshold * query_weight / (2 - self.threshold)
+            indexed = sorted((gram for gram in weights if self._postings.get(gram)), key=lambda gram: -weights[gram])
+            prefix, prefix_weights = [], []
+            remaining = sum(weights[gram] for gram in indexed)
+            for gram in indexed:
+                # Keep a few grams past the Dice bound so contained names are still found
+                if remaining < min_shared and len(prefix) >= MIN_CONTAINED_GRAMS:
+                    break
+                remaining -= weights[gram]
+                prefix.append(np.frombuffer(self._postings[gram], dtype=np.uint32))
+                prefix_weights.append(weights[gram])
+            if not prefix:
+                return None
+
+            candidates, positions = np.unique(np.concatenate(prefix), return_inverse=True)
+            hits = np.bincount(positions, weights=np.repeat(prefix_weights, [len(p) for p in prefix]))
+            del prefix
+            if len(candidates) > MAX_CANDIDATES:
+                candidates = candidates[np.argpartition(hits, -MAX_CANDIDATES)[-MAX_CANDIDATES:]]
+
+            best, best_score = None, 0.0
+            for vendor_id in candidates.tolist():
+                grams = self._grams[vendor_id]
+                shared = sum(weights[gram] for gram in grams & weights.keys())
+                other_weight = self._total_weight(vendor_id)
+                score = 2 * shared / (query_weight + other_weight)
+                # "Starbucks" vs "Starbucks Coffee": one name contained in the other
+                if min(len(grams), len(weights)) >= MIN_CONTAINED_GRAMS:
+                    score = max(score, shared / min(query_weight, other_weight) * CONTAINMENT_DISCOUNT)
+                if score > best_score:
+                    best, best_score = vendor_id, score
+            if best is None or best_score < self.threshold:
+                return None
+            return self._keys[best], best_score
+
+    def resolve(self, vendor: str) -> str:
+        """Known key for the vendor, or its own canonical key when nothing is close enough."""
+        matched = self.match(vendor)
+        return matched[0] if matched else canonical_key(vendor)
@@ -0,0 +1,140 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from .batching import MicroBatcher
+from .model_registry import registry as default_registry
+
+# Vendor extraction with NER.
+#
+# The business name is almost always in the first lines of a receipt, and
+# token classification cost grows with input length, so NER only sees a
+# short header window instead of the first 512 characters. Concurrent
+# uploads share one pipeline call through a MicroBatcher, and results are
+# cached by a hash of the header: receipts from the same store repeat the
+# same name/registration/address block, so they skip the model entirely.
+
+NER_HEADER_LINES = int(os.environ.get("NER_HEADER_LINES", "4"))
+NER_HEADER_CHARS = int(os.environ.get("NER_HEADER_CHARS", "160"))
+NER_CACHE_SIZE = int(os.environ.get("NER_CACHE_SIZE", "4096"))
+NER_BATCH_SIZE = int(os.environ.get("NER_BATCH_SIZE", "16"))
+
+_MISSING = object()
+
+
+def header_window(text: str) -> str:
+    """First NER_HEADER_LINES non-trivial lines, capped at NER_HEADER_CHARS."""
+    lines = []
+    for line in (text or "").split("\n"):
+        line = line.strip()
+        if len(line) > 2:
+            lines.append(line)
+            if len(lines) == NER_HEADER_LINES:
+                break
+    return "\n".join(lines)[:NER_HEADER_CHARS]
+
+
+def header_key(header: str) -> str:
+    return hashlib.blake2b(header.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def organization(entities) -> Optional[str]:
+    """First ORG entity longer than two characters."""
+    for entity in entities:
+        if entity["entity_group"] == "ORG":
+            name = entity["word"].strip()
+            if len(name) > 2:
+                return name
+    return None
+
+
+class VendorNER:
+    """Header-window NER with cross-request batching and an LRU result cache."""
+
+    def __init__(self, model_name: str = "ner", registry=default_registry, cache_size: int = NER_CACHE_SIZE,
+                 max_batch_size: int = 8, max_wait_ms: float = 5.0):
+        self.model_name = model_name
+        self.registry = registry
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.batcher = MicroBatcher(self._run, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms,
+                                    name="ner-batcher")
+
+    def _cached(self, key: str):
+        with self._lock:
+            vendor = self._cache.get(key, _MISSING)
+            if vendor is _MISSING:
+                self.misses += 1
+            else:
+                self._cache.move_to_end(key)
+                self.hits += 1
+            return vendor
+
+    def _store(self, key: str, vendor: Optional[str]) -> None:
+        with self._lock:
+            self._cache[key] = vendor
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _run(self, headers: List[str]) -> List[Optional[str]]:
+        """One pipeline call for a batch of headers; identical headers are tagged once."""
+        ner_pipeline = self.registry.get(self.model_name)
+        if ner_pipeline is None:
+            return [None] * len(headers)
+        unique = list(dict.fromkeys(headers))
+        outputs = ner_pipeline(unique, batch_size=NER_BATCH_SIZE)
+        vendors = {header: organization(entities) for header, entities in zip(unique, outputs)}
+        return [vendors[header] for header in headers]
+
+    def __call__(self, text: str) -> Optional[str]:
+        """ORG name from the receipt header, or None when NER finds none or is unavailable."""
+        header = header_window(text)
+        if not header:
+            return None
+        key = header_key(header)
+        vendor = self._cached(key)
+        if vendor is not _MISSING:
+            return vendor
+        if self.registry.get(self.model_name) is None:
+            # No model: skip the batching window entirely
+            return None
+        try:
+            vendor = self.batcher(header)
+        except Exception:
+            return None
+        self._store(key, vendor)
+        return vendor
+
+    def prefetch(self, texts: List[str]) -> None:
+        """Tag the headers of many receipts in one call and cache the results."""
+        pending = {}
+        for text in texts:
+            header = header_window(text)
+            if header:
+                key = header_key(header)
+                if key not in pending and self._cached(key) is _MISSING:
+                    pending[key] = header
+        if not pending:
+            return
+        try:
+            vendors = self._run(list(pending.values()))
+        except Exception:
+            return
+        for key, vendor in zip(pending, vendors):
+            self._store(key, vendor)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "cacheEntries": len(self._cache),
+            "cacheHits": self.hits,
+            "cacheMisses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0,
+            **self.batcher.stats()
+        }
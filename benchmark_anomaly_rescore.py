@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""Benchmark rescoring the full expense history: vectorized vs. per-expense rules.
+
+Fills a temporary SQLite file with synthetic expenses (a few repeated
+purchases and new vendors among them, no anomalies yet), then times
+`rescore_anomalies` twice: the first run inserts every finding, the second
+finds nothing to change. "per-expense" times score_anomalies for a sample
+of expenses, as the old scripts called the rules one expense at a time,
+and extrapolates to the full history. Per-feature and per-rule times are
+printed for both. Usage:
+
+    python benchmark_anomaly_rescore.py [--size 1000000] [--sample 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "rescore.db")
+os.environ["DATABASE_URL"] = "sqlite:///" + DB_PATH
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from app import anomaly_rules, app, db, migrate_database, rebuild_category_stats, rebuild_dashboard_rollups, rescore_anomalies, \
+    score_anomalies, Expense
+
+CATEGORIES = ["Food", "Travel", "Office Supplies", "Pharmacy", "Entertainment", "Telecommunications"]
+
+
+def seed(size, rng):
+    with app.app_context():
+        db.create_all()
+        migrate_database()
+        start = datetime(2022, 1, 1)
+        for offset in range(0, size, 100000):
+            rows = []
+            for i in range(offset, min(offset + 100000, size)):
+                if i % 500 == 499:
+                    rows.append(dict(rows[-1], filename=f"r{i}.jpg"))  # uploaded twice
+                    continue
+                rows.append({
+                    "filename": f"r{i}.jpg", "category": rng.choice(CATEGORIES),
+                    "vendor": f"Vendor {chr(65 + rng.randrange(26))}{chr(65 + rng.randrange(26))}",
+                    "amount": round(rng.lognormvariate(3.5, 0.6), 2),
+                    "uploaded_at": start + timedelta(seconds=30 * i), "status": "Processed"
+                })
+            db.session.execute(db.insert(Expense), rows)
+            db.session.commit()
+        rebuild_category_stats()
+        rebuild_dashboard_rollups()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1000000)
+    parser.add_argument("--sample", type=int, default=2000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    seed(args.size, random.Random(7))
+    print(f"Seeded {args.size} expenses in {time.perf_counter() - started:.1f}s")
+
+    with app.app_context():
+        for label in ("first run", "second run"):
+            summary = rescore_anomalies()
+            print(f"{label:>12}: {summary['seconds']:6.2f}s  flagged {summary['flagged']}, "
+                  f"inserted {summary['inserted']}, updated {summary['updated']}, removed {summary['removed']}")
+            print(" " * 14 + ", ".join(f"{name} {ms:.0f}ms" for name, ms in summary["timings"].items()))
+
+        expenses = Expense.query.order_by(Expense.id).limit(args.sample).all()
+        started = time.perf_counter()
+        for expense in expenses:
+            score_anomalies(expense.id, expense.amount, expense.vendor, expense.category, expense.uploaded_at)
+        elapsed = time.perf_counter() - started
+        print(f"per-expense: {elapsed / len(expenses) * 1e3:6.2f}ms each, "
+              f"~{elapsed / len(expenses) * args.size:.0f}s for {args.size} (scoring only, no writes)")
+        timings = anomaly_rules.stats()
+        print(" " * 14 + ", ".join(f"{name} {entry['avgMs']:.3f}ms"
+                                   for kind in ("features", "rules") for name, entry in timings[kind].items()))
+    os.remove(DB_PATH)
+
+
+if __name__ == "__main__":
+    main()
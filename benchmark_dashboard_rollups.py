@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""Benchmark dashboard read latency against history size: rollups vs. full aggregation.
+
+For each history size the expense and anomaly tables are filled with
+synthetic rows spread over two years, the rollups are rebuilt and every
+dashboard endpoint is timed. "scan" times the aggregate queries the
+endpoints issued before the rollup table (totals, per-category,
+per-month x category and flagged counts over the expense table) for
+comparison. Runs against a temporary SQLite file. Usage:
+
+    python benchmark_dashboard_rollups.py [--sizes 1000,10000,100000] [--repeat 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "rollups.db")
+os.environ["DATABASE_URL"] = "sqlite:///" + DB_PATH
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from app import app, db, migrate_database, rebuild_dashboard_rollups, AnomalyDetection, Expense
+
+ENDPOINTS = ["/expenses/stats", "/expenses/trends", "/api/admin/reports", "/api/auditor/reports",
+             "/api/auditor/reports?dateRange=Last%203%20Months&category=Food", "/dashboard/auditor-overview"]
+CATEGORIES = ["Food", "Travel", "Office Supplies", "Pharmacy", "Entertainment", "Telecommunications"]
+
+
+def seed(size, rng):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        migrate_database()
+        start = datetime.utcnow() - timedelta(days=730)
+        db.session.execute(db.insert(Expense), [{
+            "filename": f"r{i}.jpg", "category": rng.choice(CATEGORIES), "vendor": f"Vendor {rng.randrange(200)}",
+            "amount": round(rng.uniform(2, 500), 2), "uploaded_at": start + timedelta(minutes=rng.randrange(730 * 1440)),
+            "status": "Processed"
+        } for i in range(size)])
+        db.session.execute(db.insert(AnomalyDetection), [{
+            "expense_id": expense_id, "anomaly_type": "Unusual Amount", "severity": "High", "confidence": 80,
+            "detected_at": datetime.utcnow(), "status": "Pending"
+        } for expense_id in rng.sample(range(1, size + 1), size // 20)])
+        db.session.commit()
+        rebuild_dashboard_rollups()
+
+
+def scan_aggregates():
+    """The expense-table aggregates a dashboard needed before rollups."""
+    month = db.func.strftime(db.literal_column("'%Y-%m'"), Expense.uploaded_at)
+    flagged = db.session.query(AnomalyDetection.expense_id).distinct()
+    db.session.query(db.func.count(Expense.id), db.func.sum(Expense.amount)).one()
+    db.session.query(Expense.category, db.func.count(Expense.id), db.func.sum(Expense.amount)).group_by(
+        Expense.category).order_by(db.func.min(Expense.id)).all()
+    db.session.query(month, Expense.category, db.func.sum(Expense.amount)).group_by(month, Expense.category).all()
+    db.session.query(db.func.sum(Expense.amount)).filter(Expense.id.in_(flagged)).one()
+
+
+def timed(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+    rng = random.Random(7)
+
+    results = {}
+    for size in sizes:
+        seed(size, rng)
+        with app.test_client() as client:
+            for endpoint in ENDPOINTS:
+                results[endpoint, size] = timed(lambda: client.get(endpoint), args.repeat)
+        with app.app_context():
+            results["scan", size] = timed(scan_aggregates, max(1, args.repeat // 4))
+
+    print(f"median latency in ms{'':42}" + "".join(f"{size:>12,}" for size in sizes))
+    for endpoint in ENDPOINTS + ["scan"]:
+        label = "scan (pre-rollup aggregates)" if endpoint == "scan" else endpoint
+        print(f"{label:62}" + "".join(f"{results[endpoint, size]:12.2f}" for size in sizes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+"""Benchmark dashboard reads against concurrent uploads per SQLite profile.
+
+Reader threads poll the dashboard endpoints while writer threads push
+receipts through the /ocr ingest pipeline. OCR and the models are replaced
+with fixed results so only database contention is measured. Each profile
+runs in a fresh subprocess against its own copy of the sample database.
+Usage:
+
+    python benchmark_db_concurrency.py [--seconds 10] [--readers 4] [--writers 2]
+"""
+import argparse
+import io
+import json
+import os
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+SAMPLE_DB = os.path.join(BACKEND, 'instance', 'expenses.db')
+READ_ENDPOINTS = ["/expenses/stats", "/api/admin/reports", "/api/auditor/reports", "/dashboard/auditor-overview"]
+PROFILES = ("default", "wal")
+
+
+def copy_sample_db(path):
+    """Copy the sample database through SQLite, so pages still in its WAL come along."""
+    source = sqlite3.connect(f"file:{SAMPLE_DB}?mode=ro", uri=True)
+    target = sqlite3.connect(path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def measure(args):
+    """Run the mixed workload in this process; the DB profile comes from DB_PROFILE."""
+    sys.path.insert(0, BACKEND)
+    os.chdir(BACKEND)
+    import app as backend
+
+    backend.extract_text_from_image = lambda path: "ACME STORE\nTOTAL $42.50"
+    backend.classification_batcher = lambda text: ("Food", 0.9)
+    backend.extract_entities = lambda text: {"vendor": "ACME STORE", "total": 42.5, "date": None}
+    with backend.app.app_context():
+        backend.db.create_all()
+        backend.migrate_database()
+        backend.rebuild_category_stats()
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    results = {"read": [], "write": [], "errors": 0}
+
+    def record(kind, seconds, ok):
+        with lock:
+            if ok:
+                results[kind].append(seconds)
+            else:
+                results["errors"] += 1
+
+    def reader(index):
+        client = backend.app.test_client()
+        i = index
+        while not stop.is_set():
+            started = time.perf_counter()
+            response = client.get(READ_ENDPOINTS[i % len(READ_ENDPOINTS)])
+            record("read", time.perf_counter() - started, response.status_code == 200)
+            i += 1
+
+    def writer(index):
+        client = backend.app.test_client()
+        i = 0
+        while not stop.is_set():
+            # Unique bytes so every upload misses the OCR cache
+            data = {"file": (io.BytesIO(f"receipt-{index}-{i}".encode()), f"bench_{index}_{i}.jpg")}
+            started = time.perf_counter()
+            response = client.post("/ocr", data=data, content_type="multipart/form-data")
+            record("write", time.perf_counter() - started, response.status_code == 200)
+            i += 1
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    summary = {"errors": results["errors"]}
+    for kind in ("read", "write"):
+        latencies = results[kind]
+        summary[kind] = {
+            "perSecond": round(len(latencies) / args.seconds, 1),
+            "p50Ms": round(statistics.median(latencies) * 1000, 1) if latencies else None,
+            "p95Ms": round(percentile(latencies, 95) * 1000, 1) if latencies else None,
+        }
+    return summary
+
+
+def run_profile(profile, args):
+    workdir = tempfile.mkdtemp(prefix=f"bench_{profile}_")
+    try:
+        copy_sample_db(os.path.join(workdir, "expenses.db"))
+        env = dict(os.environ,
+                   DB_PROFILE=profile,
+                   DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'expenses.db')}",
+                   OCR_CACHE_PATH=os.path.join(workdir, "ocr_cache.db"),
+                   JOB_QUEUE_PATH=os.path.join(workdir, "jobs.db"))
+        command = [sys.executable, os.path.abspath(__file__), "--worker",
+                   "--seconds", str(args.seconds), "--readers", str(args.readers), "--writers", str(args.writers)]
+        output = subprocess.check_output(command, env=env)
+        return json.loads(output.decode().strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure(args)))
+        return
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:g}s per profile\n")
+    print(f"{'profile':<9} {'reads/s':>8} {'read p50':>9} {'read p95':>9} {'uploads/s':>10} {'up p50':>8} {'up p95':>8} {'errors':>7}")
+    for profile in PROFILES:
+        r = run_profile(profile, args)
+        read, write = r["read"], r["write"]
+        print(f"{profile:<9} {read['perSecond']:>8} {read['p50Ms'] or 0:>7}ms {read['p95Ms'] or 0:>7}ms "
+              f"{write['perSecond']:>10} {write['p50Ms'] or 0:>6}ms {write['p95Ms'] or 0:>6}ms {r['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
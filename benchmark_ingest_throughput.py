@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+"""Benchmark /ocr ingest throughput: single transaction vs. per-step commits.
+
+"single" is the current process_receipt (one commit per receipt). "legacy"
+replays the previous write pattern: commit the expense, commit its activity
+row, commit the anomalies, then commit their activity rows. OCR and the
+models are replaced with fixed results and the OCR cache is bypassed so
+only the expense database work is timed.
+Each run uses a fresh subprocess and its own copy of the sample database.
+Usage:
+
+    python benchmark_ingest_throughput.py [--receipts 300] [--profile default|wal]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend')
+SAMPLE_DB = os.path.join(BACKEND, 'instance', 'expenses.db')
+MODES = ("legacy", "single")
+VENDORS = ["Starbucks", "Uber", "Office Depot", "Delta", "Hilton", "Staples"]
+
+
+def copy_sample_db(path):
+    """Copy the sample database through SQLite, so pages still in its WAL come along."""
+    source = sqlite3.connect(f"file:{SAMPLE_DB}?mode=ro", uri=True)
+    target = sqlite3.connect(path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+def legacy_receipt(backend, data, filename, user, ip_address):
+    """The pre-single-transaction write path, kept here for comparison."""
+    db = backend.db
+    text = backend.extract_text_from_image(filename)
+    category, score = backend.classification_batcher(text)
+    entities = backend.extract_entities(text)
+
+    category_stats = backend.update_category_stats(category, entities["total"])
+    expense = backend.Expense(filename=filename, category=category, vendor=entities["vendor"],
+                              amount=entities["total"], text_preview=text[:200], status="Processed")
+    db.session.add(expense)
+    db.session.commit()
+
+    db.session.add(backend.ActivityLog(user=user, action="Uploaded Receipt", action_type="uploaded",
+                                       details=f"{entities['vendor']} - ${entities['total']}",
+                                       expense_id=expense.id, ip_address=ip_address))
+    db.session.commit()
+
+    anomalies = backend.score_anomalies(expense.id, entities["total"], entities["vendor"], category,
+                                        expense.uploaded_at, category_stats=category_stats)
+    if anomalies:
+        db.session.add_all(anomalies)
+        db.session.commit()
+        for anomaly in anomalies:
+            db.session.add(backend.ActivityLog(user="System", action="Anomaly Detected", action_type="flagged",
+                                               details=f"{anomaly.anomaly_type}: {anomaly.description}",
+                                               expense_id=expense.id, ip_address="system"))
+        db.session.commit()
+
+
+def measure(args):
+    sys.path.insert(0, BACKEND)
+    os.chdir(BACKEND)
+    import app as backend
+    from sqlalchemy import event
+
+    rng = random.Random(7)
+    receipts = []
+    for i in range(args.receipts):
+        # Mostly ordinary amounts with an occasional outlier to trigger anomalies
+        amount = round(rng.uniform(5, 80) if rng.random() > 0.1 else rng.uniform(500, 2000), 2)
+        receipts.append((f"bench-{i}".encode(), f"{rng.choice(VENDORS)}\nTOTAL ${amount}", amount))
+
+    current = {}
+    backend.extract_text_from_image = lambda path: current["text"]
+    backend.classification_batcher = lambda text: ("Food", 0.9)
+    backend.extract_entities = lambda text: {"vendor": text.splitlines()[0], "total": current["amount"], "date": None}
+    backend.ocr_cache.get = lambda digest: None
+    backend.ocr_cache.put = lambda digest, payload: None
+
+    with backend.app.app_context():
+        backend.db.create_all()
+        backend.migrate_database()
+        backend.rebuild_category_stats()
+
+        commits = []
+        event.listen(backend.db.engine, "commit", lambda conn: commits.append(1))
+        started = time.perf_counter()
+        for data, text, amount in receipts:
+            current.update(text=text, amount=amount)
+            if args.mode == "legacy":
+                legacy_receipt(backend, data, "bench.jpg", "Benchmark", "127.0.0.1")
+            else:
+                backend.process_receipt(data, "bench.jpg", "Benchmark", "127.0.0.1", filepath="bench.jpg")
+        elapsed = time.perf_counter() - started
+        anomalies = backend.AnomalyDetection.query.count()
+
+    return {
+        "receiptsPerSecond": round(len(receipts) / elapsed, 1),
+        "msPerReceipt": round(elapsed / len(receipts) * 1000, 2),
+        "commitsPerReceipt": round(len(commits) / len(receipts), 2),
+        "anomalies": anomalies
+    }
+
+
+def run_mode(mode, args):
+    workdir = tempfile.mkdtemp(prefix=f"ingest_{mode}_")
+    try:
+        copy_sample_db(os.path.join(workdir, "expenses.db"))
+        env = dict(os.environ,
+                   DB_PROFILE=args.profile,
+                   DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'expenses.db')}",
+                   OCR_CACHE_PATH=os.path.join(workdir, "ocr_cache.db"),
+                   JOB_QUEUE_PATH=os.path.join(workdir, "jobs.db"))
+        command = [sys.executable, os.path.abspath(__file__), "--worker", "--mode", mode,
+                   "--receipts", str(args.receipts), "--profile", args.profile]
+        output = subprocess.check_output(command, env=env)
+        return json.loads(output.decode().strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--receipts", type=int, default=300)
+    parser.add_argument("--profile", default=os.environ.get("DB_PROFILE", "wal"))
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure(args)))
+        return
+
+    print(f"{args.receipts} receipts, DB_PROFILE={args.profile}\n")
+    print(f"{'mode':<8} {'receipts/s':>11} {'ms/receipt':>11} {'commits/receipt':>16} {'anomalies':>10}")
+    for mode in MODES:
+        r = run_mode(mode, args)
+        print(f"{mode:<8} {r['receiptsPerSecond']:>11} {r['msPerReceipt']:>11} {r['commitsPerReceipt']:>16} {r['anomalies']:>10}")
+
+
+if __name__ == "__main__":
+    main()
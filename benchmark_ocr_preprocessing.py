@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""Benchmark OCR latency and memory with and without image preprocessing.
+
+Each measurement runs in a fresh subprocess so peak RSS reflects a single
+image. Usage:
+
+    python benchmark_ocr_preprocessing.py [image ...]
+
+Defaults to the sample receipts in backend/uploads/logos/. Set
+TESSERACT_CMD if tesseract is not at the path configured in utils/ocr.py;
+without Tesseract only the image-loading stage is measured.
+"""
+import glob
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), 'backend', 'uploads', 'logos')
+
+
+def measure(mode, path):
+    """Run one OCR pass in this process and return timing and memory figures."""
+    import pytesseract
+    from utils.ocr import load_image
+    from utils.preprocess import PreprocessConfig
+
+    if os.environ.get("TESSERACT_CMD"):
+        pytesseract.pytesseract.tesseract_cmd = os.environ["TESSERACT_CMD"]
+    has_tesseract = shutil.which(pytesseract.pytesseract.tesseract_cmd) is not None
+
+    config = PreprocessConfig.from_env()
+    config.enabled = mode == "preprocessed"
+
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    image = load_image(path, config)
+    load_seconds = time.perf_counter() - started
+
+    ocr_seconds = None
+    characters = None
+    if has_tesseract:
+        started = time.perf_counter()
+        characters = len(pytesseract.image_to_string(image).strip())
+        ocr_seconds = time.perf_counter() - started
+
+    children_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return {
+        "size": list(image.size),
+        "loadSeconds": round(load_seconds, 4),
+        "ocrSeconds": round(ocr_seconds, 4) if ocr_seconds is not None else None,
+        "characters": characters,
+        "peakRssMb": round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_rss) / 1024, 1),
+        "tesseractRssMb": round(children_rss / 1024, 1) if has_tesseract else None
+    }
+
+
+def run_isolated(mode, path):
+    output = subprocess.check_output([sys.executable, __file__, "--worker", mode, path])
+    return json.loads(output)
+
+
+def main(paths):
+    print(f"{'image':<40} {'mode':<13} {'pixels':>11} {'load s':>8} {'ocr s':>8} {'py MB':>7} {'tess MB':>8}")
+    totals = {}
+    for path in paths:
+        for mode in ("original", "preprocessed"):
+            r = run_isolated(mode, path)
+            name = os.path.basename(path)[-40:]
+            pixels = r["size"][0] * r["size"][1]
+            ocr = f"{r['ocrSeconds']:.3f}" if r["ocrSeconds"] is not None else "n/a"
+            tess = f"{r['tesseractRssMb']:.1f}" if r["tesseractRssMb"] is not None else "n/a"
+            print(f"{name:<40} {mode:<13} {pixels:>11,} {r['loadSeconds']:>8.3f} {ocr:>8} {r['peakRssMb']:>7.1f} {tess:>8}")
+            total = totals.setdefault(mode, {"seconds": 0.0, "pixels": 0})
+            total["seconds"] += r["loadSeconds"] + (r["ocrSeconds"] or 0)
+            total["pixels"] += pixels
+    print()
+    for mode, total in totals.items():
+        print(f"{mode:<13} total {total['seconds']:.3f}s, {total['pixels']:,} pixels sent to Tesseract")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--worker":
+        print(json.dumps(measure(sys.argv[2], sys.argv[3])))
+    else:
+        main(sys.argv[1:] or sorted(glob.glob(os.path.join(SAMPLE_DIR, "*.jpg"))))
@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+"""Benchmark receipt field extraction: throughput and accuracy on a labelled corpus.
+
+Generates synthetic receipt texts with known total, subtotal, tax, date and
+currency in the layouts the app sees: Malaysian GST tax invoices, US store
+receipts, European VAT receipts, large totals with thousands separators and
+OCR output where a label and its value land on separate lines. The previous
+regex cascade (kept below as legacy_extract_amount, which only extracted the
+total) is compared against utils.receipt_parser.parse_receipt. Usage:
+
+    python benchmark_receipt_parser.py [--receipts 2000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from utils.receipt_parser import DAY_FIRST, parse_receipt
+
+FIELDS = ("total", "subtotal", "tax", "date", "currency")
+ITEMS = ["Caffe Latte", "Nasi Lemak", "A4 Paper Ream", "Printer Ink", "Chicken Rice", "Mineral Water",
+         "USB Cable", "Sandwich", "Taxi Fare", "Room Charge", "Stapler", "Notebook", "Teh Tarik"]
+VENDORS = ["UNIHAKKA INTERNATIONAL SDN BHD", "GRANDMA HOMES RESTAURANT", "F&P PHARMACY", "STARBUCKS COFFEE",
+           "Office Depot #552", "LIGHTROOM GALLERY SDN BHD", "Hotel XYZ", "Cafe Central GmbH"]
+
+
+def legacy_extract_amount(text: str) -> float:
+    """The previous app.extract_amount, kept here for comparison."""
+    text_upper = text.upper()
+    total_patterns = [
+        r'TOTAL[:\s]\$?(\d+(?:,\d{3})(?:\.\d{2})?)',
+        r'AMOUNT DUE[:\s]\$?(\d+(?:,\d{3})(?:\.\d{2})?)',
+        r'GRAND TOTAL[:\s]\$?(\d+(?:,\d{3})(?:\.\d{2})?)',
+        r'FINAL TOTAL[:\s]\$?(\d+(?:,\d{3})(?:\.\d{2})?)',
+        r'BALANCE DUE[:\s]\$?(\d+(?:,\d{3})(?:\.\d{2})?)'
+    ]
+    for pattern in total_patterns:
+        matches = re.findall(pattern, text_upper)
+        if matches:
+            try:
+                return float(matches[0].replace(',', ''))
+            except ValueError:
+                continue
+
+    all_amounts = re.findall(r'\$?(\d+(?:,\d{3})*(?:\.\d{1,2})?)', text)
+    valid_amounts = []
+    for amt_str in all_amounts:
+        try:
+            amt = float(amt_str.replace(',', ''))
+            if 0.01 <= amt <= 10000.0:
+                valid_amounts.append(amt)
+        except ValueError:
+            continue
+    if valid_amounts:
+        return max(valid_amounts)
+
+    amounts = re.findall(r"\$?\s*(\d+\.?\d*)", text)
+    if amounts:
+        try:
+            return float(amounts[0].replace(',', '').strip())
+        except ValueError:
+            pass
+    return 0.0
+
+
+def legacy_extract_vendor(text: str) -> str:
+    """The previous app.extract_vendor header heuristics (without NER)."""
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    lines = [line for line in lines if len(line) > 2]
+    if not lines:
+        return ""
+    skip_words = ['RECEIPT', 'INVOICE', 'CASH', 'CHANGE', 'TOTAL', 'SUBTOTAL', 'TAX', 'DATE', 'TIME',
+                  'THANK YOU', 'CUSTOMER', 'SALESPERSON']
+    for line in lines[:10]:
+        if any(skip_word in line.upper() for skip_word in skip_words):
+            continue
+        if (line.isupper() or line.istitle() or any(char.isupper() for char in line)) and 3 < len(line) < 50:
+            cleaned = re.sub(r'[^\w\s&\-\.]', '', line).strip()
+            if cleaned and len(cleaned) > 2:
+                return cleaned
+    return lines[0]
+
+
+def legacy_extract_entities(text: str) -> dict:
+    return {"vendor": legacy_extract_vendor(text), "date": "", "total": legacy_extract_amount(text)}
+
+
+def money(value, sep=",", point="."):
+    whole, cents = f"{value:,.2f}".split(".")
+    return whole.replace(",", sep) + point + cents
+
+
+def line_items(rng, low, high):
+    items = [(rng.choice(ITEMS), round(rng.uniform(low, high), 2)) for _ in range(rng.randint(1, 5))]
+    return items, round(sum(price for _, price in items), 2)
+
+
+def malaysian_gst(rng, day):
+    items, subtotal = line_items(rng, 1, 40)
+    tax = round(subtotal * 0.06, 2)
+    total = round(subtotal + tax, 2)
+    cash = float(int(total) + rng.choice((1, 5, 10, 50)))
+    when = day.strftime("%d/%m/%Y") if rng.random() < 0.5 else day.strftime("%d %b %Y")
+    lines = [rng.choice(VENDORS[:3] + VENDORS[5:6]), "(867388-U)", "12, Jalan Tampoi 7/4,Kawasan Perindustrian",
+             "Tel:03-3362 4395 Fax:03-3362 4395", "GST No. : 000584089600", "TAX INVOICE",
+             f"Invoice # : OR{rng.randint(10**8, 10**9)} Date: {when} {rng.randint(8, 21)}:{rng.randint(10, 59)}",
+             "Item Qty Total"]
+    lines += [f"{name} {rng.randint(1, 3)} {price:.2f} SR" for name, price in items]
+    lines += [f"Total Excluding GST: {subtotal:.2f}", f"GST @6%: {tax:.2f}", f"Total Inclusive GST: {total:.2f}",
+              "Rounding: 0.00", f"Total (RM): {total:.2f}", f"Cash: {cash:.2f}", f"Change: {cash - total:.2f}",
+              "GST Summary Amount(RM) Tax(RM)", f"SR @ 6% {subtotal:.2f} {tax:.2f}", "Thank you. Please come again."]
+    return lines, {"total": total, "subtotal": subtotal, "tax": tax, "date": day, "currency": "MYR"}
+
+
+def us_store(rng, day):
+    items, subtotal = line_items(rng, 2, 60)
+    tax = round(subtotal * 0.0875, 2)
+    total = round(subtotal + tax, 2)
+    tendered = float(int(total) + rng.choice((1, 5, 20)))
+    # Month-first with an unambiguous day, or spelled out
+    when = f"{day.month:02d}/{day.day:02d}/{day.year}" if day.day > 12 else day.strftime("%b %d, %Y")
+    lines = [rng.choice(VENDORS[3:5]), "123 Main Street Seattle WA 98101", f"{when} {rng.randint(8, 21)}:{rng.randint(10, 59)}",
+             f"Store {rng.randint(100, 9999)} Reg {rng.randint(1, 9)}"]
+    lines += [f"{name} ${price:.2f}" for name, price in items]
+    lines += [f"Subtotal ${subtotal:.2f}", f"Sales Tax 8.75% ${tax:.2f}", f"TOTAL ${total:.2f}",
+              f"CASH TENDERED ${tendered:.2f}", f"CHANGE DUE ${tendered - total:.2f}",
+              f"Total Items: {len(items)}", "Thank you for shopping with us"]
+    return lines, {"total": total, "subtotal": subtotal, "tax": tax, "date": day, "currency": "USD"}
+
+
+def european_vat(rng, day):
+    items, total = line_items(rng, 2, 30)
+    subtotal = round(total / 1.2, 2)
+    tax = round(total - subtotal, 2)
+    lines = ["Cafe Central GmbH", "Hauptstrasse 12, 10115 Berlin", f"Datum: {day.strftime('%d.%m.%Y')} 12:41"]
+    lines += [f"{name} {money(price, '.', ',')}" for name, price in items]
+    lines += [f"Net before VAT {money(subtotal, '.', ',')}", f"VAT 20% {money(tax, '.', ',')}",
+              f"TOTAL EUR {money(total, '.', ',')}", "Card payment"]
+    return lines, {"total": total, "subtotal": subtotal, "tax": tax, "date": day, "currency": "EUR"}
+
+
+def large_invoice(rng, day):
+    items, subtotal = line_items(rng, 300, 2500)
+    total = subtotal
+    lines = ["Hotel XYZ", "Guest Folio", f"Date: {day.isoformat()}"]
+    lines += [f"{name} {money(price)}" for name, price in items]
+    lines += [f"Payment received {money(total + 100)}" if rng.random() < 0.3 else "",
+              f"GRAND TOTAL: ${money(total)}", "Balance 0.00"]
+    return lines, {"total": total, "subtotal": None, "tax": None, "date": day, "currency": "USD"}
+
+
+def split_labels(rng, day):
+    """Label and value on separate lines, as Tesseract often returns columns."""
+    items, subtotal = line_items(rng, 1, 25)
+    lines = ["GRANDMA HOMES RESTAURANT", "(JM0840871-W)", f"Staff: Date: {day.strftime('%d/%m/%Y')}",
+             "Receipt#: CS00001615 Table: 12"]
+    lines += [f"{name} {price:.2f}" for name, price in items]
+    lines += ["Total (RM):", f"{subtotal:.2f}", "CASH", f"{float(int(subtotal) + 10):.2f}", "Thank You"]
+    return lines, {"total": subtotal, "subtotal": None, "tax": None, "date": day, "currency": "MYR"}
+
+
+LAYOUTS = [malaysian_gst, us_store, european_vat, large_invoice, split_labels]
+
+
+def corpus(n, seed=7):
+    rng = random.Random(seed)
+    receipts = []
+    for _ in range(n):
+        day = date(2018, 1, 1) + timedelta(days=rng.randrange(2400))
+        layout = rng.choice(LAYOUTS)
+        lines, truth = layout(rng, day)
+        receipts.append((layout.__name__, "\n".join(line for line in lines if line), truth))
+    return receipts
+
+
+def throughput(function, texts, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for text in texts:
+            function(text)
+        best = min(best, time.perf_counter() - started)
+    return len(texts) / best
+
+
+def close(expected, actual):
+    if expected is None or isinstance(expected, (str, date)):
+        return expected == actual
+    return actual is not None and abs(expected - actual) < 0.005
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--receipts", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    receipts = corpus(args.receipts)
+    texts = [text for _, text, _ in receipts]
+    print(f"corpus: {len(receipts)} receipts, {sum(map(len, texts)) / len(texts):.0f} chars on average, "
+          f"dates read {'day' if DAY_FIRST else 'month'}-first when ambiguous\n")
+
+    rates = [
+        ("legacy extract_amount (total only)", throughput(legacy_extract_amount, texts, args.repeat)),
+        ("legacy total + vendor heuristics", throughput(legacy_extract_entities, texts, args.repeat)),
+        ("parse_receipt (all fields + vendor)", throughput(parse_receipt, texts, args.repeat)),
+    ]
+    for name, rate in rates:
+        print(f"{name:40} {rate:10,.0f} receipts/s")
+    print()
+
+    layouts = sorted({layout for layout, _, _ in receipts})
+    hits = {layout: {field: 0 for field in ("legacy total",) + FIELDS} for layout in layouts}
+    counts = {layout: 0 for layout in layouts}
+    for layout, text, truth in receipts:
+        counts[layout] += 1
+        parsed = parse_receipt(text)
+        hits[layout]["legacy total"] += close(truth["total"], legacy_extract_amount(text))
+        for field in FIELDS:
+            hits[layout][field] += close(truth[field], getattr(parsed, field))
+
+    columns = ("legacy total",) + FIELDS
+    print(f"{'accuracy':16}" + "".join(f"{column:>14}" for column in columns))
+    for layout in layouts:
+        print(f"{layout:16}" + "".join(f"{hits[layout][column] / counts[layout]:>14.1%}" for column in columns))
+    print(f"{'all':16}" + "".join(
+        f"{sum(hits[layout][column] for layout in layouts) / len(receipts):>14.1%}" for column in columns))
+    print("\n(legacy extracted no subtotal, tax, date or currency)")
+
+
+if __name__ == "__main__":
+    main()
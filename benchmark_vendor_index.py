@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""Benchmark vendor canonicalization on noisy synthetic vendor names.
+
+Builds a VendorIndex over N synthetic vendors, then looks up OCR-style
+corruptions of known vendors (should resolve to the original) and unseen
+vendors (should not match anything). Unseen names come from the same small
+syllable space, so some differ from a known vendor by a single letter and
+count as false matches. Usage:
+
+    python benchmark_vendor_index.py [--vendors 100000] [--queries 5000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from utils.vendor_index import VendorIndex, canonical_key
+
+SYLLABLES = [c + v for c in "bcdfghjklmnprstvwz" for v in "aeiou"] + ["ar", "en", "ix", "on", "ul", "str", "th"]
+WORDS = ["coffee", "market", "grill", "pharmacy", "hardware", "books", "garage", "bakery", "electronics",
+         "travel", "office", "supply", "kitchen", "auto", "fitness", "deli", "hotel", "cafe", "foods"]
+SUFFIXES = ["", "", "", " Inc", " LLC", " Ltd", " Sdn Bhd", " Co."]
+OCR_SWAPS = {"o": "0", "l": "1", "s": "5", "b": "8", "e": "c", "m": "rn", "i": "l"}
+
+
+def synthetic_vendor(rng):
+    name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(3, 4))).title()
+    if rng.random() < 0.7:
+        name += " " + rng.choice(WORDS).title()
+    if rng.random() < 0.3:
+        name += " " + rng.choice(WORDS).title()
+    return name + rng.choice(SUFFIXES)
+
+
+def ocr_noise(name, rng):
+    """Upper-casing, a store number, and one or two character-level misreads."""
+    chars = list(name.upper() if rng.random() < 0.5 else name)
+    for _ in range(rng.randint(1, 2)):
+        positions = [i for i, c in enumerate(chars) if c.lower() in OCR_SWAPS]
+        if positions and rng.random() < 0.7:
+            i = rng.choice(positions)
+            chars[i] = OCR_SWAPS[chars[i].lower()]
+        elif len(chars) > 6:
+            del chars[rng.randrange(1, len(chars) - 1)]
+    noisy = "".join(chars)
+    if rng.random() < 0.4:
+        noisy += f" #{rng.randint(100, 9999)}"
+    return noisy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vendors", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--threshold", type=float, default=None)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    names = {}
+    while len(names) < args.vendors:
+        name = synthetic_vendor(rng)
+        names.setdefault(canonical_key(name), name)
+    vendors = list(names.values())
+
+    index = VendorIndex() if args.threshold is None else VendorIndex(args.threshold)
+    started = time.perf_counter()
+    for name in vendors:
+        index.add(canonical_key(name))
+    build_seconds = time.perf_counter() - started
+
+    known = [(ocr_noise(name, rng), canonical_key(name)) for name in rng.sample(vendors, args.queries)]
+    unseen = []
+    while len(unseen) < args.queries:
+        name = synthetic_vendor(rng)
+        if canonical_key(name) not in names:
+            unseen.append(name)
+
+    def timed(queries):
+        latencies, results = [], []
+        for query in queries:
+            started = time.perf_counter()
+            results.append(index.match(query))
+            latencies.append(time.perf_counter() - started)
+        return latencies, results
+
+    known_latencies, known_results = timed([query for query, _ in known])
+    unseen_latencies, unseen_results = timed(unseen)
+
+    correct = sum(1 for (_, expected), result in zip(known, known_results) if result and result[0] == expected)
+    wrong = sum(1 for (_, expected), result in zip(known, known_results) if result and result[0] != expected)
+    false_matches = sum(1 for result in unseen_results if result)
+
+    latencies = sorted(known_latencies + unseen_latencies)
+    print(f"vendors indexed:      {len(index):,} in {build_seconds:.2f}s (threshold {index.threshold})")
+    print(f"lookup latency:       mean {statistics.mean(latencies) * 1e3:.3f} ms, "
+          f"p50 {latencies[len(latencies) // 2] * 1e3:.3f} ms, p99 {latencies[int(len(latencies) * 0.99)] * 1e3:.3f} ms")
+    print(f"noisy known vendors:  {correct / len(known):.1%} resolved correctly, "
+          f"{wrong / len(known):.1%} to the wrong vendor, {1 - (correct + wrong) / len(known):.1%} unmatched")
+    print(f"unseen vendors:       {false_matches / len(unseen):.1%} falsely matched to a known vendor")
+    print("\nexamples:")
+    for (query, expected), result in list(zip(known, known_results))[:5]:
+        print(f"  {query!r:40} -> {result[0] if result else None!r} (expected {expected!r})")
+
+
+if __name__ == "__main__":
+    main()
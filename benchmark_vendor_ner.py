@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+"""Benchmark vendor NER cost per receipt: full-text calls vs. the header stage.
+
+"legacy" runs the NER pipeline once per receipt on text[:512], as
+extract_vendor used to. "header" runs utils.vendor_ner.VendorNER from
+--concurrency threads: NER sees only the header window, concurrent calls
+share one pipeline call and repeated headers come from the cache
+(--cache-size 0 disables it). Receipts come from the synthetic corpus in
+benchmark_receipt_parser.py. Needs transformers and the default NER model.
+Usage:
+
+    python benchmark_vendor_ner.py [--receipts 200] [--concurrency 8] [--cache-size 4096]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from benchmark_receipt_parser import corpus
+from utils.model_registry import registry
+from utils.vendor_ner import VendorNER, header_window, organization
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--receipts", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--cache-size", type=int, default=4096)
+    args = parser.parse_args()
+
+    ner_pipeline = registry.get("ner")
+    if ner_pipeline is None:
+        sys.exit(f"NER model unavailable: {registry.errors().get('ner')}")
+    texts = [text for _, text, _ in corpus(args.receipts)]
+    ner_pipeline(texts[0][:512])  # warm-up
+
+    started = time.perf_counter()
+    legacy = [organization(ner_pipeline(text[:512])) for text in texts]
+    legacy_seconds = time.perf_counter() - started
+
+    vendor_ner = VendorNER(cache_size=args.cache_size, max_batch_size=args.concurrency)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        header = list(pool.map(vendor_ner, texts))
+    header_seconds = time.perf_counter() - started
+
+    window = sum(len(header_window(text)) for text in texts) / len(texts)
+    full = sum(len(text[:512]) for text in texts) / len(texts)
+    stats = vendor_ner.stats()
+    print(f"receipts: {len(texts)}, NER input {full:.0f} -> {window:.0f} chars on average")
+    print(f"legacy (text[:512], one call each):  {legacy_seconds / len(texts) * 1e3:8.2f} ms/receipt")
+    print(f"header window + batching + cache:    {header_seconds / len(texts) * 1e3:8.2f} ms/receipt "
+          f"({legacy_seconds / header_seconds:.1f}x)")
+    print(f"cache hit rate {stats['hitRate']:.1%}, {stats['batches']} pipeline batches, "
+          f"average batch {stats['averageBatchSize']}")
+    print(f"same vendor as legacy: {sum(a == b for a, b in zip(legacy, header)) / len(texts):.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,36 +2,29 @@ import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
 
-from app import app, db, Expense, detect_anomaly
+from app import app, db, Expense, is_flagged, rescore_anomalies
 
 with app.app_context():
     print("Fixing anomaly status for all existing expenses...\n")
     
-    expenses = Expense.query.all()
-    print(f"Found {len(expenses)} expenses\n")
+    total = Expense.query.count()
+    print(f"Found {total} expenses\n")
     
-    if len(expenses) == 0:
+    if total == 0:
         print("No expenses in database. They will get flagged/normal status when uploaded.")
     else:
-        print("Processing each expense...")
-        for i, expense in enumerate(expenses, 1):
-            if not expense.anomaly_status or expense.anomaly_status == "":
-                status, reason = detect_anomaly(expense)
-                expense.anomaly_status = status
-                expense.anomaly_reason = reason
-                db.session.commit()
-                print(f"{i}. {expense.vendor} (${expense.amount})")
-                print(f"   Status: {status}")
-                if reason:
-                    print(f"   Reason: {reason}")
-                print()
+        print("Rescoring every expense...")
+        summary = rescore_anomalies()
+        print(f"  New anomalies: {summary['inserted']}")
+        print(f"  Updated anomalies: {summary['updated']}")
+        print(f"  Cleared anomalies: {summary['removed']}")
+        print(f"  Took {summary['seconds']}s\n")
         
         print("="*60)
-        flagged = Expense.query.filter_by(anomaly_status="flagged").all()
-        normal = Expense.query.filter_by(anomaly_status="normal").all()
+        flagged = db.session.query(db.func.count(Expense.id)).filter(is_flagged()).scalar()
         
         print(f"Summary:")
-        print(f"  Total: {len(expenses)}")
-        print(f"  Flagged: {len(flagged)}")
-        print(f"  Normal: {len(normal)}")
+        print(f"  Total: {total}")
+        print(f"  Flagged: {flagged}")
+        print(f"  Normal: {total - flagged}")
         print("="*60)
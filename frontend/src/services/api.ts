@@ -28,12 +28,33 @@ export interface AnomalyStats {
   flagged_percentage: number;
 }
 
+export interface ExpenseQuery {
+  limit?: number;
+  cursor?: string;
+  category?: string;
+  vendor?: string;
+  status?: string;
+  minAmount?: number;
+  maxAmount?: number;
+  startDate?: string;
+  endDate?: string;
+  fields?: string;
+}
+
+export interface ExpensePage {
+  success: boolean;
+  expenses: Expense[];
+  count: number;
+  nextCursor: string | null;
+}
+
 export interface ExpensesByCategory {
   success: boolean;
   by_category: Record<string, {
     total: number;
     count: number;
     expenses: Expense[];
+    nextCursor: string | null;
   }>;
 }
 
@@ -87,8 +108,15 @@ class ApiService {
     return response.json();
   }
 
-  async getExpenses(): Promise<{ success: boolean; expenses: Expense[]; count: number }> {
-    return this.request('/expenses');
+  async getExpenses(params: ExpenseQuery = {}): Promise<ExpensePage> {
+    const query = new URLSearchParams();
+    Object.entries(params).forEach(([key, value]) => {
+      if (value !== undefined && value !== '') {
+        query.set(key, String(value));
+      }
+    });
+    const search = query.toString();
+    return this.request(search ? `/expenses?${search}` : '/expenses');
   }
 
   async getExpenseStats(): Promise<ExpenseStats> {
@@ -2,7 +2,7 @@ import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
 
-from app import app, db, Expense, detect_anomaly
+from app import app, db, Expense, is_flagged, rebuild_category_stats, rebuild_dashboard_rollups, rescore_anomalies
 import shutil
 
 with app.app_context():
@@ -25,37 +25,34 @@ with app.app_context():
     ]
     
     print("Adding test expenses:\n")
-    for i, data in enumerate(test_data, 1):
-        exp = Expense(
+    for data in test_data:
+        db.session.add(Expense(
             filename=data["file"],
             category=data["category"],
             vendor=data["vendor"],
             amount=data["amount"],
             text_preview=f"Test {data['vendor']}",
             status="Processed"
-        )
-        db.session.add(exp)
-        db.session.commit()
-        
-        status, reason = detect_anomaly(exp)
-        exp.anomaly_status = status
-        exp.anomaly_reason = reason
-        db.session.commit()
-        
-        status_display = "FLAGGED" if status == "flagged" else "NORMAL"
-        print(f"{i}. {data['vendor']:30} ${data['amount']:8.2f}  [{status_display}]")
-        if reason:
-            print(f"   Reason: {reason}")
+        ))
+    db.session.commit()
+    rebuild_category_stats()
+    rescore_anomalies()
+    rebuild_dashboard_rollups()
+    
+    flagged_ids = {expense_id for (expense_id,) in db.session.query(Expense.id).filter(is_flagged())}
+    for i, exp in enumerate(Expense.query.order_by(Expense.id), 1):
+        status_display = "FLAGGED" if exp.id in flagged_ids else "NORMAL"
+        print(f"{i}. {exp.vendor:30} ${exp.amount:8.2f}  [{status_display}]")
+        for anomaly in exp.anomalies:
+            print(f"   Reason: {anomaly.description}")
         print()
     
     print("="*70)
-    flagged = Expense.query.filter_by(anomaly_status="flagged").all()
-    normal = Expense.query.filter_by(anomaly_status="normal").all()
     
     print(f"Summary:")
     print(f"  Total Expenses: {len(test_data)}")
-    print(f"  Flagged: {len(flagged)}")
-    print(f"  Normal: {len(normal)}")
+    print(f"  Flagged: {len(flagged_ids)}")
+    print(f"  Normal: {len(test_data) - len(flagged_ids)}")
     print("="*70)
     
     print("\nChecking API responses...")
@@ -69,4 +66,4 @@ with app.app_context():
         resp = client.get('/recent-uploads').get_json()
         print(f"   Returns {len(resp.get('uploads', []))} recent uploads")
         for upload in resp.get('uploads', []):
-            print(f"   - {upload['vendor']:20} anomalyStatus={upload.get('anomalyStatus')}")
+            print(f"   - {upload['vendor']:20} status={upload.get('status')}")
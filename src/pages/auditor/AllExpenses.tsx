@@ -45,7 +45,9 @@ export default function AllExpenses() {
   const [spendingDistribution, setSpendingDistribution] = useState<SpendingItem[]>([]);
   const [categoryTrends, setCategoryTrends] = useState<TrendData[]>([]);
   const [categoryExpenses, setCategoryExpenses] = useState<Record<string, CategoryExpense[]>>({});
+  const [categoryCursors, setCategoryCursors] = useState<Record<string, string | null>>({});
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     const fetchExpenseData = async () => {
@@ -58,6 +60,7 @@ export default function AllExpenses() {
           setSpendingDistribution(data.spendingDistribution || []);
           setCategoryTrends(data.categoryTrends || []);
           setCategoryExpenses(data.categoryExpenses || {});
+          setCategoryCursors(data.categoryCursors || {});
 
           const categories = data.categorySpending?.map((c: CategorySpending) => c.category) || [];
           if (categories.length > 0) {
@@ -74,6 +77,31 @@ export default function AllExpenses() {
     fetchExpenseData();
   }, []);
 
+  // Each category arrives one page at a time; its cursor fetches the next page
+  const loadMoreExpenses = async (category: string) => {
+    const cursor = categoryCursors[category];
+    if (!cursor) return;
+
+    setLoadingMore(true);
+    try {
+      const params = new URLSearchParams({ category, cursor });
+      const response = await fetch(`http://127.0.0.1:5000/auditor/expenses?${params}`);
+      const data = await response.json();
+
+      if (data.success) {
+        setCategoryExpenses((previous) => ({
+          ...previous,
+          [category]: [...(previous[category] || []), ...(data.categoryExpenses?.[category] || [])]
+        }));
+        setCategoryCursors((previous) => ({ ...previous, [category]: data.categoryCursors?.[category] ?? null }));
+      }
+    } catch (error) {
+      console.error("Error loading more expenses:", error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   return (
     <>
       <div style={{ marginBottom: "12px" }}>
@@ -252,6 +280,14 @@ export default function AllExpenses() {
             )}
           </tbody>
         </table>
+
+        {categoryCursors[activeTab] && (
+          <div style={{ display: "flex", justifyContent: "center", marginTop: "16px" }}>
+            <button className="primary-button" onClick={() => loadMoreExpenses(activeTab)} disabled={loadingMore}>
+              {loadingMore ? "Loading..." : "Load more"}
+            </button>
+          </div>
+        )}
       </div>
     </>
   );
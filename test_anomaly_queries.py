@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+"""Query-count regression test for the anomaly endpoints.
+
+Each anomaly endpoint must load its anomalies and their expenses with a
+constant number of queries, however many anomalies exist. Aggregate and
+paged endpoints must not grow with the number of rows either.
+"""
+import os
+import sys
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from sqlalchemy import event
+
+from app import app, db, rebuild_dashboard_rollups, Expense, AnomalyDetection
+
+ENDPOINTS = [
+    "/anomalies",
+    "/anomalies/by-severity",
+    "/anomalies/recent?limit=50",
+    "/auditor/anomalies",
+]
+MAX_QUERIES = 3
+AGGREGATE_ENDPOINTS = [
+    "/anomalies/stats",
+    "/auditor/expenses?limit=5",
+]
+
+
+def seed(count, categories=("Food",)):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        for i in range(count):
+            expense = Expense(filename=f"r{i}.jpg", category=categories[i % len(categories)], vendor=f"Vendor {i}",
+                              amount=10.0 + i)
+            db.session.add(expense)
+            db.session.flush()
+            db.session.add(AnomalyDetection(
+                expense_id=expense.id,
+                anomaly_type="Unusual Amount",
+                severity=["Critical", "High", "Medium", "Low"][i % 4],
+                confidence=80,
+                description="seeded"
+            ))
+        db.session.commit()
+        rebuild_dashboard_rollups()
+
+
+def count_queries(client, endpoint):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get(endpoint)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    assert response.status_code == 200, response.get_json()
+    return len(statements)
+
+
+def test_anomaly_endpoints_do_not_issue_per_row_queries():
+    seed(25)
+    with app.test_client() as client:
+        for endpoint in ENDPOINTS:
+            queries = count_queries(client, endpoint)
+            print(f"{endpoint}: {queries} queries for 25 anomalies")
+            assert queries <= MAX_QUERIES, f"{endpoint} issued {queries} queries"
+
+
+def test_serialized_anomalies_include_expense_fields():
+    seed(3)
+    with app.test_client() as client:
+        anomalies = client.get("/anomalies").get_json()["anomalies"]
+    assert len(anomalies) == 3
+    for anomaly in anomalies:
+        assert anomaly["vendorName"].startswith("Vendor ")
+        assert anomaly["category"] == "Food"
+        assert anomaly["dateTime"].endswith("Z")
+
+
+def test_aggregate_endpoints_do_not_grow_with_rows():
+    counts = {}
+    for rows in (8, 40):
+        seed(rows)
+        with app.test_client() as client:
+            counts[rows] = [count_queries(client, endpoint) for endpoint in AGGREGATE_ENDPOINTS]
+    assert counts[8] == counts[40], counts
+
+
+def test_anomaly_stats_are_aggregated():
+    seed(8)
+    with app.test_client() as client:
+        stats = client.get("/anomalies/stats").get_json()
+    assert stats["anomalousTransactions"] == 8 and stats["flaggedExpenses"] == 8
+    assert stats["totalCharges"] == sum(10.0 + i for i in range(8))
+    assert stats["severityCounts"] == {"Critical": 2, "High": 2, "Medium": 2, "Low": 2}
+    assert stats["anomalyTypes"] == {"Unusual Amount": 8}
+    assert stats["averageConfidence"] == 80
+
+
+def test_auditor_expenses_are_paged():
+    seed(12)
+    vendors = []
+    with app.test_client() as client:
+        body = client.get("/auditor/expenses?limit=5").get_json()
+        while True:
+            vendors += [expense["vendor"] for expense in body["categoryExpenses"]["Food"]]
+            cursor = body["categoryCursors"]["Food"]
+            if cursor is None:
+                break
+            body = client.get(f"/auditor/expenses?limit=5&category=Food&cursor={cursor}").get_json()
+        assert client.get("/auditor/expenses?category=Food&cursor=bogus").status_code == 400
+    assert vendors == [f"Vendor {i}" for i in reversed(range(12))]
+    assert body["categorySpending"][0]["amount"] == sum(10.0 + i for i in range(12))
+
+
+def test_auditor_first_pages_come_from_one_query():
+    counts = []
+    for categories in (("Food",), ("Food", "Travel", "Office", None, "")):
+        seed(15, categories)
+        with app.test_client() as client:
+            counts.append(count_queries(client, "/auditor/expenses?limit=2"))
+    assert counts[0] == counts[1], counts
+
+    # Expenses without a category are merged under "Other", newest first
+    vendors = []
+    with app.test_client() as client:
+        body = client.get("/auditor/expenses?limit=2").get_json()
+        assert set(body["categoryExpenses"]) == {"Food", "Travel", "Office", "Other"}
+        while True:
+            vendors += [expense["vendor"] for expense in body["categoryExpenses"]["Other"]]
+            cursor = body["categoryCursors"]["Other"]
+            if cursor is None:
+                break
+            body = client.get(f"/auditor/expenses?limit=2&category=Other&cursor={cursor}").get_json()
+    assert vendors == [f"Vendor {i}" for i in (14, 13, 9, 8, 4, 3)]
+
+
+def test_plain_anomaly_queries_do_not_join_expenses():
+    seed(3)
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            AnomalyDetection.query.all()
+            AnomalyDetection.query.filter_by(severity="High").count()
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    # Only serialize_anomalies asks for the expense, with an explicit joinedload
+    assert len(statements) == 2 and not any("JOIN" in statement.upper() for statement in statements), statements
+
+if __name__ == "__main__":
+    test_anomaly_endpoints_do_not_issue_per_row_queries()
+    test_serialized_anomalies_include_expense_fields()
+    test_aggregate_endpoints_do_not_grow_with_rows()
+    test_anomaly_stats_are_aggregated()
+    test_auditor_expenses_are_paged()
+    test_auditor_first_pages_come_from_one_query()
+    test_plain_anomaly_queries_do_not_join_expenses()
+    print("[OK] Anomaly endpoints use a constant number of queries")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""Anomaly rule engine: shared features once per batch, rule precedence, isolated failures and timings."""
+import os
+import sys
+import unittest
+
+import numpy as np
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from app import app, anomaly_rules, db, score_anomalies
+from utils.anomaly_rules import AnomalyRule, ExpenseBatch, Finding, RuleEngine, default_rules
+
+
+def make_batch(calls):
+    def category_stats(batch):
+        calls.append("category_stats")
+        return {"count": np.array([5, 5, 0]), "mean": np.array([10.0, 10.0, 0.0]),
+                "std_dev": np.array([1.0, 50.0, 0.0]), "max": np.array([12.0, 60.0, 0.0])}
+
+    return ExpenseBatch({
+        "id": np.array([1, 2, 3]),
+        "amount": np.array([40.0, 95.0, 500.0]),
+        "vendor": np.array(["A", "B", "C"], dtype=object)
+    }, {
+        "category_stats": category_stats,
+        "duplicate": lambda batch: {"kind": np.array([0, 1, 0]), "expense_id": np.array([0, 1, 0]),
+                                    "day": ["", "2024-05-01", ""]},
+        "new_vendor": lambda batch: np.array([False, False, True])
+    })
+
+
+class BrokenRule(AnomalyRule):
+    name = "broken"
+    anomaly_type = "Broken"
+
+    def evaluate(self, batch):
+        raise ValueError("boom")
+
+
+def test_features_are_shared_and_earlier_rules_win():
+    calls = []
+    engine = RuleEngine(default_rules())
+    findings = engine.evaluate(make_batch(calls))
+    assert calls == ["category_stats"]
+    # Row 0 trips both amount rules but keeps only the z-score finding
+    assert [(f.row, f.anomaly_type, f.severity) for f in findings] == [
+        (0, "Unusual Amount", "Critical"), (1, "Unusual Amount", "High"),
+        (1, "Duplicate Detection", "High"), (2, "Unknown Vendor", "Low")
+    ]
+    assert findings[1].description.endswith("(max: $60.00)")
+    stats = engine.stats()
+    assert stats["features"]["category_stats"]["batches"] == 1
+    assert stats["rules"]["amount_above_max"]["flagged"] == 1
+
+
+def test_failing_rule_is_isolated_and_counted():
+    engine = RuleEngine([BrokenRule()] + default_rules())
+    batch = make_batch([])
+    with unittest.TestCase().assertLogs("utils.anomaly_rules", "ERROR") as logs:
+        assert len(engine.evaluate(batch)) == 4
+    assert "Traceback" in logs.output[0]
+    assert batch.errors == ["broken"]
+    assert engine.stats()["rules"]["broken"]["errors"] == 1
+
+    rule = anomaly_rules.register(type("Always", (AnomalyRule,), {
+        "name": "always", "anomaly_type": "Review",
+        "evaluate": lambda self, batch: [Finding(0, "Review", "Low", 50, "check")]
+    })())
+    try:
+        with app.test_client() as client, app.app_context():
+            db.drop_all()
+            db.create_all()
+            assert [a.anomaly_type for a in score_anomalies(1, 12.0, "Shop", "Food", None)] == ["Review"]
+            body = client.get("/anomalies/rules/stats").get_json()
+    finally:
+        anomaly_rules.unregister(rule.name)
+    assert [entry["name"] for entry in body["rules"]][-1] == "always"
+    assert body["timings"]["rules"]["always"]["flagged"] >= 1
+    assert set(body["timings"]["features"]) == {"category_stats", "duplicate", "new_vendor"}
+
+
+if __name__ == "__main__":
+    test_features_are_shared_and_earlier_rules_win()
+    test_failing_rule_is_isolated_and_counted()
+    print("[OK] Anomaly rules")
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+"""Category statistics: the rebuild agrees with the incremental Welford update."""
+import math
+import os
+import sys
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from app import app, db, rebuild_category_stats, update_category_stats, CategoryStats, Expense
+
+# Large, similar amounts: sum(x^2) - n * mean^2 loses every significant digit here
+AMOUNTS = {"Travel": [1e9 + cents / 100 for cents in (1, 7, 3, 9, 4, 6)], "Food": [12.5, 8.0, 30.25]}
+
+
+def snapshots():
+    return {stats.category: stats.snapshot() for stats in CategoryStats.query.order_by(CategoryStats.category)}
+
+
+def test_rebuild_matches_incremental_stats():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        for category, amounts in AMOUNTS.items():
+            for amount in amounts:
+                update_category_stats(category, amount)
+                db.session.add(Expense(filename="r.jpg", category=category, vendor="Shop", amount=amount))
+        db.session.commit()
+        incremental = snapshots()
+
+        assert rebuild_category_stats() == 2
+        rebuilt = snapshots()
+    assert rebuilt.keys() == incremental.keys()
+    for category, amounts in AMOUNTS.items():
+        mean = sum(amounts) / len(amounts)
+        std_dev = math.sqrt(sum((amount - mean) ** 2 for amount in amounts) / len(amounts))
+        for stats in (incremental[category], rebuilt[category]):
+            assert stats["count"] == len(amounts) and stats["max"] == max(amounts)
+            assert math.isclose(stats["mean"], mean, rel_tol=1e-12)
+            assert math.isclose(stats["std_dev"], std_dev, rel_tol=1e-3)
+
+
+if __name__ == "__main__":
+    test_rebuild_matches_incremental_stats()
+    print("[OK] Category statistics")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""Duplicate-receipt detection: fingerprint and MinHash lookups."""
+import hashlib
+import os
+import sys
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from app import app, db, Expense, fingerprint_expense, index_minhash_bands, find_duplicate
+from utils.fingerprint import (MINHASH_THRESHOLD, SHINGLE_SIZE, _PERMUTATIONS, minhash, normalize_vendor,
+                               receipt_fingerprint, similarity)
+
+RECEIPT = """STARBUCKS COFFEE #1234
+123 Main Street Seattle WA
+Caffe Latte Grande 4.95
+Blueberry Muffin 3.25
+Subtotal 8.20
+Tax 0.82
+TOTAL 9.02
+VISA ending 4421 approved
+Thank you for visiting"""
+# The same paper receipt scanned again: a few OCR misreads
+RESCAN = RECEIPT.replace("Blueberry", "B1ueberry").replace("approved", "approvcd")
+# Same store and order on another day: a different purchase
+REORDER = RECEIPT.replace("9.02", "9.52").replace("0.82", "1.32").replace("8.20", "8.70").replace("4421", "9912")
+
+
+def add_expense(vendor, amount, text, uploaded_at):
+    expense = Expense(filename="r.jpg", category="Food", vendor=vendor, amount=amount,
+                      text_preview=text[:200], uploaded_at=uploaded_at)
+    fingerprint_expense(expense, text)
+    db.session.add(expense)
+    db.session.flush()
+    index_minhash_bands([expense])
+    return expense
+
+
+def test_fingerprint_normalizes_vendor_and_amount():
+    day = datetime(2024, 5, 1, 9, 30)
+    assert receipt_fingerprint("Starbucks Coffee", 9.02, day) == receipt_fingerprint("STARBUCKS  coffee.", 9.020, day)
+    assert receipt_fingerprint("Starbucks Coffee", 9.02, day) != receipt_fingerprint("Starbucks Coffee", 9.03, day)
+    assert receipt_fingerprint("Starbucks Coffee", 0, day) is None
+
+
+def test_minhash_separates_rescans_from_new_purchases():
+    assert similarity(minhash(RECEIPT), minhash(RESCAN)) >= MINHASH_THRESHOLD
+    assert similarity(minhash(RECEIPT), minhash(REORDER)) < MINHASH_THRESHOLD
+    assert minhash("TOTAL 9.02") is None
+
+
+def test_minhash_matches_the_stored_signature_definition():
+    # Signatures already in the database were built one permutation at a time in Python
+    for text in (RECEIPT, RESCAN, REORDER, RECEIPT * 20):
+        normalized = normalize_vendor(text)
+        shingles = {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+        hashes = [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big") for s in shingles]
+        expected = b"".join(
+            (min((a * h + b) % ((1 << 61) - 1) for h in hashes) & 0xFFFFFFFF).to_bytes(4, "big")
+            for a, b in _PERMUTATIONS
+        )
+        assert minhash(text) == expected
+
+
+def test_find_duplicate():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        now = datetime.utcnow()
+        original = add_expense("Starbucks Coffee", 9.02, RECEIPT, now - timedelta(hours=20))
+
+        same_purchase = add_expense("STARBUCKS COFFEE", 9.02, "", now)
+        assert find_duplicate(same_purchase.id, same_purchase.vendor, 9.02, now) == (original, "fingerprint")
+
+        # Vendor and total misread, but the text is the same receipt
+        rescan = add_expense("STARBUCKS C0FFEE", 9.62, RESCAN, now + timedelta(days=30))
+        assert find_duplicate(rescan.id, rescan.vendor, 9.62, rescan.uploaded_at, rescan.text_minhash) == (original, "minhash")
+
+        reorder = add_expense("Starbucks Coffee", 9.52, REORDER, now + timedelta(days=2))
+        assert find_duplicate(reorder.id, reorder.vendor, 9.52, reorder.uploaded_at, reorder.text_minhash) == (None, None)
+        db.session.rollback()
+
+
+if __name__ == "__main__":
+    test_fingerprint_normalizes_vendor_and_amount()
+    test_minhash_separates_rescans_from_new_purchases()
+    test_minhash_matches_the_stored_signature_definition()
+    test_find_duplicate()
+    print("[OK] Duplicate detection")
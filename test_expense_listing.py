@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""Keyset-paginated expense listing: cursors, filters and sparse fields."""
+import os
+import sys
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from app import app, db, rebuild_dashboard_rollups, Expense
+
+
+def seed():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        start = datetime(2024, 6, 1, 9)
+        for i in range(30):
+            # Pairs share a timestamp, so the id breaks ties
+            db.session.add(Expense(filename=f"r{i}.jpg", category=["Food", "Travel", "Office"][i % 3],
+                                   vendor=f"Vendor {i % 4}", amount=5.0 * (i + 1),
+                                   uploaded_at=start + timedelta(days=i // 2), status="Processed"))
+        db.session.commit()
+        rebuild_dashboard_rollups()
+
+
+def pages(client, query):
+    ids, cursor = [], None
+    while True:
+        page = client.get(f"/expenses?{query}" + (f"&cursor={cursor}" if cursor else "")).get_json()
+        assert page["count"] == len(page["expenses"])
+        ids += [expense["id"] for expense in page["expenses"]]
+        cursor = page["nextCursor"]
+        if cursor is None:
+            return ids
+
+
+def test_pages_cover_every_expense_newest_first():
+    seed()
+    with app.test_client() as client:
+        ids = pages(client, "limit=7&fields=id")
+        assert ids == list(range(30, 0, -1))
+        food = pages(client, "limit=4&category=Food&minAmount=20&endDate=2024-06-10")
+        assert food == [19, 16, 13, 10, 7, 4]
+
+
+def test_sparse_fields_and_bad_arguments():
+    seed()
+    with app.test_client() as client:
+        expense = client.get("/expenses?limit=1&fields=vendor,uploadedAt").get_json()["expenses"][0]
+        assert expense == {"vendor": "Vendor 1", "uploadedAt": "2024-06-15T09:00:00Z"}
+        assert client.get("/expenses?fields=amount").status_code == 400
+        assert client.get("/expenses?cursor=not-a-cursor").status_code == 400
+        assert client.get("/expenses?minAmount=ten").status_code == 400
+        travel = client.get("/expenses/by-category?limit=2").get_json()["by_category"]["Travel"]
+        assert (travel["count"], len(travel["expenses"])) == (10, 2) and travel["nextCursor"]
+
+
+if __name__ == "__main__":
+    test_pages_cover_every_expense_newest_first()
+    test_sparse_fields_and_bad_arguments()
+    print("[OK] Expense listing")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""Streaming exports: NDJSON, CSV and gzip for expenses, anomalies and the audit trail."""
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+import app as backend
+from app import app, db, ActivityLog, AnomalyDetection, Expense
+
+
+def seed(count=25):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        for i in range(count):
+            expense = Expense(filename=f"r{i}.jpg", category=["Food", "Travel"][i % 2], vendor=f"Vendor, {i}",
+                              amount=10.0 + i)
+            db.session.add(expense)
+            db.session.flush()
+            db.session.add(ActivityLog(user="Tester", action="Uploaded Receipt", action_type="uploaded",
+                                       expense_id=expense.id))
+            if i % 5 == 0:
+                db.session.add(AnomalyDetection(expense_id=expense.id, anomaly_type="Unusual Amount",
+                                                severity="High", confidence=80, status="Pending"))
+        db.session.commit()
+
+
+def test_ndjson_and_csv_exports_stream_in_batches():
+    seed()
+    batch_size, backend.EXPORT_BATCH_SIZE = backend.EXPORT_BATCH_SIZE, 4
+    with app.test_client() as client:
+        response = client.get("/export/expenses?category=Food")
+        assert response.is_streamed and response.mimetype == "application/x-ndjson"
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert [row["id"] for row in rows] == list(range(1, 26, 2))
+        assert rows[0]["uploadedAt"].endswith("Z")
+
+        text = client.get("/export/anomalies?format=csv&fields=id,vendorName,severity").get_data(as_text=True)
+        records = list(csv.reader(io.StringIO(text)))
+        assert records[0] == ["id", "vendorName", "severity"]
+        assert records[1:] == [[str(i // 5 + 1), f"Vendor, {i}", "High"] for i in range(0, 25, 5)]
+
+        assert client.get("/export/activity-logs?format=xml").status_code == 400
+        assert client.get("/export/activity-logs?fields=password").status_code == 400
+    backend.EXPORT_BATCH_SIZE = batch_size
+
+
+def test_gzip_matches_plain_export():
+    seed()
+    with app.test_client() as client:
+        plain = client.get("/export/activity-logs?format=csv").get_data()
+        response = client.get("/export/activity-logs?format=csv&gzip=1")
+        assert response.headers["Content-Disposition"] == 'attachment; filename="activity-logs.csv.gz"'
+        assert gzip.decompress(response.get_data()) == plain
+        assert plain.count(b"\n") == 26
+
+
+if __name__ == "__main__":
+    test_ndjson_and_csv_exports_stream_in_batches()
+    test_gzip_matches_plain_export()
+    print("[OK] Exports")
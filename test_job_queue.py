@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""Job queue leases: stranded jobs are resumed, jobs held by live workers are not run twice."""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from utils.job_queue import JobQueue
+
+
+def insert_running(queue, job_id, lease_expires, worker_id="other-host:1:dead"):
+    queue._connection().execute(
+        "INSERT INTO jobs (id, kind, payload, status, created_at, started_at, worker_id, lease_expires)"
+        " VALUES (?, 'ocr', '{\"n\": 1}', 'running', ?, ?, ?, ?)",
+        (job_id, time.time(), time.time(), worker_id, lease_expires)
+    )
+
+
+def wait_for(queue, job_id, status, seconds=5):
+    deadline = time.time() + seconds
+    while queue.get(job_id)["status"] != status and time.time() < deadline:
+        time.sleep(0.02)
+    return queue.get(job_id)
+
+
+def test_expired_leases_are_resumed_and_live_ones_left_alone():
+    path = os.path.join(tempfile.mkdtemp(), "jobs.db")
+    queue = JobQueue(path, lambda payload: {"n": payload["n"] + 1}, poll_interval=0.02)
+    insert_running(queue, "crashed", time.time() - 1)
+    insert_running(queue, "legacy", None)
+    insert_running(queue, "busy", time.time() + 60)
+
+    # Reading status never starts workers or touches other workers' jobs
+    assert queue.counts() == {"running": 3} and not queue._threads
+    queue.start()
+    assert wait_for(queue, "crashed", "done")["result"] == {"n": 2}
+    assert wait_for(queue, "legacy", "done")["result"] == {"n": 2}
+    time.sleep(0.1)
+    assert queue.get("busy")["status"] == "running"
+
+
+def test_heartbeat_keeps_a_long_job_from_being_taken_over():
+    path = os.path.join(tempfile.mkdtemp(), "jobs.db")
+    calls = []
+    release = threading.Event()
+
+    def slow(payload):
+        calls.append(payload)
+        release.wait(5)
+        return {"ok": True}
+
+    first = JobQueue(path, slow, workers=1, poll_interval=0.02, lease_seconds=0.3)
+    second = JobQueue(path, slow, workers=1, poll_interval=0.02, lease_seconds=0.3)
+    job_id = first.enqueue("ocr", {"n": 1})
+    wait_for(first, job_id, "running")
+    second.start()
+    time.sleep(1.0)  # more than three leases
+    release.set()
+    assert wait_for(first, job_id, "done")["result"] == {"ok": True}
+    assert len(calls) == 1
+
+
+if __name__ == "__main__":
+    test_expired_leases_are_resumed_and_live_ones_left_alone()
+    test_heartbeat_keeps_a_long_job_from_being_taken_over()
+    print("[OK] Job queue leases")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""Micro-batching: concurrent calls share one pipeline call, split at max_batch_size, and share failures."""
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from utils.batching import MicroBatcher
+
+
+def call_concurrently(batcher, items):
+    """Call the batcher from one thread per item, all released together; returns results or exceptions."""
+    barrier = threading.Barrier(len(items))
+    outcomes = [None] * len(items)
+
+    def worker(i):
+        barrier.wait()
+        try:
+            outcomes[i] = batcher(items[i])
+        except Exception as e:
+            outcomes[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(items))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return outcomes
+
+
+def test_concurrent_calls_share_one_pipeline_call():
+    calls = []
+
+    def pipeline(texts):
+        calls.append(list(texts))
+        return [text.upper() for text in texts]
+
+    # A full batch is dispatched at once, so the long window only guards against slow thread starts
+    batcher = MicroBatcher(pipeline, max_batch_size=4, max_wait_ms=2000)
+    assert call_concurrently(batcher, ["a", "b", "c", "d"]) == ["A", "B", "C", "D"]
+    assert len(calls) == 1 and sorted(calls[0]) == ["a", "b", "c", "d"]
+    assert batcher.stats() == {"batches": 1, "items": 4, "averageBatchSize": 4.0}
+
+
+def test_max_batch_size_splits_batches():
+    calls = []
+
+    def pipeline(numbers):
+        calls.append(len(numbers))
+        return [n * 10 for n in numbers]
+
+    batcher = MicroBatcher(pipeline, max_batch_size=3, max_wait_ms=50)
+    futures = [batcher.submit(n) for n in range(7)]
+    assert [future.result(timeout=10) for future in futures] == [n * 10 for n in range(7)]
+    assert max(calls) <= 3 and sum(calls) == 7 and len(calls) >= 3
+
+
+def test_pipeline_errors_reach_every_caller():
+    def pipeline(texts):
+        raise ValueError("model exploded")
+
+    batcher = MicroBatcher(pipeline, max_batch_size=3, max_wait_ms=2000)
+    outcomes = call_concurrently(batcher, ["a", "b", "c"])
+    assert all(isinstance(outcome, ValueError) and str(outcome) == "model exploded" for outcome in outcomes)
+    # The worker survives the failure
+    batcher.batch_fn, batcher.max_wait = (lambda texts: texts), 0.0
+    assert batcher("d") == "d"
+
+
+if __name__ == "__main__":
+    test_concurrent_calls_share_one_pipeline_call()
+    test_max_batch_size_splits_batches()
+    test_pipeline_errors_reach_every_caller()
+    print("[OK] Micro-batching")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""Batch ingest: every row is scored only against the uploads before it."""
+import io
+import os
+import sys
+import tempfile
+import zipfile
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+import app as backend
+from app import app, db, rescore_anomalies, AnomalyDetection, Expense
+from utils.ocr_cache import OCRCache
+
+
+def post_batch(client, receipts):
+    """Upload (vendor, category, total) receipts through /ocr/batch with their OCR results already cached."""
+    backend.ocr_cache = OCRCache(os.path.join(tempfile.mkdtemp(), "ocr_cache.db"))
+    files = []
+    for i, (vendor, category, total) in enumerate(receipts):
+        data = f"receipt {i}".encode()
+        backend.ocr_cache.put(OCRCache.digest(data), {
+            "text": f"{vendor}\nTOTAL {total:.2f}",
+            "classification": {"label": category, "score": 0.9},
+            "entities": {"vendor": vendor, "total": total}
+        })
+        files.append((io.BytesIO(data), f"r{i}.jpg"))
+    response = client.post("/ocr/batch", data={"files": files}, content_type="multipart/form-data")
+    assert response.status_code == 200, response.get_json()
+    return [result["expenseId"] for result in response.get_json()["results"]]
+
+
+def flagged(anomaly_type):
+    return sorted(a.expense_id for a in AnomalyDetection.query.filter_by(anomaly_type=anomaly_type))
+
+
+def test_only_later_copies_are_duplicates():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    with app.test_client() as client:
+        ids = post_batch(client, [("Shop A", "Food", 10.0 + i % 3) for i in range(9)])
+    with app.app_context():
+        assert flagged("Duplicate Detection") == ids[3:]
+
+
+def test_first_in_category_is_scored_against_nothing():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    with app.test_client() as client:
+        # The $1.00 row opens the category; the larger rows come after it in the same batch
+        ids = post_batch(client, [("Shop A", "Books", 1.0)] + [("Shop A", "Books", 95.0 + i) for i in range(8)])
+    with app.app_context():
+        assert ids[0] not in flagged("Unusual Amount")
+        summary = rescore_anomalies(dry_run=True)
+        assert (summary["inserted"], summary["updated"], summary["removed"]) == (0, 0, 0)
+
+
+def post_zip(client, members):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as z:
+        for name, data in members:
+            z.writestr(name, data)
+    archive.seek(0)
+    return client.post("/ocr/batch", data={"files": [(archive, "receipts.zip")]}, content_type="multipart/form-data")
+
+
+def test_oversized_zip_is_rejected_before_reading():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    max_files, max_bytes = backend.OCR_BATCH_MAX_FILES, app.config["MAX_CONTENT_LENGTH"]
+    backend.OCR_BATCH_MAX_FILES, app.config["MAX_CONTENT_LENGTH"] = 2, 64 * 1024
+    try:
+        with app.test_client() as client:
+            response = post_zip(client, [(f"r{i}.jpg", b"x") for i in range(3)])
+            assert response.status_code == 400 and "Too many files" in response.get_json()["error"]
+            # 1 MB of zeros deflates to about 1 KB, well under the request cap
+            response = post_zip(client, [("bomb.jpg", bytes(1024 * 1024))])
+            assert response.status_code == 400 and "too large" in response.get_json()["error"]
+    finally:
+        backend.OCR_BATCH_MAX_FILES, app.config["MAX_CONTENT_LENGTH"] = max_files, max_bytes
+    with app.app_context():
+        assert Expense.query.count() == 0
+
+
+if __name__ == "__main__":
+    test_only_later_copies_are_duplicates()
+    test_first_in_category_is_scored_against_nothing()
+    test_oversized_zip_is_rejected_before_reading()
+    print("[OK] OCR batch")
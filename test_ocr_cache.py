@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""OCR result cache: content-hash lookups, LRU eviction at max_bytes and reopening the cache file."""
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+import utils.ocr_cache as ocr_cache_module
+from utils.ocr_cache import OCRCache
+
+
+class Clock:
+    """Stands in for the time module so last_access ordering is deterministic."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        self.now += 1
+        return self.now
+
+
+def result(n):
+    return {"text": f"receipt {n} " + "x" * 100, "classification": {"label": "Food", "score": 0.9}}
+
+
+def test_hits_and_misses_are_keyed_by_content():
+    cache = OCRCache(os.path.join(tempfile.mkdtemp(), "ocr_cache.db"))
+    cache.put(OCRCache.digest(b"receipt bytes"), result(1))
+    assert cache.get(OCRCache.digest(b"receipt bytes")) == result(1)
+    # Same filename or not, different bytes are a different entry
+    assert cache.get(OCRCache.digest(b"receipt bytes, rescanned")) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_least_recently_used_entries_are_evicted():
+    original = ocr_cache_module.time
+    ocr_cache_module.time = Clock()
+    try:
+        entry_bytes = len(json.dumps(result(0)).encode("utf-8"))
+        cache = OCRCache(os.path.join(tempfile.mkdtemp(), "ocr_cache.db"), max_bytes=3 * entry_bytes)
+        digests = [OCRCache.digest(bytes([n])) for n in range(4)]
+        for n in range(3):
+            cache.put(digests[n], result(n))
+        assert cache.get(digests[0]) == result(0)  # 1 is now the least recently used
+        cache.put(digests[3], result(3))
+        assert cache.get(digests[1]) is None
+        assert all(cache.get(digests[n]) == result(n) for n in (0, 2, 3))
+        stats = cache.stats()
+        assert stats["evictions"] == 1 and stats["bytes"] <= stats["maxBytes"]
+        # A payload larger than the whole cache is not stored and evicts nothing
+        cache.put(OCRCache.digest(b"huge"), {"text": "x" * (4 * entry_bytes)})
+        assert cache.stats()["entries"] == 3
+    finally:
+        ocr_cache_module.time = original
+
+
+def test_reopened_cache_keeps_entries_and_size():
+    path = os.path.join(tempfile.mkdtemp(), "ocr_cache.db")
+    first = OCRCache(path)
+    first.put(OCRCache.digest(b"a"), result(1))
+    first.put(OCRCache.digest(b"b"), result(2))
+    stored = first.stats()["bytes"]
+
+    reopened = OCRCache(path)
+    assert reopened.get(OCRCache.digest(b"a")) == result(1)
+    assert reopened.stats()["bytes"] == stored
+    assert reopened.stats()["entries"] == 2
+
+
+if __name__ == "__main__":
+    test_hits_and_misses_are_keyed_by_content()
+    test_least_recently_used_entries_are_evicted()
+    test_reopened_cache_keeps_entries_and_size()
+    print("[OK] OCR cache")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""EXPLAIN QUERY PLAN checks for the dashboard endpoints.
+
+Every SELECT a dashboard endpoint issues must be answered from an index (or
+by walking the primary key in order); a bare ``SCAN <table>`` means the
+query plan regressed to a full table scan.
+"""
+import os
+import re
+import sys
+from datetime import datetime
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from sqlalchemy import event, inspect
+
+from app import app, db, migrate_database, rebuild_dashboard_rollups, Expense, AnomalyDetection, ActivityLog
+
+DASHBOARD_ENDPOINTS = [
+    "/expenses?limit=5",
+    "/expenses?limit=5&category=Food",
+    "/expenses/by-category?limit=5",
+    "/expenses/stats",
+    "/expenses/trends",
+    "/api/admin/reports",
+    "/api/admin/reports?category=Food",
+    "/api/auditor/reports",
+    "/api/auditor/reports?dateRange=Last%203%20Months&category=Food",
+    "/dashboard/auditor-overview",
+    "/auditor/expenses",
+    "/anomalies/recent",
+    "/activity-logs",
+    "/audit-trail",
+    "/api/admin/users",
+    "/settings/admin",
+]
+FULL_SCAN = re.compile(r"^SCAN (expense|anomaly_detection|activity_log|user_settings|expense_rollup)$")
+
+
+def seed():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        migrate_database()
+        for i in range(20):
+            expense = Expense(filename=f"r{i}.jpg", category=["Food", "Travel"][i % 2], vendor=f"Vendor {i % 5}",
+                              amount=10.0 + i)
+            db.session.add(expense)
+            db.session.flush()
+            db.session.add(ActivityLog(user="Tester", action="Uploaded Receipt", action_type="uploaded",
+                                       expense_id=expense.id))
+            if i % 4 == 0:
+                db.session.add(AnomalyDetection(expense_id=expense.id, anomaly_type="Unusual Amount",
+                                                severity="High", confidence=80))
+        db.session.commit()
+        rebuild_dashboard_rollups()
+
+
+def capture_selects(client, endpoint, engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get(endpoint)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    assert response.status_code == 200, (endpoint, response.get_json())
+    return statements
+
+
+def full_scans(conn, statement, parameters):
+    params = tuple(p.isoformat(sep=" ") if isinstance(p, datetime) else p for p in parameters)
+    plan = [row[3] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, params)]
+    scans = []
+    for detail in plan:
+        match = FULL_SCAN.match(detail)
+        # Walking a table in primary-key order (listing or LIMIT pages) is fine
+        if match and f"ORDER BY {match.group(1)}.id" not in statement:
+            scans.append(detail)
+    return plan, scans
+
+
+def test_dashboard_queries_use_indexes():
+    seed()
+    with app.app_context():
+        engine = db.engine
+    failures = []
+    with app.test_client() as client, engine.connect() as conn:
+        for endpoint in DASHBOARD_ENDPOINTS:
+            for statement, parameters in capture_selects(client, endpoint, engine):
+                plan, scans = full_scans(conn, statement, parameters)
+                if scans:
+                    failures.append(f"{endpoint}: {' '.join(statement.split())[:120]} -> {plan}")
+    assert not failures, "Full table scans:\n" + "\n".join(failures)
+
+
+def test_unused_indexes_are_dropped():
+    seed()
+    with app.app_context():
+        indexes = {index["name"] for index in inspect(db.engine).get_indexes("expense")}
+    # Created by migration 2, dropped by migration 7 once rollups replaced the monthly queries
+    assert "ix_expense_month_category" not in indexes
+    assert "ix_expense_category_uploaded_at" in indexes
+
+
+if __name__ == "__main__":
+    test_dashboard_queries_use_indexes()
+    test_unused_indexes_are_dropped()
+    print("[OK] Every dashboard query uses an index")
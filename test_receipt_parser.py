@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""Receipt parser: totals, subtotal, tax, date and currency from OCR text."""
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from utils.receipt_parser import parse_receipt
+
+GST_INVOICE = """UNIHAKKA INTERNATIONAL SDN BHD
+18 Jun 2018 18:29
+(867388-U)
+Tel:03-3362 4395 Fax:03-3362 4395
+TAX INVOICE
+Invoice # : OR180618021 70501
+Item Qty Total
+NASI PUTIH 2 3.00 SR
+Total Qty: 2
+Total Excluding GST: 7.55
+GST @6%: 0.45
+Total Inclusive GST: 8.00
+Cash 10.00
+Change 2.00
+GST Summary Amount(RM) Tax(RM)
+SR @ 6% 7.55 0.45"""
+
+
+def test_totals_with_thousands_separators():
+    assert parse_receipt("Hotel XYZ\nRoom 1,200.00\nGRAND TOTAL: $1,234.56").total == 1234.56
+    # The total line wins over a larger cash amount
+    assert parse_receipt("Subtotal 8.20\nTOTAL: 9.02\nCASH 20.00\nCHANGE 10.98").total == 9.02
+    assert parse_receipt("TOTAL EUR 12,50\nVAT 20% 2,08").total == 12.5
+
+
+def test_tax_invoice_fields():
+    parsed = parse_receipt(GST_INVOICE)
+    assert (parsed.total, parsed.subtotal, parsed.tax) == (8.0, 7.55, 0.45)
+    assert parsed.date == date(2018, 6, 18)
+    assert parsed.currency == "MYR"
+    assert parsed.vendor == "UNIHAKKA INTERNATIONAL SDN BHD"
+    assert parsed.to_dict()["date"] == "2018-06-18"
+
+
+def test_split_labels_and_date_formats():
+    parsed = parse_receipt("GRANDMA HOMES RESTAURANT\nDate: 13/06/2018\nRice 4.20\nTotal (RM):\n28.00\nCASH\n50.00")
+    assert (parsed.total, parsed.date) == (28.0, date(2018, 6, 13))
+    assert parse_receipt("Date: 2024-03-02").date == date(2024, 3, 2)
+    assert parse_receipt("05/13/2024 09:31").date == date(2024, 5, 13)
+    assert parse_receipt("Mar 7, 2024").date == date(2024, 3, 7)
+    assert parse_receipt("Tel 03-89899823 18:25").total == 0.0
+
+
+if __name__ == "__main__":
+    test_totals_with_thousands_separators()
+    test_tax_invoice_fields()
+    test_split_labels_and_date_formats()
+    print("[OK] Receipt parser")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""Vectorized rescoring reproduces ingest-time anomalies and applies only the differences."""
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from app import (app, db, fingerprint_expense, index_minhash_bands, rebuild_dashboard_rollups, record_anomalies,
+                 record_rollups, record_vendor, rescore_anomalies, score_anomalies, update_category_stats,
+                 AnomalyDetection, Expense, ExpenseRollup)
+from test_duplicate_detection import RECEIPT, RESCAN
+
+
+def ingest(vendor, category, amount, uploaded_at, text=""):
+    """The scoring steps of process_receipt, without OCR."""
+    expense = Expense(filename="r.jpg", category=category, vendor=vendor, amount=amount, uploaded_at=uploaded_at)
+    fingerprint_expense(expense, text)
+    category_stats = update_category_stats(category, amount)
+    vendor_stats = record_vendor(vendor, uploaded_at)
+    db.session.add(expense)
+    db.session.flush()
+    index_minhash_bands([expense])
+    anomalies = score_anomalies(expense.id, amount, vendor, category, uploaded_at, category_stats=category_stats,
+                                text_minhash=expense.text_minhash, vendor_stats=vendor_stats)
+    record_anomalies(anomalies)
+    record_rollups([expense], anomalies)
+    db.session.commit()
+
+
+def seed(count=240):
+    rng = random.Random(7)
+    vendors = ["Starbucks Coffee", "STARBUCKS COFFEE #12", "Grab", "Staples", "Delta Air Lines", "Uber"]
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        start = datetime(2024, 3, 1, 9)
+        for i in range(count):
+            uploaded_at = start + timedelta(hours=7 * i)
+            if i % 20 != 19:
+                vendor = vendors[rng.randrange(len(vendors))] if i % 25 else f"{chr(65 + i // 25)} Mart"
+                amount = round(rng.lognormvariate(3, 0.4) * (8 if rng.random() < 0.05 else 1), 2)
+                category = [None, "Food", "Travel", "Office"][rng.randrange(4)]
+            # Every 20th upload repeats the previous purchase
+            text = RESCAN if i == 150 else RECEIPT if i == 60 else ""
+            ingest(vendor, category, 0.0 if i % 50 == 7 else amount, uploaded_at, text)
+
+
+def anomaly_rows():
+    with app.app_context():
+        return sorted((a.expense_id, a.anomaly_type, a.severity, round(a.confidence, 6), a.description, a.status)
+                      for a in AnomalyDetection.query)
+
+
+def rollup_rows():
+    with app.app_context():
+        return sorted((row.grain, row.bucket, row.category, row.count, row.flagged_count,
+                       round(row.flagged_amount, 2)) for row in ExpenseRollup.query.filter(ExpenseRollup.count > 0))
+
+
+def test_rescore_matches_ingest():
+    seed()
+    ingested = anomaly_rows()
+    descriptions = [row[4] for row in ingested]
+    assert sum("Similar transaction" in text for text in descriptions) >= 5
+    assert sum("Receipt text matches" in text for text in descriptions) == 1
+    assert sum("not found in previous" in text for text in descriptions) >= 10
+    with app.app_context():
+        summary = rescore_anomalies(chunk_size=64)
+    assert (summary["expenses"], summary["inserted"], summary["updated"], summary["removed"]) == (240, 0, 0, 0)
+    assert anomaly_rows() == ingested
+
+
+def test_rescore_applies_differences_and_keeps_reviews():
+    seed()
+    ingested = anomaly_rows()
+    with app.app_context():
+        clean = Expense.query.filter(~Expense.anomalies.any()).order_by(Expense.id).all()
+        anomalies = AnomalyDetection.query.order_by(AnomalyDetection.id).all()
+        anomalies[0].status = "Approved"
+        anomalies[0].description = "Edited"
+        db.session.delete(anomalies[1])
+        db.session.add(AnomalyDetection(expense_id=clean[0].id, anomaly_type="Unknown Vendor", severity="Low",
+                                        confidence=70, status="Pending"))
+        db.session.add(AnomalyDetection(expense_id=clean[1].id, anomaly_type="Unknown Vendor", severity="Low",
+                                        confidence=70, status="Flagged"))
+        db.session.commit()
+        rebuild_dashboard_rollups()
+
+        assert rescore_anomalies(chunk_size=50, dry_run=True)["inserted"] == 1
+        summary = rescore_anomalies(chunk_size=50)
+        assert (summary["inserted"], summary["updated"], summary["removed"]) == (1, 1, 1)
+        reviewed = (clean[1].id, "Unknown Vendor", "Low", 70, None, "Flagged")
+    expected = sorted([row[:5] + ("Approved",) if i == 0 else row for i, row in enumerate(ingested)] + [reviewed])
+    assert anomaly_rows() == expected
+
+    incremental = rollup_rows()
+    with app.app_context():
+        rebuild_dashboard_rollups()
+    assert incremental == rollup_rows()
+
+
+if __name__ == "__main__":
+    test_rescore_matches_ingest()
+    test_rescore_applies_differences_and_keeps_reviews()
+    print("[OK] Anomaly rescoring")
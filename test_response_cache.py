@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""Response cache: hits until the next committed write, ETag revalidation."""
+import os
+import sys
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from app import app, db, AnomalyDetection, Expense
+
+
+def seed():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        expense = Expense(filename="r.jpg", category="Food", vendor="Vendor", amount=12.5)
+        db.session.add(expense)
+        db.session.flush()
+        db.session.add(AnomalyDetection(expense_id=expense.id, anomaly_type="Unusual Amount", severity="High",
+                                        confidence=80))
+        db.session.commit()
+
+
+def test_cached_until_write():
+    seed()
+    with app.test_client() as client:
+        first = client.get("/anomalies/stats")
+        second = client.get("/anomalies/stats")
+        assert (first.headers["X-Cache"], second.headers["X-Cache"]) == ("MISS", "HIT")
+        assert first.get_data() == second.get_data()
+        # Query arguments are part of the key
+        assert client.get("/api/admin/reports?category=Food").headers["X-Cache"] == "MISS"
+
+        client.put("/anomalies/1/status", json={"status": "Approved"})
+        third = client.get("/anomalies/stats")
+        assert third.headers["X-Cache"] == "MISS"
+        assert third.get_json()["severityCounts"]["High"] == 1
+
+
+def test_if_none_match_returns_304():
+    seed()
+    with app.test_client() as client:
+        etag = client.get("/api/auditor/reports").headers["ETag"]
+        revalidated = client.get("/api/auditor/reports", headers={"If-None-Match": etag})
+        assert revalidated.status_code == 304
+        assert revalidated.get_data() == b""
+        assert client.get("/api/auditor/reports", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+if __name__ == "__main__":
+    test_cached_until_write()
+    test_if_none_match_returns_304()
+    print("[OK] Response cache")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""Dashboard rollups: incremental updates on write match a full rebuild."""
+import os
+import sys
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from app import (app, db, migrate_database, rebuild_dashboard_rollups, record_anomalies, record_rollups,
+                 AnomalyDetection, Expense, ExpenseRollup)
+
+
+def seed():
+    """Ingest expenses the way the upload paths do, flagging every third one."""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        migrate_database()
+        start = datetime(2024, 7, 30, 12)
+        for i in range(12):
+            expense = Expense(filename=f"r{i}.jpg", category=["Food", "Travel", None][i % 3],
+                              vendor=["Starbucks Coffee", "STARBUCKS COFFEE #12", "Grab"][i % 3],
+                              amount=10.0 + i, uploaded_at=start + timedelta(days=i))
+            db.session.add(expense)
+            db.session.flush()
+            anomalies = []
+            if i % 3 == 0:
+                anomalies.append(AnomalyDetection(expense_id=expense.id, anomaly_type="Unusual Amount",
+                                                  severity="High", confidence=80, status="Pending"))
+            record_anomalies(anomalies)
+            record_rollups([expense], anomalies)
+            db.session.commit()
+
+
+def rollup_rows():
+    with app.app_context():
+        return sorted(
+            (row.grain, row.bucket, row.category, row.count, round(row.amount, 2),
+             row.flagged_count, round(row.flagged_amount, 2), row.first_expense_id)
+            for row in ExpenseRollup.query.filter(ExpenseRollup.count > 0)
+        )
+
+
+def test_incremental_rollups_match_rebuild():
+    seed()
+    incremental = rollup_rows()
+    with app.app_context():
+        rebuild_dashboard_rollups()
+    assert incremental == rollup_rows()
+    assert ("month", "2024-08", "Travel", 3, 51.0, 0, 0.0, 5) in incremental
+    # Both spellings of the same store share one vendor row
+    assert [row[3] for row in incremental if row[0] == "vendor"] == [4, 8]
+
+
+def test_rejecting_an_anomaly_clears_the_flag():
+    seed()
+    with app.test_client() as client:
+        assert client.get("/api/admin/reports").get_json()["flaggedItems"] == 4
+        response = client.put("/anomalies/1/status", json={"status": "Rejected"})
+        assert response.status_code == 200, response.get_json()
+        assert client.get("/api/admin/reports").get_json()["flaggedItems"] == 3
+        assert client.put("/anomalies/1/status", json={"status": "Closed"}).status_code == 400
+        assert client.put("/anomalies/99/status", json={"status": "Approved"}).status_code == 404
+    incremental = rollup_rows()
+    with app.app_context():
+        rebuild_dashboard_rollups()
+    assert incremental == rollup_rows()
+
+
+if __name__ == "__main__":
+    test_incremental_rollups_match_rebuild()
+    test_rejecting_an_anomaly_clears_the_flag()
+    print("[OK] Dashboard rollups")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""Columnar snapshots: incremental Parquet parts and full Arrow rewrites."""
+import os
+import sys
+import tempfile
+
+import pytest
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+pytest.importorskip("pyarrow")
+import pyarrow.dataset as ds
+
+import app as backend
+from app import app, db, write_snapshot, ActivityLog, AnomalyDetection, Expense
+
+
+def add_expenses(start, count):
+    with app.app_context():
+        for i in range(start, start + count):
+            expense = Expense(filename=f"r{i}.jpg", category="Food", vendor=f"Vendor {i}", amount=10.0 + i)
+            db.session.add(expense)
+            db.session.flush()
+            db.session.add(ActivityLog(user="Tester", action="Uploaded Receipt", action_type="uploaded",
+                                       expense_id=expense.id))
+            if i % 4 == 0:
+                db.session.add(AnomalyDetection(expense_id=expense.id, anomaly_type="Unusual Amount",
+                                                severity="High", confidence=80))
+        db.session.commit()
+
+
+def read_ids(table, file_format="parquet"):
+    return sorted(ds.dataset(os.path.join(backend.SNAPSHOT_DIR, table), format=file_format).to_table()["id"].to_pylist())
+
+
+def test_incremental_then_full_snapshots():
+    backend.SNAPSHOT_DIR = tempfile.mkdtemp()
+    batch_size, backend.SNAPSHOT_BATCH_SIZE = backend.SNAPSHOT_BATCH_SIZE, 3
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    add_expenses(0, 10)
+    with app.app_context():
+        assert write_snapshot() == {"expense": 10, "anomaly_detection": 3, "activity_log": 10}
+        add_expenses(10, 5)
+        assert write_snapshot() == {"expense": 5, "anomaly_detection": 1, "activity_log": 5}
+        assert write_snapshot() == {"expense": 0, "anomaly_detection": 0, "activity_log": 0}
+    assert read_ids("expense") == list(range(1, 16))
+    table = ds.dataset(os.path.join(backend.SNAPSHOT_DIR, "expense")).to_table()
+    assert str(table.schema.field("uploaded_at").type) == "timestamp[us]"
+    assert len(os.listdir(os.path.join(backend.SNAPSHOT_DIR, "expense"))) == 2
+
+    with app.test_client() as client:
+        response = client.post("/snapshots", json={"full": True, "format": "arrow"})
+        assert response.status_code == 200, response.get_json()
+        assert client.post("/snapshots", json={"format": "orc"}).status_code == 400
+        manifest = client.get("/snapshots").get_json()["manifest"]
+    assert read_ids("anomaly_detection", "arrow") == [1, 2, 3, 4]
+    assert manifest["tables"]["expense"]["format"] == "arrow"
+    assert len(manifest["tables"]["expense"]["parts"]) == 1
+    backend.SNAPSHOT_BATCH_SIZE = batch_size
+
+
+if __name__ == "__main__":
+    test_incremental_then_full_snapshots()
+    print("[OK] Snapshots")
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+"""Vendor canonicalization: OCR variants resolve to one known vendor."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from utils.vendor_index import VendorIndex, canonical_key
+
+
+def build_index():
+    index = VendorIndex()
+    for name in ["Starbucks", "Sanyo Stationery Shop", "Unihakka International Sdn Bhd", "Uber", "Office Depot"]:
+        index.add(canonical_key(name))
+    return index
+
+
+def test_canonical_key_strips_deterministic_noise():
+    assert canonical_key("STARBUCKS #1234") == "starbucks"
+    assert canonical_key("Unihakka Internati0nal SDN. BHD.") == "unihakka international"
+
+
+def test_ocr_variants_resolve_to_known_vendor():
+    index = build_index()
+    for raw in ["STARBUCKS #1234", "Starbucks Coffee", "STARBUCKS C0FFEE", "Starbuck"]:
+        assert index.resolve(raw) == "starbucks", raw
+    assert index.resolve("SANYO STATIONARY") == "sanyo stationery"
+    assert index.resolve("0ffice Dep0t #552") == "office depot"
+
+
+def test_distinct_vendors_stay_distinct():
+    index = build_index()
+    for raw in ["Uber Eats", "Star Market", "Office Max"]:
+        assert index.match(raw) is None, raw
+    assert index.resolve("Star Market") == "star market"
+
+
+if __name__ == "__main__":
+    test_canonical_key_strips_deterministic_noise()
+    test_ocr_variants_resolve_to_known_vendor()
+    test_distinct_vendors_stay_distinct()
+    print("[OK] Vendor canonicalization")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""Vendor NER: header window, cross-request batching and header cache."""
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from utils.model_registry import ModelRegistry
+from utils.vendor_ner import NER_HEADER_CHARS, VendorNER, header_window
+
+RECEIPT = """F&P PHARMACY
+(002309592-P)
+NO.20, GROUND FLOOR,
+JALAN BS 10/6 TAMAN BUKIT SERDANG,
+SEKSYEN 10, 43400 SERI KEMBANGAN,
+TEL 03-89899823
+Panadol 12.90
+TOTAL 12.90"""
+
+
+class FakeNER:
+    """Tags the first header line as an ORG and records each call."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, headers, batch_size=None):
+        self.calls.append(list(headers))
+        return [[{"entity_group": "ORG", "word": header.split("\n")[0], "score": 0.9}] for header in headers]
+
+
+def make_ner(wait_ms=50.0):
+    fake = FakeNER()
+    registry = ModelRegistry()
+    registry.register("ner", lambda: fake)
+    return VendorNER(registry=registry, max_batch_size=8, max_wait_ms=wait_ms), fake
+
+
+def test_header_window_keeps_first_lines():
+    header = header_window(RECEIPT)
+    assert header.startswith("F&P PHARMACY\n(002309592-P)")
+    assert "TOTAL" not in header and "Panadol" not in header
+    assert len(header_window("X" * 1000)) == NER_HEADER_CHARS
+
+
+def test_concurrent_receipts_share_one_call_and_cache():
+    ner, fake = make_ner()
+    texts = [f"STORE {n} SDN BHD\nLine two\n{RECEIPT}" for n in range(6)]
+    results = [None] * len(texts)
+
+    def extract(i):
+        results[i] = ner(texts[i])
+
+    threads = [threading.Thread(target=extract, args=(i,)) for i in range(len(texts))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [f"STORE {n} SDN BHD" for n in range(6)]
+    assert len(fake.calls) == 1 and len(fake.calls[0]) == 6
+
+    # Same header again: served from the cache
+    assert ner(texts[0] + "\nanother footer") == "STORE 0 SDN BHD"
+    assert len(fake.calls) == 1
+    assert ner.stats()["cacheHits"] == 1
+
+
+def test_prefetch_tags_duplicate_headers_once():
+    ner, fake = make_ner()
+    ner.prefetch([RECEIPT, RECEIPT + "\nCASH 20.00", "ok"])
+    assert fake.calls == [[header_window(RECEIPT)]]
+    assert ner(RECEIPT) == "F&P PHARMACY" and len(fake.calls) == 1
+
+
+if __name__ == "__main__":
+    test_header_window_keeps_first_lines()
+    test_concurrent_receipts_share_one_call_and_cache()
+    test_prefetch_tags_duplicate_headers_once()
+    print("[OK] Vendor NER")